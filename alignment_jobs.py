@@ -0,0 +1,183 @@
+"""
+File de tâches asynchrones pour les alignements de structures
+Pool de workers borné, suivi d'état, annulation et limite de tâches par utilisateur
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+TERMINAL_STATUSES = (DONE, FAILED, CANCELLED)
+
+
+class JobLimitError(Exception):
+    """L'utilisateur a déjà atteint son nombre maximal de tâches actives."""
+
+
+class JobCancelled(Exception):
+    """Levée par un exécuteur lorsque la tâche a été annulée en cours d'exécution."""
+
+
+class AlignmentJob:
+    """Tâche d'alignement et son état courant."""
+
+    def __init__(self, user_id, params: Dict):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.params = params
+        self.status = QUEUED
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # Incrémenté à chaque changement d'état (utilisé par le flux SSE)
+        self.version = 0
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def to_dict(self) -> Dict:
+        """Représentation JSON de la tâche."""
+        data = {
+            'job_id': self.id,
+            'status': self.status,
+            'pdb_ids': self.params.get('pdb_ids', []),
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'duration': round(self.finished_at - self.started_at, 3)
+            if self.started_at and self.finished_at else None
+        }
+        if self.status == DONE:
+            data['result'] = self.result
+        if self.error:
+            data['error'] = self.error
+        return data
+
+
+class JobQueue:
+    """Exécute des tâches dans un pool de threads borné.
+
+    runner(job) reçoit la tâche, retourne le résultat (dict) ou lève une exception ;
+    il doit surveiller job.cancel_event pour interrompre un travail long.
+    """
+
+    def __init__(self, runner: Callable[[AlignmentJob], Dict], max_workers: int = 2,
+                 max_jobs_per_user: int = 2, keep_finished: int = 200):
+        self.runner = runner
+        self.max_jobs_per_user = max_jobs_per_user
+        self.keep_finished = keep_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='alignment')
+        self._jobs: 'OrderedDict[str, AlignmentJob]' = OrderedDict()
+        self._changed = threading.Condition()
+
+    def submit(self, user_id, params: Dict) -> AlignmentJob:
+        """Ajoute une tâche à la file (JobLimitError si la limite par utilisateur est atteinte)."""
+        with self._changed:
+            active = sum(1 for job in self._jobs.values()
+                         if job.user_id == user_id and not job.finished)
+            if active >= self.max_jobs_per_user:
+                raise JobLimitError(
+                    f'Nombre maximal de tâches en cours atteint ({self.max_jobs_per_user})'
+                )
+            job = AlignmentJob(user_id, params)
+            self._jobs[job.id] = job
+            self._prune()
+        job.future = self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[AlignmentJob]:
+        with self._changed:
+            return self._jobs.get(job_id)
+
+    def jobs_for(self, user_id) -> List[AlignmentJob]:
+        """Tâches connues d'un utilisateur, de la plus récente à la plus ancienne."""
+        with self._changed:
+            return [job for job in reversed(self._jobs.values()) if job.user_id == user_id]
+
+    def counts(self) -> Dict[str, int]:
+        """Nombre de tâches connues par statut."""
+        with self._changed:
+            counts = {status: 0 for status in (QUEUED, RUNNING) + TERMINAL_STATUSES}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return counts
+
+    def cancel(self, job_id: str) -> bool:
+        """Annule une tâche en attente ou en cours. Retourne False si elle est déjà terminée."""
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return False
+        job.cancel_event.set()
+        # Une tâche encore en file n'est jamais démarrée
+        if job.future is not None and job.future.cancel():
+            self._update(job, CANCELLED, finished=True)
+        return True
+
+    def wait_for_change(self, job: AlignmentJob, version: int, timeout: float) -> int:
+        """Attend que la version de la tâche dépasse version (ou le timeout) et la retourne."""
+        with self._changed:
+            self._changed.wait_for(lambda: job.version != version, timeout=timeout)
+            return job.version
+
+    def shutdown(self) -> None:
+        for job in list(self._jobs.values()):
+            job.cancel_event.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job: AlignmentJob) -> None:
+        if job.cancelled:
+            self._update(job, CANCELLED, finished=True)
+            return
+
+        self._update(job, RUNNING, started=True)
+        try:
+            result = self.runner(job)
+        except JobCancelled:
+            self._update(job, CANCELLED, finished=True)
+        except Exception as e:
+            if job.cancelled:
+                self._update(job, CANCELLED, finished=True)
+            else:
+                self._update(job, FAILED, error=str(e), finished=True)
+        else:
+            self._update(job, DONE, result=result, finished=True)
+
+    def _update(self, job: AlignmentJob, status: str, result: Optional[Dict] = None,
+                error: Optional[str] = None, started: bool = False, finished: bool = False) -> None:
+        with self._changed:
+            now = time.time()
+            job.status = status
+            if result is not None:
+                job.result = result
+            if error is not None:
+                job.error = error
+            if started:
+                job.started_at = now
+            if finished:
+                job.finished_at = now
+            job.version += 1
+            self._changed.notify_all()
+
+    def _prune(self) -> None:
+        """Oublie les tâches terminées les plus anciennes au-delà de keep_finished."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job_id]
@@ -6,82 +6,180 @@ Application web Flask pour la recherche de protéines dans RCSB PDB
 Avec système d'authentification
 """
 
-from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for, session, flash
+import time
+_import_started = time.perf_counter()
+
+from flask import Flask, Blueprint, render_template, request, jsonify, send_file, redirect, url_for, session, flash, Response, stream_with_context, g, current_app
 import requests
 import json
-import pandas as pd
-from typing import List, Dict, Optional
+import base64
+import hashlib
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple, Iterator
 import os
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
-import sqlite3
 from functools import wraps
-import subprocess
-import tempfile
-import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+import multiprocessing
+import uuid
+import cProfile
+from rcsb_http import get_session, RCSB_SEARCH_URL, RCSB_DATA_URL
+from rcsb_cache import LRUCache, TwoTierCache
+from models import ProteinRecord
+from structure_store import StructureStore
+from alignment_jobs import AlignmentJob, JobQueue, JobLimitError
+from pymol_pool import PyMOLWorkerPool
+from startup import StartupReport, Subsystem
+from db import Database, UserStore
+from metrics import REGISTRY, CONTENT_TYPE as METRICS_CONTENT_TYPE
+# NumPy et pyarrow ne sont importés qu'à la première utilisation (alignement, matrice, export)
+if TYPE_CHECKING:
+    from structure_alignment import CAChain
 
-app = Flask(__name__)
-app.secret_key = 'votre_cle_secrete_super_securisee_changez_moi'  # CHANGEZ CETTE CLÉ EN PRODUCTION !
+bp = Blueprint('main', __name__)
+SECRET_KEY = 'votre_cle_secrete_super_securisee_changez_moi'  # CHANGEZ CETTE CLÉ EN PRODUCTION !
 
 # Configuration de la base de données
 DATABASE = 'users.db'
 
-def init_db():
+# Nombre maximal de requêtes simultanées vers l'API RCSB lors de la récupération des détails
+RCSB_MAX_WORKERS = 8
+
+# Cache des entrées RCSB (LRU en mémoire + SQLite persistant)
+CACHE_DATABASE = 'rcsb_cache.db'
+ENTRY_CACHE_TTL = 24 * 3600  # secondes
+ENTRY_CACHE_MEMORY_ENTRIES = 256
+ENTRY_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Cache en mémoire des résumés de protéines (ProteinRecord)
+RECORD_CACHE_ENTRIES = 50000
+
+# Fichiers de structure téléchargés (stockage adressé par contenu)
+PDB_FILES_DIR = os.path.join('static', 'pdb_files')
+STRUCTURE_REVALIDATE_AFTER = 7 * 24 * 3600  # secondes
+
+# Tâches d'alignement PyMOL
+ALIGNMENT_WORKERS = 2
+ALIGNMENT_JOBS_PER_USER = 2
+ALIGNMENT_TIMEOUT = 60  # secondes
+PYMOL_WORKER_MAX_JOBS = 50  # tâches avant recyclage d'un worker PyMOL
+
+# Matrices de RMSD toutes-contre-toutes
+RMSD_MATRIX_PROCESSES = os.cpu_count() or 1
+RMSD_MATRIX_MAX_STRUCTURES = 200
+RMSD_MATRIX_SYNC_MAX_STRUCTURES = 40  # au-delà, la matrice n'est calculée qu'en mode stream
+RMSD_MATRIX_KEEP = 32  # matrices gardées en mémoire pour téléchargement
+
+# Préchauffage au démarrage (PDB_WARM_UP=1) : sous-systèmes initialisés et caches pré-remplis
+WARM_UP = os.environ.get('PDB_WARM_UP', '').lower() in ('1', 'true', 'yes')
+WARM_UP_PDB_IDS = [pdb_id for pdb_id in os.environ.get('PDB_WARM_UP_IDS', '').upper().split(',') if pdb_id]
+
+# Profilage cProfile de chaque requête (PDB_PROFILE_REQUESTS=1), fichiers .prof dans PROFILE_DIR
+PROFILE_REQUESTS = os.environ.get('PDB_PROFILE_REQUESTS', '').lower() in ('1', 'true', 'yes')
+PROFILE_DIR = 'profiles'
+
+# Cache des résultats de recherche (listes d'IDs)
+SEARCH_CACHE_TTL = 10 * 60  # secondes
+SEARCH_CACHE_ENTRIES = 512
+
+# Recherches mémorisées pour l'export par identifiant
+SAVED_SEARCH_TTL = 3600  # secondes
+SAVED_SEARCH_ENTRIES = 1024
+EXPORT_PAGE_SIZE = 100  # IDs demandés à l'API par page lors d'un export
+EXPORT_MAX_ROWS = 10000
+
+def init_db() -> UserStore:
     """Initialiser la base de données des utilisateurs"""
-    conn = sqlite3.connect(DATABASE)
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    conn.commit()
-    conn.close()
-
-# Initialiser la base de données au démarrage
-init_db()
-
-def get_db_connection():
-    """Obtenir une connexion à la base de données"""
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    return conn
+    return UserStore(Database(DATABASE))
+
+# Durées de démarrage et sous-systèmes initialisés à la demande
+startup_report = StartupReport()
+
+# Base des utilisateurs (connexions par thread, table créée à la première utilisation)
+database = Subsystem('database', init_db, startup_report)
 
 def login_required(f):
     """Décorateur pour protéger les routes"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if 'user_id' not in session:
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
         return f(*args, **kwargs)
     return decorated_function
 
 class RCSBPDBSearch:
     """Classe pour interagir avec l'API RCSB PDB"""
     
-    def __init__(self):
-        self.search_url = "https://search.rcsb.org/rcsbsearch/v2/query"
-        self.data_url = "https://data.rcsb.org/rest/v1/core/entry"
+    def __init__(self, max_workers: int = RCSB_MAX_WORKERS,
+                 session: Optional[requests.Session] = None,
+                 search_url: str = RCSB_SEARCH_URL, data_url: str = RCSB_DATA_URL,
+                 entry_cache: Optional[TwoTierCache] = None,
+                 search_cache: Optional[LRUCache] = None,
+                 record_cache: Optional[LRUCache] = None):
+        self.search_url = search_url
+        self.data_url = data_url
+        self.max_workers = max_workers
+        # Cache des entrées JSON (désactivé si None)
+        self.entry_cache = entry_cache
+        # Cache des listes d'IDs renvoyées par l'API de recherche (désactivé si None)
+        self.search_cache = search_cache
+        # Cache des résumés ProteinRecord, bien plus compacts que le JSON complet (désactivé si None)
+        self.record_cache = record_cache
+        # Session HTTP partagée (pool keep-alive, timeouts, reprises) sauf si fournie
+        self._session = session
+    
+    @property
+    def session(self) -> requests.Session:
+        """Session HTTP utilisée pour tous les appels RCSB."""
+        return self._session if self._session is not None else get_session()
         
     def search_by_id(self, pdb_id: str) -> Optional[Dict]:
         """Récupère les informations détaillées d'une protéine par son ID PDB."""
-        url = f"{self.data_url}/{pdb_id.upper()}"
+        pdb_id = pdb_id.upper()
+        
+        if self.entry_cache is not None:
+            cached = self.entry_cache.get(pdb_id)
+            if cached is not None:
+                return cached
+        
+        url = f"{self.data_url}/{pdb_id}"
         
         try:
-            response = requests.get(url)
+            # Revalidation conditionnelle d'une entrée expirée (ETag / Last-Modified)
+            stale = self.entry_cache.get_stale(pdb_id) if self.entry_cache is not None else None
+            headers = {}
+            if stale is not None:
+                if stale.etag:
+                    headers['If-None-Match'] = stale.etag
+                if stale.last_modified:
+                    headers['If-Modified-Since'] = stale.last_modified
+            
+            response = self.session.get(url, headers=headers)
+            
+            if response.status_code == 304 and stale is not None:
+                self.entry_cache.touch(pdb_id)
+                return stale.value
+            
             response.raise_for_status()
-            return response.json()
+            data = response.json()
+            
+            if self.entry_cache is not None and isinstance(data, dict):
+                self.entry_cache.set(pdb_id, data,
+                                     etag=response.headers.get('ETag'),
+                                     last_modified=response.headers.get('Last-Modified'))
+            return data
         except requests.exceptions.RequestException as e:
             print(f"Erreur lors de la récupération de {pdb_id}: {e}")
             return None
     
-    def search_by_name(self, protein_name: str, max_results: int = 10) -> List[str]:
+    def search_by_name(self, protein_name: str, max_results: int = 10, start: int = 0) -> List[str]:
         """Recherche des protéines par nom."""
-        query = {
+        return self._execute_query(self.name_query(protein_name), max_results, start)
+    
+    @staticmethod
+    def name_query(protein_name: str) -> Dict:
+        """Requête de recherche par nom."""
+        return {
             "query": {
                 "type": "terminal",
                 "service": "text",
@@ -99,12 +197,15 @@ class RCSBPDBSearch:
                 "scoring_strategy": "combined"
             }
         }
-        
-        return self._execute_query(query, max_results)
     
-    def search_by_organism(self, organism: str, max_results: int = 10) -> List[str]:
+    def search_by_organism(self, organism: str, max_results: int = 10, start: int = 0) -> List[str]:
         """Recherche des protéines par organisme source."""
-        query = {
+        return self._execute_query(self.organism_query(organism), max_results, start)
+    
+    @staticmethod
+    def organism_query(organism: str) -> Dict:
+        """Requête de recherche par organisme source."""
+        return {
             "query": {
                 "type": "terminal",
                 "service": "text",
@@ -121,12 +222,15 @@ class RCSBPDBSearch:
                 "sort": [{"sort_by": "score", "direction": "desc"}]
             }
         }
-        
-        return self._execute_query(query, max_results)
     
-    def search_by_keyword(self, keyword: str, max_results: int = 10) -> List[str]:
+    def search_by_keyword(self, keyword: str, max_results: int = 10, start: int = 0) -> List[str]:
         """Recherche générale par mot-clé."""
-        query = {
+        return self._execute_query(self.keyword_query(keyword), max_results, start)
+    
+    @staticmethod
+    def keyword_query(keyword: str) -> Dict:
+        """Requête de recherche générale par mot-clé."""
+        return {
             "query": {
                 "type": "terminal",
                 "service": "full_text",
@@ -140,12 +244,15 @@ class RCSBPDBSearch:
                 "results_verbosity": "compact"
             }
         }
-        
-        return self._execute_query(query, max_results)
     
-    def search_by_resolution(self, max_resolution: float, max_results: int = 10) -> List[str]:
+    def search_by_resolution(self, max_resolution: float, max_results: int = 10, start: int = 0) -> List[str]:
         """Recherche des structures avec une résolution maximale donnée."""
-        query = {
+        return self._execute_query(self.resolution_query(max_resolution), max_results, start)
+    
+    @staticmethod
+    def resolution_query(max_resolution: float) -> Dict:
+        """Requête des structures avec une résolution maximale donnée."""
+        return {
             "query": {
                 "type": "terminal",
                 "service": "text",
@@ -162,12 +269,16 @@ class RCSBPDBSearch:
                 "sort": [{"sort_by": "rcsb_entry_info.resolution_combined", "direction": "asc"}]
             }
         }
-        
-        return self._execute_query(query, max_results)
     
     def advanced_search(self, protein_name: str, organism: str = None, 
-                       max_resolution: float = None, max_results: int = 10) -> List[str]:
+                       max_resolution: float = None, max_results: int = 10, start: int = 0) -> List[str]:
         """Recherche avancée combinant plusieurs critères."""
+        return self._execute_query(self.advanced_query(protein_name, organism, max_resolution),
+                                   max_results, start)
+    
+    @staticmethod
+    def advanced_query(protein_name: str, organism: str = None, max_resolution: float = None) -> Dict:
+        """Requête avancée combinant plusieurs critères."""
         queries = [
             {
                 "type": "terminal",
@@ -202,7 +313,7 @@ class RCSBPDBSearch:
                 }
             })
         
-        query = {
+        return {
             "query": {
                 "type": "group",
                 "logical_operator": "and",
@@ -215,121 +326,233 @@ class RCSBPDBSearch:
                 "sort": [{"sort_by": "score", "direction": "desc"}]
             }
         }
-        
-        return self._execute_query(query, max_results)
     
-    def _execute_query(self, query: Dict, max_results: int = 10) -> List[str]:
+    @staticmethod
+    def _paginated_query(query: Dict, max_results: int, start: int) -> Dict:
+        """Copie de la requête avec la pagination RCSB (paginate.start / paginate.rows)."""
+        request_options = dict(query.get("request_options", {}))
+        request_options["paginate"] = {"start": start, "rows": max_results}
+        return {**query, "request_options": request_options}
+    
+    @staticmethod
+    def _search_cache_key(query: Dict, max_results: int) -> str:
+        """Clé canonique d'une requête : JSON à clés triées + nombre de résultats."""
+        return json.dumps(query, sort_keys=True, separators=(',', ':')) + f'|{max_results}'
+    
+    def invalidate_search_cache(self, query: Optional[Dict] = None, max_results: int = 10, start: int = 0) -> None:
+        """Invalide une page de requête mise en cache, ou tout le cache si query est None."""
+        if self.search_cache is None:
+            return
+        if query is None:
+            self.search_cache.clear()
+        else:
+            paginated = self._paginated_query(query, max_results, start)
+            self.search_cache.invalidate(self._search_cache_key(paginated, max_results))
+    
+    def _execute_query(self, query: Dict, max_results: int = 10, start: int = 0) -> List[str]:
         """Exécute une requête sur l'API RCSB."""
+        return self.execute_query_page(query, max_results, start)[0]
+    
+    def execute_query_page(self, query: Dict, max_results: int = 10, start: int = 0) -> Tuple[List[str], int]:
+        """Exécute une requête paginée côté RCSB et retourne (IDs de la page, nombre total de résultats).
+        
+        Les résultats sont mis en cache si search_cache est actif.
+        """
+        query = self._paginated_query(query, max_results, start)
+        
+        cache_key = None
+        if self.search_cache is not None:
+            cache_key = self._search_cache_key(query, max_results)
+            cached = self.search_cache.get(cache_key)
+            if cached is not None:
+                results, total_count = cached
+                return list(results), total_count
+        
         try:
-            response = requests.post(
+            response = self.session.post(
                 self.search_url,
                 json=query,
                 headers={"Content-Type": "application/json"}
             )
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if not isinstance(data, dict):
-                return []
             
-            if "result_set" in data and data["result_set"]:
-                if not isinstance(data["result_set"], list):
-                    return []
+            # L'API de recherche répond 204 lorsqu'aucun résultat ne correspond
+            if response.status_code == 204:
+                results, total_count = [], 0
+            else:
+                response.raise_for_status()
+                data = response.json()
                 
                 results = []
-                for item in data["result_set"][:max_results]:
-                    if isinstance(item, dict) and "identifier" in item:
-                        results.append(item["identifier"])
-                    elif isinstance(item, str):
-                        results.append(item)
-                
-                return results
-            else:
-                return []
+                total_count = 0
+                if isinstance(data, dict) and isinstance(data.get("result_set"), list):
+                    for item in data["result_set"][:max_results]:
+                        if isinstance(item, dict) and "identifier" in item:
+                            results.append(item["identifier"])
+                        elif isinstance(item, str):
+                            results.append(item)
+                    total_count = data.get("total_count", start + len(results))
+            
+            # Seules les réponses valides sont mises en cache (pas les erreurs)
+            if cache_key is not None:
+                self.search_cache.set(cache_key, (tuple(results), total_count))
+            
+            return results, total_count
                 
         except Exception as e:
             print(f"Erreur lors de la requête: {e}")
+            return [], 0
+    
+    def get_protein_details(self, pdb_ids: List[str], max_workers: Optional[int] = None) -> List[Dict]:
+        """Récupère les détails de plusieurs protéines (forme dictionnaire, voir ProteinRecord)."""
+        return [record.to_dict() for record in self.get_protein_records(pdb_ids, max_workers)]
+    
+    def get_protein_records(self, pdb_ids: List[str], max_workers: Optional[int] = None) -> List[ProteinRecord]:
+        """Récupère les résumés de plusieurs protéines.
+
+        Les requêtes sont exécutées en parallèle dans un pool de threads borné
+        (max_workers, par défaut self.max_workers). L'ordre des IDs est conservé
+        et l'échec d'un ID n'affecte pas les autres.
+        """
+        pdb_ids = [pdb_id for pdb_id in pdb_ids if isinstance(pdb_id, str)]
+        if not pdb_ids:
             return []
+        
+        workers = self.max_workers if max_workers is None else max_workers
+        workers = max(1, min(workers, len(pdb_ids)))
+        
+        if workers == 1:
+            records = [self.fetch_record(pdb_id) for pdb_id in pdb_ids]
+        else:
+            # executor.map renvoie les résultats dans l'ordre des entrées
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                records = list(executor.map(self.fetch_record, pdb_ids))
+        
+        return [record for record in records if record is not None]
     
-    def get_protein_details(self, pdb_ids: List[str]) -> List[Dict]:
-        """Récupère les détails de plusieurs protéines."""
-        proteins_data = []
+    def iter_protein_details(self, pdb_ids: List[str],
+                             max_workers: Optional[int] = None) -> Iterator[Tuple[int, Dict]]:
+        """Produit (index, détails) pour chaque protéine dès que ses détails sont disponibles.
         
-        for pdb_id in pdb_ids:
-            if not isinstance(pdb_id, str):
-                continue
-                
+        L'ordre de production est celui d'arrivée ; index est la position dans pdb_ids.
+        Les IDs en échec sont ignorés.
+        """
+        pdb_ids = [pdb_id for pdb_id in pdb_ids if isinstance(pdb_id, str)]
+        if not pdb_ids:
+            return
+        
+        workers = self.max_workers if max_workers is None else max_workers
+        workers = max(1, min(workers, len(pdb_ids)))
+        
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = {executor.submit(self.fetch_record, pdb_id): index
+                       for index, pdb_id in enumerate(pdb_ids)}
+            for future in as_completed(futures):
+                record = future.result()
+                if record is not None:
+                    yield futures[future], record.to_dict()
+        finally:
+            # Client déconnecté : ne pas lancer les requêtes restantes
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def iter_query_records(self, query: Dict, limit: int, page_size: int = 100) -> Iterator[ProteinRecord]:
+        """Parcourt tous les résultats d'une requête, page par page, dans l'ordre de l'API.
+        
+        Une seule page de résumés est gardée en mémoire à la fois.
+        """
+        start = 0
+        while start < limit:
+            ids, total_count = self.execute_query_page(query, min(page_size, limit - start), start)
+            if not ids:
+                break
+            for record in self.get_protein_records(ids):
+                yield record
+            start += len(ids)
+            if start >= total_count:
+                break
+    
+    def fetch_record(self, pdb_id: str) -> Optional[ProteinRecord]:
+        """Récupère le résumé d'une protéine (None en cas d'échec)."""
+        if self.record_cache is not None:
+            record = self.record_cache.get(pdb_id.upper())
+            if record is not None:
+                return record
+        
+        try:
             data = self.search_by_id(pdb_id)
-            
-            if data and isinstance(data, dict):
-                try:
-                    protein_info = {
-                        'PDB_ID': pdb_id,
-                        'Title': 'N/A',
-                        'Resolution': 'N/A',
-                        'Experimental_Method': 'N/A',
-                        'Release_Date': 'N/A',
-                        'Organism': 'N/A'
-                    }
-                    
-                    if 'struct' in data and isinstance(data['struct'], dict):
-                        protein_info['Title'] = data['struct'].get('title', 'N/A')
-                    
-                    if 'rcsb_entry_info' in data and isinstance(data['rcsb_entry_info'], dict):
-                        res = data['rcsb_entry_info'].get('resolution_combined')
-                        if res:
-                            if isinstance(res, list) and len(res) > 0:
-                                protein_info['Resolution'] = res[0]
-                            elif isinstance(res, (int, float)):
-                                protein_info['Resolution'] = res
-                    
-                    if 'exptl' in data and isinstance(data['exptl'], list) and len(data['exptl']) > 0:
-                        if isinstance(data['exptl'][0], dict):
-                            protein_info['Experimental_Method'] = data['exptl'][0].get('method', 'N/A')
-                    
-                    if 'rcsb_accession_info' in data and isinstance(data['rcsb_accession_info'], dict):
-                        protein_info['Release_Date'] = data['rcsb_accession_info'].get('initial_release_date', 'N/A')
-                    
-                    if 'rcsb_entity_source_organism' in data:
-                        organisms = data['rcsb_entity_source_organism']
-                        if isinstance(organisms, list) and len(organisms) > 0:
-                            if isinstance(organisms[0], dict):
-                                protein_info['Organism'] = organisms[0].get('scientific_name', 'N/A')
-                    
-                    proteins_data.append(protein_info)
-                    
-                except Exception as e:
-                    print(f"Erreur lors de l'extraction des données pour {pdb_id}: {e}")
+        except Exception as e:
+            print(f"Erreur lors de la récupération de {pdb_id}: {e}")
+            return None
+        
+        if not data or not isinstance(data, dict):
+            return None
+        
+        try:
+            record = ProteinRecord.from_entry(pdb_id, data)
+        except Exception as e:
+            print(f"Erreur lors de l'extraction des données pour {pdb_id}: {e}")
+            return None
         
-        return proteins_data
+        if self.record_cache is not None:
+            self.record_cache.set(pdb_id.upper(), record)
+        return record
+
+
+def _create_pdb_search() -> RCSBPDBSearch:
+    return RCSBPDBSearch(
+        entry_cache=TwoTierCache(
+            CACHE_DATABASE,
+            ttl=ENTRY_CACHE_TTL,
+            memory_entries=ENTRY_CACHE_MEMORY_ENTRIES,
+            max_bytes=ENTRY_CACHE_MAX_BYTES
+        ),
+        search_cache=LRUCache(max_entries=SEARCH_CACHE_ENTRIES, ttl=SEARCH_CACHE_TTL),
+        record_cache=LRUCache(max_entries=RECORD_CACHE_ENTRIES, ttl=ENTRY_CACHE_TTL)
+    )
+
+# Session HTTP partagée (pool de connexions vers RCSB)
+http_session = Subsystem('http_session', get_session, startup_report)
 
+# Client RCSB et ses caches
+pdb_search = Subsystem('pdb_search', _create_pdb_search, startup_report)
 
-# Initialiser le searcher
-pdb_search = RCSBPDBSearch()
+# Stockage local des fichiers de structure
+structure_store = Subsystem(
+    'structure_store',
+    lambda: StructureStore(PDB_FILES_DIR, revalidate_after=STRUCTURE_REVALIDATE_AFTER),
+    startup_report
+)
 
-@app.route('/login', methods=['GET', 'POST'])
+# Recherches récentes (identifiant -> requête), exportables sans renvoyer les résultats
+saved_searches = Subsystem(
+    'saved_searches',
+    lambda: LRUCache(max_entries=SAVED_SEARCH_ENTRIES, ttl=SAVED_SEARCH_TTL),
+    startup_report
+)
+
+# Matrices de RMSD calculées, disponibles au téléchargement
+rmsd_matrix_results = Subsystem('rmsd_matrix_results', lambda: LRUCache(max_entries=RMSD_MATRIX_KEEP), startup_report)
+
+@bp.route('/login', methods=['GET', 'POST'])
 def login():
     """Page de connexion"""
     if request.method == 'POST':
         username = request.form.get('username')
         password = request.form.get('password')
         
-        conn = get_db_connection()
-        user = conn.execute('SELECT * FROM users WHERE username = ?', (username,)).fetchone()
-        conn.close()
+        user = database.get().get_by_username(username)
         
         if user and check_password_hash(user['password'], password):
             session['user_id'] = user['id']
             session['username'] = user['username']
             flash('Connexion réussie !', 'success')
-            return redirect(url_for('index'))
+            return redirect(url_for('main.index'))
         else:
             flash('Identifiant ou mot de passe incorrect', 'error')
     
     return render_template('login.html')
 
-@app.route('/register', methods=['GET', 'POST'])
+@bp.route('/register', methods=['GET', 'POST'])
 def register():
     """Page d'inscription"""
     if request.method == 'POST':
@@ -351,85 +574,129 @@ def register():
             flash('Le mot de passe doit contenir au moins 6 caractères', 'error')
             return render_template('register.html')
         
-        # Vérifier si l'utilisateur existe déjà
-        conn = get_db_connection()
-        existing_user = conn.execute('SELECT * FROM users WHERE username = ? OR email = ?', 
-                                    (username, email)).fetchone()
-        
-        if existing_user:
-            conn.close()
+        # Créer l'utilisateur (les contraintes UNIQUE détectent un compte existant)
+        hashed_password = generate_password_hash(password)
+        if database.get().create(username, email, hashed_password) is None:
             flash('Cet identifiant ou email est déjà utilisé', 'error')
             return render_template('register.html')
         
-        # Créer l'utilisateur
-        hashed_password = generate_password_hash(password)
-        conn.execute('INSERT INTO users (username, email, password) VALUES (?, ?, ?)',
-                    (username, email, hashed_password))
-        conn.commit()
-        conn.close()
-        
         flash('Compte créé avec succès ! Vous pouvez maintenant vous connecter.', 'success')
-        return redirect(url_for('login'))
+        return redirect(url_for('main.login'))
     
     return render_template('register.html')
 
-@app.route('/logout')
+@bp.route('/logout')
 def logout():
     """Déconnexion"""
     session.clear()
     flash('Vous avez été déconnecté', 'success')
-    return redirect(url_for('login'))
+    return redirect(url_for('main.login'))
 
-@app.route('/')
+@bp.route('/')
 @login_required
 def index():
     """Page d'accueil"""
-    return render_template('index.html', username=session.get('username'))
+    from exporters import parquet_available
+    return render_template('index.html', username=session.get('username'),
+                           parquet_available=parquet_available())
+
+def _build_search_query(search_type: str, data: Dict) -> Optional[Dict]:
+    """Construit la requête RCSB correspondant au type de recherche (None pour une recherche par ID)."""
+    if search_type == 'keyword':
+        return RCSBPDBSearch.keyword_query(data.get('keyword', ''))
+    
+    elif search_type == 'name':
+        return RCSBPDBSearch.name_query(data.get('protein_name', ''))
+    
+    elif search_type == 'organism':
+        return RCSBPDBSearch.organism_query(data.get('organism', ''))
+    
+    elif search_type == 'resolution':
+        resolution = float(data.get('resolution', 2.0))
+        return RCSBPDBSearch.resolution_query(resolution)
+    
+    elif search_type == 'advanced':
+        protein_name = data.get('protein_name', '')
+        organism = data.get('organism', '') or None
+        resolution = data.get('resolution', '') 
+        resolution = float(resolution) if resolution else None
+        return RCSBPDBSearch.advanced_query(protein_name, organism, resolution)
+    
+    return None
 
-@app.route('/search', methods=['POST'])
+def _query_fingerprint(query: Dict) -> str:
+    """Empreinte courte d'une requête, pour lier un curseur à sa recherche."""
+    canonical = json.dumps(query, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:12]
+
+def _encode_cursor(query: Dict, start: int) -> str:
+    """Curseur opaque désignant la page commençant à start."""
+    payload = json.dumps({'start': start, 'q': _query_fingerprint(query)})
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+def _decode_cursor(cursor: str, query: Dict) -> int:
+    """Retourne la position de départ d'un curseur (ValueError s'il est invalide)."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        start = int(payload['start'])
+    except Exception:
+        raise ValueError('Curseur de pagination invalide')
+    if payload.get('q') != _query_fingerprint(query) or start < 0:
+        raise ValueError('Curseur de pagination invalide pour cette recherche')
+    return start
+
+@bp.route('/search', methods=['POST'])
 @login_required
 def search():
-    """Endpoint de recherche"""
+    """Endpoint de recherche
+    
+    Paramètres optionnels :
+    - cursor : curseur renvoyé dans next_cursor pour obtenir la page suivante
+    - stream : si vrai, la réponse est en NDJSON (une ligne par protéine, dès réception)
+    """
     try:
         data = request.get_json()
         search_type = data.get('search_type')
         max_results = int(data.get('max_results', 10))
+        stream = bool(data.get('stream', False))
         
         results_ids = []
+        total_count = 0
+        next_cursor = None
         
-        if search_type == 'keyword':
-            keyword = data.get('keyword', '')
-            results_ids = pdb_search.search_by_keyword(keyword, max_results)
-            
-        elif search_type == 'name':
-            protein_name = data.get('protein_name', '')
-            results_ids = pdb_search.search_by_name(protein_name, max_results)
-            
-        elif search_type == 'organism':
-            organism = data.get('organism', '')
-            results_ids = pdb_search.search_by_organism(organism, max_results)
-            
-        elif search_type == 'id':
+        search_id = None
+        
+        if search_type == 'id':
             pdb_id = data.get('pdb_id', '')
             results_ids = [pdb_id.upper()]
-            
-        elif search_type == 'resolution':
-            resolution = float(data.get('resolution', 2.0))
-            results_ids = pdb_search.search_by_resolution(resolution, max_results)
-            
-        elif search_type == 'advanced':
-            protein_name = data.get('protein_name', '')
-            organism = data.get('organism', '') or None
-            resolution = data.get('resolution', '') 
-            resolution = float(resolution) if resolution else None
-            results_ids = pdb_search.advanced_search(protein_name, organism, resolution, max_results)
+            total_count = 1
+            search_id = _save_search({'pdb_ids': results_ids})
+        else:
+            query = _build_search_query(search_type, data)
+            if query is not None:
+                search_id = _save_search({'query': query, 'max_results': max_results})
+                cursor = data.get('cursor')
+                start = _decode_cursor(cursor, query) if cursor else 0
+                
+                # La pagination est transmise à l'API RCSB (paginate.start / rows)
+                results_ids, total_count = pdb_search.get().execute_query_page(query, max_results, start)
+                
+                next_start = start + len(results_ids)
+                if results_ids and next_start < total_count:
+                    next_cursor = _encode_cursor(query, next_start)
+        
+        if stream:
+            return _stream_search_results(results_ids, total_count, next_cursor, search_id)
         
         # Récupérer les détails
-        proteins = pdb_search.get_protein_details(results_ids)
+        proteins = pdb_search.get().get_protein_details(results_ids)
         
         return jsonify({
             'success': True,
             'count': len(proteins),
+            'total_count': total_count,
+            'next_cursor': next_cursor,
+            'search_id': search_id,
             'results': proteins
         })
         
@@ -439,42 +706,92 @@ def search():
             'error': str(e)
         }), 400
 
-@app.route('/export', methods=['POST'])
+def _save_search(search: Dict) -> str:
+    """Mémorise une recherche et retourne son identifiant (stable pour une même requête)."""
+    search_id = _query_fingerprint(search)
+    saved_searches.get().set(search_id, search)
+    return search_id
+
+def _stream_search_results(results_ids: List[str], total_count: int, next_cursor: Optional[str],
+                           search_id: Optional[str] = None) -> Response:
+    """Réponse NDJSON : un en-tête, une ligne par protéine dès réception, puis une ligne de fin."""
+    def generate():
+        yield json.dumps({
+            'type': 'meta',
+            'total_count': total_count,
+            'next_cursor': next_cursor,
+            'search_id': search_id,
+            'expected': len(results_ids)
+        }) + '\n'
+        
+        count = 0
+        try:
+            for index, protein_info in pdb_search.get().iter_protein_details(results_ids):
+                count += 1
+                yield json.dumps({'type': 'result', 'index': index, 'result': protein_info}) + '\n'
+        except Exception as e:
+            yield json.dumps({'type': 'error', 'error': str(e)}) + '\n'
+        
+        yield json.dumps({'type': 'end', 'count': count}) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={'X-Accel-Buffering': 'no', 'Cache-Control': 'no-cache'})
+
+def _export_records(data: Dict) -> Iterator[ProteinRecord]:
+    """Résumés à exporter : recherche mémorisée (search_id) ou résultats envoyés par le client."""
+    search_id = data.get('search_id')
+    if search_id:
+        search = saved_searches.get().get(search_id)
+        if search is None:
+            raise LookupError('Recherche introuvable ou expirée, relancez la recherche')
+        # Par défaut, autant de lignes que la recherche en affichait ; limit=all pour tout exporter
+        limit = data.get('limit') or search.get('max_results', len(search.get('pdb_ids', [])))
+        limit = EXPORT_MAX_ROWS if limit == 'all' else min(int(limit), EXPORT_MAX_ROWS)
+        if 'pdb_ids' in search:
+            return iter(pdb_search.get().get_protein_records(search['pdb_ids'][:limit]))
+        return pdb_search.get().iter_query_records(search['query'], limit, EXPORT_PAGE_SIZE)
+    
+    results = data.get('results', [])
+    if not results:
+        raise ValueError('Aucun résultat à exporter')
+    return (ProteinRecord.from_dict(result) for result in results if isinstance(result, dict))
+
+@bp.route('/export', methods=['GET', 'POST'])
+@login_required
 def export():
-    """Exporter les résultats en CSV"""
+    """Exporter les résultats en CSV, TSV ou Parquet
+    
+    Le fichier est écrit directement dans la réponse, ligne par ligne.
+    Paramètres : search_id (recherche mémorisée) ou results, format, limit
+    (nombre de lignes, par défaut celui de la recherche ; 'all' jusqu'à EXPORT_MAX_ROWS)
+    """
+    from exporters import EXPORT_FORMATS, iter_export
+    
     try:
-        data = request.get_json()
-        results = data.get('results', [])
-        
-        if not results:
-            return jsonify({'success': False, 'error': 'Aucun résultat à exporter'}), 400
+        data = request.get_json() if request.method == 'POST' else request.args.to_dict()
+        fmt = (data.get('format') or 'csv').lower()
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({'success': False, 'error': f"Format d'export inconnu: {fmt}"}), 400
         
-        # Créer le DataFrame
-        df = pd.DataFrame(results)
+        chunks = iter_export(_export_records(data), fmt)
         
-        # Sauvegarder dans un fichier temporaire
+        mimetype, extension = EXPORT_FORMATS[fmt]
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f'pdb_search_results_{timestamp}.csv'
-        filepath = os.path.join('static', filename)
+        filename = f'pdb_search_results_{timestamp}.{extension}'
         
-        # Créer le dossier static s'il n'existe pas
-        os.makedirs('static', exist_ok=True)
-        
-        df.to_csv(filepath, index=False)
-        
-        return jsonify({
-            'success': True,
-            'filename': filename,
-            'download_url': f'/download/{filename}'
-        })
+        return Response(stream_with_context(chunks), mimetype=mimetype,
+                        headers={'Content-Disposition': f'attachment; filename={filename}',
+                                 'X-Accel-Buffering': 'no'})
         
+    except LookupError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 400
 
-@app.route('/download/<filename>')
+@bp.route('/download/<filename>')
 def download(filename):
     """Télécharger un fichier CSV"""
     filepath = os.path.join('static', filename)
@@ -483,32 +800,23 @@ def download(filename):
     else:
         return "Fichier non trouvé", 404
 
-@app.route('/download_pdb/<pdb_id>')
+@bp.route('/download_pdb/<pdb_id>')
 def download_pdb(pdb_id):
     """Télécharger un fichier PDB"""
     try:
         pdb_id = pdb_id.upper()
         
-        # URL du fichier PDB sur RCSB
-        pdb_url = f"https://files.rcsb.org/download/{pdb_id}.pdb"
-        
-        # Télécharger le fichier PDB
-        response = requests.get(pdb_url)
-        response.raise_for_status()
+        # Copie locale si disponible, sinon téléchargement en flux vers le disque
+        structure = structure_store.get().get(pdb_id, 'pdb')
         
-        # Sauvegarder dans le dossier static
-        os.makedirs('static/pdb_files', exist_ok=True)
-        filepath = os.path.join('static', 'pdb_files', f'{pdb_id}.pdb')
-        
-        with open(filepath, 'wb') as f:
-            f.write(response.content)
-        
-        return send_file(filepath, as_attachment=True, download_name=f'{pdb_id}.pdb')
+        # conditional=True : gestion des en-têtes Range, If-None-Match et If-Modified-Since
+        return send_file(structure.path, as_attachment=True, download_name=f'{pdb_id}.pdb',
+                         mimetype='chemical/x-pdb', conditional=True, etag=structure.sha256)
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
 
-@app.route('/pymol_script/<pdb_id>')
+@bp.route('/pymol_script/<pdb_id>')
 def pymol_script(pdb_id):
     """Générer un script PyMOL pour ouvrir la structure"""
     try:
@@ -538,7 +846,7 @@ bg_color white
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
 
-@app.route('/open_pymol/<pdb_id>')
+@bp.route('/open_pymol/<pdb_id>')
 def open_pymol(pdb_id):
     """Lancer PyMOL avec la structure (nécessite PyMOL installé)"""
     try:
@@ -591,7 +899,7 @@ cmd.bg_color('white')
             'error': f'Impossible de lancer PyMOL: {str(e)}. Veuillez télécharger le fichier PDB manuellement.'
         }), 400
 
-@app.route('/align_pymol', methods=['POST'])
+@bp.route('/align_pymol', methods=['POST'])
 def align_pymol():
     """Générer un script PyMOL pour aligner plusieurs structures"""
     try:
@@ -677,7 +985,7 @@ def align_pymol():
             'error': str(e)
         }), 400
 
-@app.route('/download_pymol_script/<filename>')
+@bp.route('/download_pymol_script/<filename>')
 def download_pymol_script(filename):
     """Télécharger un script PyMOL"""
     filepath = os.path.join('static', 'pymol_scripts', filename)
@@ -686,10 +994,118 @@ def download_pymol_script(filename):
     else:
         return "Fichier non trouvé", 404
 
-@app.route('/create_alignment_session', methods=['POST'])
+# Couleurs attribuées aux protéines alignées
+ALIGNMENT_COLORS = ['cyan', 'magenta', 'yellow', 'salmon', 'lime', 'orange', 'purple', 'marine']
+
+def run_pymol_alignment(job: AlignmentJob) -> Dict:
+    """Exécute un alignement sur un worker PyMOL persistant (appelé par la file de tâches)."""
+    pdb_ids = job.params['pdb_ids']
+    colors = ALIGNMENT_COLORS
+    
+    # Créer le dossier pour les sessions
+    os.makedirs('static/pymol_sessions', exist_ok=True)
+    
+    # Nom du fichier de session
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    session_filename = f'alignment_{"_".join(pdb_ids[:3])}_{timestamp}_{job.id[:8]}.pse'
+    session_path = os.path.abspath(os.path.join('static', 'pymol_sessions', session_filename))
+    
+    # Fichiers locaux du stockage de structures ; PyMOL télécharge lui-même les autres
+    paths = {}
+    for pdb_id in pdb_ids:
+        try:
+            paths[pdb_id] = structure_store.get().get(pdb_id, 'pdb').path
+        except Exception as e:
+            print(f"Fichier local indisponible pour {pdb_id}, téléchargement par PyMOL: {e}")
+    
+    pymol_results = pymol_pool.get().run(
+        {'pdb_ids': pdb_ids, 'colors': colors, 'paths': paths, 'session_path': session_path},
+        timeout=ALIGNMENT_TIMEOUT,
+        should_cancel=lambda: job.cancelled
+    )
+    
+    # Vérifier que le fichier .pse a été créé
+    if not os.path.exists(session_path):
+        raise RuntimeError('Le fichier de session n\'a pas été créé')
+    
+    alignment_results = pymol_results.get('alignment_results', [])
+    print(f"Alignement {job.id[:8]} terminé: {pymol_results['timing']}")
+    
+    return {
+        'success': True,
+        'filename': session_filename,
+        'download_url': f'/download_session/{session_filename}',
+        'pdb_count': len(pdb_ids),
+        'reference': pdb_ids[0],
+        'pdb_ids': pdb_ids,
+        'colors': {pdb_ids[i]: colors[i % len(colors)] for i in range(len(pdb_ids))},
+        'alignment_results': alignment_results,
+        'rmsd_results': alignment_results,  # Alias pour compatibilité frontend
+        'timing': pymol_results['timing']
+    }
+
+# Pool de processus PyMOL persistants (workers démarrés à la première tâche)
+pymol_pool = Subsystem(
+    'pymol_pool',
+    lambda: PyMOLWorkerPool(size=ALIGNMENT_WORKERS, max_jobs_per_worker=PYMOL_WORKER_MAX_JOBS),
+    startup_report
+)
+
+def load_ca_chains(pdb_ids: List[str]) -> Dict[str, 'CAChain']:
+    """Charge les Cα des structures depuis le stockage local (téléchargements en parallèle)."""
+    from structure_alignment import read_ca_atoms
+    
+    def load(pdb_id):
+        return pdb_id, read_ca_atoms(structure_store.get().get(pdb_id, 'pdb').path)
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(RCSB_MAX_WORKERS, len(pdb_ids)))) as executor:
+        return dict(executor.map(load, set(pdb_ids)))
+
+def align_with_numpy(pdb_ids: List[str]) -> Dict:
+    """Alignement Cα (séquence + Kabsch) sur la première structure, sans PyMOL ni fichier de session."""
+    from structure_alignment import align_to_reference
+    
+    colors = ALIGNMENT_COLORS
+    alignment_results = align_to_reference(pdb_ids, load_ca_chains(pdb_ids))
+    return {
+        'success': True,
+        'engine': 'numpy',
+        'pdb_count': len(pdb_ids),
+        'reference': pdb_ids[0],
+        'pdb_ids': pdb_ids,
+        'colors': {pdb_ids[i]: colors[i % len(colors)] for i in range(len(pdb_ids))},
+        'alignment_results': alignment_results,
+        'rmsd_results': alignment_results  # Alias pour compatibilité frontend
+    }
+
+def run_alignment_job(job: AlignmentJob) -> Dict:
+    """Exécute une tâche d'alignement avec le moteur demandé (PyMOL par défaut, ou NumPy)."""
+    if job.params.get('engine') == 'numpy':
+        return align_with_numpy(job.params['pdb_ids'])
+    return run_pymol_alignment(job)
+
+# File de tâches d'alignement (les workers web restent libres pendant les alignements)
+alignment_queue = Subsystem(
+    'alignment_queue',
+    lambda: JobQueue(run_alignment_job, max_workers=ALIGNMENT_WORKERS,
+                     max_jobs_per_user=ALIGNMENT_JOBS_PER_USER),
+    startup_report
+)
+
+def _job_for_current_user(job_id: str) -> Optional[AlignmentJob]:
+    """Retourne la tâche si elle appartient à l'utilisateur connecté."""
+    job = alignment_queue.get().get(job_id)
+    if job is None or job.user_id != session.get('user_id'):
+        return None
+    return job
+
+@bp.route('/create_alignment_session', methods=['POST'])
 @login_required
 def create_alignment_session():
-    """Créer une session PyMOL avec alignement des protéines sélectionnées"""
+    """Soumettre une tâche de création de session PyMOL avec alignement des protéines sélectionnées
+
+    Avec "session": false, la tâche calcule seulement les RMSD avec le moteur NumPy.
+    """
     try:
         data = request.get_json()
         pdb_ids = data.get('pdb_ids', [])
@@ -702,191 +1118,200 @@ def create_alignment_session():
         
         pdb_ids = [pdb_id.upper() for pdb_id in pdb_ids]
         
-        # Créer le dossier pour les sessions
-        os.makedirs('static/pymol_sessions', exist_ok=True)
+        params = {'pdb_ids': pdb_ids}
+        # Sans fichier de session demandé : RMSD calculés par le moteur NumPy, dans la même file
+        if data.get('session', True) is False:
+            params['engine'] = 'numpy'
         
-        # Nom du fichier de session
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        session_filename = f'alignment_{"_".join(pdb_ids[:3])}_{timestamp}.pse'
-        session_path = os.path.abspath(os.path.join('static', 'pymol_sessions', session_filename))
-        
-        # Couleurs pour chaque protéine
-        colors = ['cyan', 'magenta', 'yellow', 'salmon', 'lime', 'orange', 'purple', 'marine']
+        job = alignment_queue.get().submit(session['user_id'], params)
         
-        # Créer un script Python temporaire pour PyMOL
-        pymol_script = f"""#!/usr/bin/env python3
-# Script PyMOL pour alignement de structures
-import pymol
-from pymol import cmd
-import json
-import sys
-
-try:
-    # Lancer PyMOL en mode headless
-    pymol.finish_launching(['pymol', '-c'])
-    
-    # Liste des PDB IDs
-    pdb_ids = {pdb_ids}
-    colors = {colors}
-    
-    # Charger toutes les structures
-    print('Chargement des structures...')
-    for pdb_id in pdb_ids:
-        cmd.fetch(pdb_id, type='pdb', async_=0)
-        print(f'Chargé: {{pdb_id}}')
-    
-    # Appliquer les couleurs et afficher en cartoon
-    print('Application des couleurs...')
-    for i, pdb_id in enumerate(pdb_ids):
-        color = colors[i % len(colors)]
-        cmd.show('cartoon', pdb_id)
-        cmd.color(color, pdb_id)
-        print(f'{{pdb_id}}: {{color}}')
-    
-    # Faire l'alignement (première protéine = référence)
-    reference = pdb_ids[0]
-    alignment_results = []
-    
-    print(f'Alignement sur référence: {{reference}}')
-    for pdb_id in pdb_ids[1:]:
-        result = cmd.align(pdb_id, reference)
-        rmsd = result[0]
-        aligned_atoms = result[1]
-        alignment_results.append({{
-            'structure': pdb_id,
-            'reference': reference,
-            'rmsd': round(rmsd, 3),
-            'atoms': aligned_atoms
-        }})
-        print(f'RMSD {{pdb_id}} vs {{reference}}: {{rmsd:.3f}} Å ({{aligned_atoms}} atomes)')
-    
-    # Paramètres d'affichage
-    cmd.center()
-    cmd.zoom()
-    cmd.set('cartoon_fancy_helices', 1)
-    cmd.set('cartoon_fancy_sheets', 1)
-    cmd.bg_color('white')
-    cmd.set('seq_view', 1)
-    
-    # Sauvegarder la session
-    print(f'Sauvegarde de la session: {session_path}')
-    cmd.save('{session_path}')
-    
-    # Écrire les résultats dans un fichier JSON
-    results_file = '{session_path}.json'
-    with open(results_file, 'w') as f:
-        json.dump({{
+        return jsonify({
             'success': True,
-            'alignment_results': alignment_results,
-            'pdb_ids': pdb_ids,
-            'reference': reference
-        }}, f)
-    
-    print('Session créée avec succès!')
-    cmd.quit()
-    sys.exit(0)
-    
-except Exception as e:
-    print(f'Erreur: {{e}}', file=sys.stderr)
-    # Écrire l'erreur dans le fichier JSON
-    results_file = '{session_path}.json'
-    with open(results_file, 'w') as f:
-        json.dump({{
+            'job_id': job.id,
+            'status': job.status,
+            'status_url': f'/alignment_jobs/{job.id}',
+            'events_url': f'/alignment_jobs/{job.id}/events',
+            'cancel_url': f'/alignment_jobs/{job.id}/cancel'
+        }), 202
+        
+    except JobLimitError as e:
+        return jsonify({
             'success': False,
             'error': str(e)
-        }}, f)
-    sys.exit(1)
-"""
-        
-        # Créer un fichier temporaire pour le script
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as temp_file:
-            temp_file.write(pymol_script)
-            temp_script_path = temp_file.name
+        }), 429
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Erreur: {str(e)}'
+        }), 400
+
+@bp.route('/alignment_jobs/<job_id>')
+@login_required
+def alignment_job_status(job_id):
+    """État (et résultat une fois terminée) d'une tâche d'alignement"""
+    job = _job_for_current_user(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Tâche introuvable'}), 404
+    return jsonify({'success': True, **job.to_dict()})
+
+@bp.route('/alignment_jobs/<job_id>/events')
+@login_required
+def alignment_job_events(job_id):
+    """Flux SSE des changements d'état d'une tâche d'alignement"""
+    job = _job_for_current_user(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Tâche introuvable'}), 404
+    
+    def generate():
+        version = -1
+        while True:
+            current = alignment_queue.get().wait_for_change(job, version, timeout=15)
+            if current == version:
+                # Commentaire SSE pour garder la connexion ouverte
+                yield ': keep-alive\n\n'
+                continue
+            version = current
+            yield f'event: status\ndata: {json.dumps(job.to_dict())}\n\n'
+            if job.finished:
+                break
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'X-Accel-Buffering': 'no', 'Cache-Control': 'no-cache'})
+
+@bp.route('/alignment_jobs/<job_id>/cancel', methods=['POST'])
+@login_required
+def cancel_alignment_job(job_id):
+    """Annuler une tâche d'alignement en attente ou en cours"""
+    job = _job_for_current_user(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Tâche introuvable'}), 404
+    if not alignment_queue.get().cancel(job_id):
+        return jsonify({'success': False, 'error': 'La tâche est déjà terminée'}), 409
+    return jsonify({'success': True, 'job_id': job_id})
+
+# Pool de processus partagé pour les matrices de RMSD
+rmsd_executor = Subsystem(
+    'rmsd_executor',
+    lambda: ProcessPoolExecutor(max_workers=RMSD_MATRIX_PROCESSES,
+                                mp_context=multiprocessing.get_context('spawn')),
+    startup_report
+)
+
+def _rmsd_matrix_file(matrix_id: str, fmt: str) -> Response:
+    """Réponse de téléchargement d'une matrice calculée (.npy ou .csv)."""
+    stored = rmsd_matrix_results.get().get(matrix_id)
+    if stored is None:
+        return jsonify({'success': False, 'error': 'Matrice introuvable ou expirée'}), 404
+    pdb_ids, matrix = stored
+    from rmsd_matrix import matrix_to_npy, matrix_to_csv
+    
+    if fmt == 'npy':
+        return Response(matrix_to_npy(matrix), mimetype='application/octet-stream',
+                        headers={'Content-Disposition': f'attachment; filename=rmsd_matrix_{matrix_id[:8]}.npy'})
+    return Response(matrix_to_csv(pdb_ids, matrix), mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename=rmsd_matrix_{matrix_id[:8]}.csv'})
+
+@bp.route('/rmsd_matrix', methods=['POST'])
+@login_required
+def rmsd_matrix():
+    """Matrice de RMSD Cα toutes-contre-toutes
+    
+    Paramètres : pdb_ids, format ('json', 'npy' ou 'csv'), stream (progression en NDJSON,
+    obligatoire au-delà de RMSD_MATRIX_SYNC_MAX_STRUCTURES structures)
+    """
+    from pdb_parser import load_atoms
+    from rmsd_matrix import iter_rmsd_matrix, matrix_to_json
+    
+    try:
+        data = request.get_json()
+        pdb_ids = [pdb_id.upper() for pdb_id in data.get('pdb_ids', [])]
+        fmt = data.get('format', 'json')
+        stream = bool(data.get('stream', False))
         
-        try:
-            # Exécuter PyMOL dans un subprocess isolé avec timeout
-            print(f'Exécution du script PyMOL: {temp_script_path}')
-            result = subprocess.run(
-                ['python3', temp_script_path],
-                capture_output=True,
-                text=True,
-                timeout=60  # Timeout de 60 secondes
-            )
-            
-            # Afficher la sortie pour debug
-            if result.stdout:
-                print('PyMOL stdout:', result.stdout)
-            if result.stderr:
-                print('PyMOL stderr:', result.stderr)
-            
-            # Lire les résultats du fichier JSON
-            results_json_path = f'{session_path}.json'
-            time.sleep(0.5)  # Petit délai pour s'assurer que le fichier est écrit
-            
-            if os.path.exists(results_json_path):
-                with open(results_json_path, 'r') as f:
-                    pymol_results = json.load(f)
-                
-                # Nettoyer le fichier JSON temporaire
-                os.remove(results_json_path)
-                
-                if not pymol_results.get('success', False):
-                    return jsonify({
-                        'success': False,
-                        'error': pymol_results.get('error', 'Erreur inconnue lors de la création de la session')
-                    }), 400
-                
-                # Vérifier que le fichier .pse a été créé
-                if not os.path.exists(session_path):
-                    return jsonify({
-                        'success': False,
-                        'error': 'Le fichier de session n\'a pas été créé'
-                    }), 400
-                
-                alignment_results = pymol_results.get('alignment_results', [])
-            else:
-                # Fichier JSON non trouvé, vérifier si le fichier .pse existe
-                if os.path.exists(session_path):
-                    alignment_results = []
-                    print('Session créée mais pas de résultats d\'alignement disponibles')
-                else:
-                    return jsonify({
-                        'success': False,
-                        'error': 'Échec de la création de la session PyMOL'
-                    }), 400
-            
+        if len(pdb_ids) < 2:
             return jsonify({
-                'success': True,
-                'filename': session_filename,
-                'download_url': f'/download_session/{session_filename}',
-                'pdb_count': len(pdb_ids),
-                'reference': pdb_ids[0],
-                'pdb_ids': pdb_ids,
-                'colors': {pdb_ids[i]: colors[i % len(colors)] for i in range(len(pdb_ids))},
-                'alignment_results': alignment_results,
-                'rmsd_results': alignment_results  # Alias pour compatibilité frontend
-            })
+                'success': False,
+                'error': 'Veuillez sélectionner au moins 2 protéines'
+            }), 400
+        if len(pdb_ids) > RMSD_MATRIX_MAX_STRUCTURES:
+            return jsonify({
+                'success': False,
+                'error': f'Maximum {RMSD_MATRIX_MAX_STRUCTURES} structures par matrice'
+            }), 400
+        if not stream and len(pdb_ids) > RMSD_MATRIX_SYNC_MAX_STRUCTURES:
+            # Calcul en O(n²) : une requête sans progression bloquerait trop longtemps
+            return jsonify({
+                'success': False,
+                'error': f'Au-delà de {RMSD_MATRIX_SYNC_MAX_STRUCTURES} structures, utilisez le mode stream'
+            }), 400
+        if fmt not in ('json', 'npy', 'csv'):
+            return jsonify({'success': False, 'error': f'Format inconnu: {fmt}'}), 400
+        
+        # Télécharger et analyser les structures avant de distribuer le calcul :
+        # les workers n'ont plus qu'à projeter les fichiers .npy en mémoire
+        def prepare(pdb_id):
+            path = structure_store.get().get(pdb_id, 'pdb').path
+            load_atoms(path)
+            return path
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(RCSB_MAX_WORKERS, len(pdb_ids)))) as executor:
+            paths = list(executor.map(prepare, pdb_ids))
+        
+        progress = iter_rmsd_matrix(paths, rmsd_executor.get(), RMSD_MATRIX_PROCESSES)
+        matrix_id = uuid.uuid4().hex
+        
+        if stream:
+            def generate():
+                matrix = None
+                try:
+                    for done, total, matrix, atoms in progress:
+                        yield json.dumps({'type': 'progress', 'done': done, 'total': total}) + '\n'
+                except Exception as e:
+                    yield json.dumps({'type': 'error', 'error': str(e)}) + '\n'
+                    return
+                rmsd_matrix_results.get().set(matrix_id, (pdb_ids, matrix))
+                yield json.dumps({
+                    'type': 'result',
+                    'pdb_ids': pdb_ids,
+                    'matrix': matrix_to_json(matrix),
+                    'npy_url': f'/rmsd_matrix/{matrix_id}.npy',
+                    'csv_url': f'/rmsd_matrix/{matrix_id}.csv'
+                }) + '\n'
             
-        finally:
-            # Nettoyer le script temporaire
-            try:
-                if os.path.exists(temp_script_path):
-                    os.remove(temp_script_path)
-            except:
-                pass
-        
-    except subprocess.TimeoutExpired:
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                            headers={'X-Accel-Buffering': 'no', 'Cache-Control': 'no-cache'})
+        
+        for done, total, matrix, atoms in progress:
+            pass
+        rmsd_matrix_results.get().set(matrix_id, (pdb_ids, matrix))
+        
+        if fmt != 'json':
+            return _rmsd_matrix_file(matrix_id, fmt)
+        
         return jsonify({
-            'success': False,
-            'error': 'Timeout: La création de la session PyMOL a pris trop de temps (>60s)'
-        }), 400
+            'success': True,
+            'pdb_ids': pdb_ids,
+            'matrix': matrix_to_json(matrix),
+            'atoms': atoms.tolist(),
+            'npy_url': f'/rmsd_matrix/{matrix_id}.npy',
+            'csv_url': f'/rmsd_matrix/{matrix_id}.csv'
+        })
+        
     except Exception as e:
         return jsonify({
             'success': False,
-            'error': f'Erreur: {str(e)}'
+            'error': str(e)
         }), 400
 
-@app.route('/download_session/<filename>')
+@bp.route('/rmsd_matrix/<matrix_id>.<fmt>')
+@login_required
+def download_rmsd_matrix(matrix_id, fmt):
+    """Télécharger une matrice de RMSD déjà calculée (.npy ou .csv)"""
+    if fmt not in ('npy', 'csv'):
+        return "Fichier non trouvé", 404
+    return _rmsd_matrix_file(matrix_id, fmt)
+
+@bp.route('/download_session/<filename>')
 @login_required
 def download_session(filename):
     """Télécharger un fichier de session PyMOL"""
@@ -896,5 +1321,147 @@ def download_session(filename):
     else:
         return "Fichier non trouvé", 404
 
+# --- Instrumentation (/metrics) ---
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Durée des requêtes par route (corps des réponses en flux compris)',
+    ('method', 'route', 'status')
+)
+
+def _cache_samples(name: str, cache) -> List[Tuple[Dict[str, str], Dict]]:
+    """Statistiques d'un cache (et de ses niveaux pour un TwoTierCache)."""
+    if cache is None:
+        return []
+    if isinstance(cache, TwoTierCache):
+        return [({'cache': f'{name}_memory'}, cache.memory.stats()), ({'cache': f'{name}_disk'}, cache.disk.stats())]
+    return [({'cache': name}, cache.stats())]
+
+def _all_cache_stats() -> List[Tuple[Dict[str, str], Dict]]:
+    """Caches des sous-systèmes déjà initialisés (aucun n'est créé pour l'occasion)."""
+    samples = []
+    if pdb_search.initialized:
+        searcher = pdb_search.get()
+        samples += _cache_samples('entry', searcher.entry_cache)
+        samples += _cache_samples('search', searcher.search_cache)
+        samples += _cache_samples('record', searcher.record_cache)
+    if saved_searches.initialized:
+        samples += _cache_samples('saved_searches', saved_searches.get())
+    return samples
+
+REGISTRY.callback(
+    'rcsb_cache_requests_total', 'Lectures de cache par cache et résultat',
+    lambda: [(dict(labels, result=result), stats[key])
+             for labels, stats in _all_cache_stats() for result, key in (('hit', 'hits'), ('miss', 'misses'))],
+    kind='counter'
+)
+REGISTRY.callback(
+    'rcsb_cache_hit_ratio', 'Proportion de lectures servies par le cache',
+    lambda: [(labels, stats['hit_ratio']) for labels, stats in _all_cache_stats()]
+)
+REGISTRY.callback(
+    'rcsb_cache_entries', 'Nombre d\'entrées par cache',
+    lambda: [(labels, stats['entries']) for labels, stats in _all_cache_stats()]
+)
+REGISTRY.callback(
+    'alignment_jobs', 'Tâches d\'alignement connues par statut',
+    lambda: [({'status': status}, count) for status, count in alignment_queue.get().counts().items()]
+    if alignment_queue.initialized else []
+)
+REGISTRY.callback(
+    'app_startup_seconds', 'Durée des phases de démarrage',
+    lambda: [({'phase': phase}, seconds) for phase, seconds in startup_report.as_dict().items()]
+)
+
+def _start_request() -> None:
+    g.request_started = time.perf_counter()
+    if current_app.config.get('PROFILE_REQUESTS'):
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+def _finish_request(response: Response) -> Response:
+    started = g.pop('request_started', None)
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        response.headers['X-Profile-File'] = _dump_profile(profiler, route)
+    
+    if started is not None:
+        labels = {'method': request.method, 'route': route, 'status': str(response.status_code)}
+        if response.is_streamed:
+            # Réponse en flux : mesurer jusqu'à la fin de l'envoi du corps
+            response.call_on_close(lambda: REQUEST_LATENCY.observe(time.perf_counter() - started, **labels))
+        else:
+            REQUEST_LATENCY.observe(time.perf_counter() - started, **labels)
+    return response
+
+def _dump_profile(profiler: cProfile.Profile, route: str) -> str:
+    """Écrit le profil de la requête (à ouvrir avec pstats ou snakeviz) et retourne le nom du fichier."""
+    profile_dir = current_app.config.get('PROFILE_DIR', PROFILE_DIR)
+    os.makedirs(profile_dir, exist_ok=True)
+    slug = ''.join(c if c.isalnum() else '_' for c in route).strip('_') or 'root'
+    filename = f'{datetime.now().strftime("%Y%m%d_%H%M%S_%f")}_{request.method}_{slug}.prof'
+    profiler.dump_stats(os.path.join(profile_dir, filename))
+    return filename
+
+@bp.route('/metrics')
+def metrics():
+    """Métriques au format texte Prometheus"""
+    return Response(REGISTRY.render(), mimetype=None, content_type=METRICS_CONTENT_TYPE)
+
+def warm_up(app: Flask) -> None:
+    """Initialise les sous-systèmes et pré-remplit les caches avant de recevoir du trafic."""
+    with startup_report.phase('warm_up'):
+        for subsystem in (database, http_session, pdb_search, structure_store, saved_searches):
+            subsystem.get()
+        
+        # Entrées les plus récemment lues du cache disque -> LRU en mémoire
+        searcher = pdb_search.get()
+        if searcher.entry_cache is not None:
+            searcher.entry_cache.preload(ENTRY_CACHE_MEMORY_ENTRIES)
+        
+        # Résumés de protéines demandés explicitement (PDB_WARM_UP_IDS)
+        pdb_ids = app.config.get('WARM_UP_PDB_IDS') or []
+        if pdb_ids:
+            searcher.get_protein_records(pdb_ids)
+        
+        # Modules lourds utilisés par les alignements natifs, les matrices et les exports
+        import structure_alignment  # noqa: F401
+        import rmsd_matrix  # noqa: F401
+        import exporters  # noqa: F401
+
+def create_app(config: Optional[Dict] = None) -> Flask:
+    """Crée l'application Flask.
+    
+    Aucun sous-système n'est initialisé ici (base, session HTTP, caches, pools) :
+    ils le sont à la première requête qui en a besoin, ou par warm_up si WARM_UP est vrai.
+    """
+    if 'import' not in startup_report.as_dict():
+        startup_report.record('import', time.perf_counter() - _import_started)
+    
+    with startup_report.phase('create_app'):
+        app = Flask(__name__)
+        app.secret_key = SECRET_KEY
+        app.config['WARM_UP'] = WARM_UP
+        app.config['WARM_UP_PDB_IDS'] = WARM_UP_PDB_IDS
+        app.config['PROFILE_REQUESTS'] = PROFILE_REQUESTS
+        app.config['PROFILE_DIR'] = PROFILE_DIR
+        if config:
+            app.config.update(config)
+        app.register_blueprint(bp)
+        app.before_request(_start_request)
+        app.after_request(_finish_request)
+        app.extensions['startup_report'] = startup_report
+    
+    if app.config['WARM_UP']:
+        warm_up(app)
+    
+    print(startup_report.format())
+    return app
+
+# Application par défaut (python app.py, flask run, gunicorn app:app)
+app = create_app()
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,311 @@
+"""
+Microbenchmarks de RCSBPDBSearch et de /search sur des réponses RCSB enregistrées
+
+Les réponses de fixtures/ sont rejouées par un serveur HTTP local : aucune requête
+ne part vers RCSB et les mesures sont comparables d'une exécution à l'autre.
+
+Utilisation :
+    python benchmarks/bench_search.py --output bench.json
+    python benchmarks/bench_search.py --compare bench.json      # écart avec une exécution précédente
+    python benchmarks/bench_search.py --record                  # réenregistrer les fixtures depuis RCSB
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+sys.path.insert(0, ROOT)
+
+DEFAULT_SIZES = (10, 100, 500)
+DEFAULT_REPEAT = 5
+
+
+# --- Fixtures et serveur local ---
+
+def load_fixtures() -> Dict:
+    with open(os.path.join(FIXTURES_DIR, 'search_response.json'), encoding='utf-8') as f:
+        search = json.load(f)
+    with open(os.path.join(FIXTURES_DIR, 'entries.json'), encoding='utf-8') as f:
+        entries = json.load(f)
+    return {'search': search, 'entries': entries}
+
+
+def result_ids(search: Dict, count: int) -> List[str]:
+    """IDs enregistrés, complétés par des IDs synthétiques si count dépasse l'enregistrement."""
+    ids = [item['identifier'] for item in search['result_set']]
+    extra = max(0, count - len(ids))
+    return (ids + [f'9{i:03X}' for i in range(extra)])[:count]
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # En-têtes et corps sont écrits séparément : sans TCP_NODELAY, l'ACK retardé ajoute ~40 ms
+    disable_nagle_algorithm = True
+    fixtures: Dict = {}
+    total_count = 0
+    latency = 0.0
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, body: bytes) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        query = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        paginate = query.get('request_options', {}).get('paginate', {'start': 0, 'rows': 10})
+        start, rows = paginate['start'], paginate['rows']
+        ids = result_ids(self.fixtures['search'], min(start + rows, self.total_count))[start:]
+        response = dict(self.fixtures['search'], total_count=self.total_count,
+                        result_set=[{'identifier': pdb_id, 'score': 1.0} for pdb_id in ids])
+        self._send_json(json.dumps(response).encode('utf-8'))
+
+    def do_GET(self):
+        pdb_id = self.path.rstrip('/').rsplit('/', 1)[-1].upper()
+        entries = self.fixtures['entries']
+        if pdb_id in entries:
+            entry = entries[pdb_id]
+        else:
+            # ID synthétique : une entrée enregistrée, choisie de façon déterministe
+            names = sorted(entries)
+            entry = dict(entries[names[zlib.crc32(pdb_id.encode()) % len(names)]], rcsb_id=pdb_id)
+        self._send_json(json.dumps(entry).encode('utf-8'))
+
+
+class StubServer:
+    """Serveur local imitant les API de recherche et de données RCSB."""
+
+    def __init__(self, fixtures: Dict, total_count: int, latency: float = 0.0):
+        handler = type('Handler', (_StubHandler,), {
+            'fixtures': fixtures, 'total_count': total_count, 'latency': latency
+        })
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f'http://127.0.0.1:{self.server.server_port}'
+
+    def set_total_count(self, total_count: int) -> None:
+        self.server.RequestHandlerClass.total_count = total_count
+
+    def __enter__(self) -> 'StubServer':
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# --- Mesures ---
+
+def measure(func: Callable[[], object], repeat: int, warmup: int = 1) -> Dict:
+    """Exécute func warmup + repeat fois et retourne les statistiques (secondes)."""
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.fmean(timings),
+        'stdev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        'timings': timings,
+    }
+
+
+def run_benchmarks(sizes: List[int], repeat: int, latency: float) -> List[Dict]:
+    from app import RCSBPDBSearch, create_app, pdb_search
+    from models import ProteinRecord
+    from rcsb_cache import LRUCache
+
+    fixtures = load_fixtures()
+    results = []
+
+    def record(name: str, size: int, stats: Dict) -> None:
+        stats.update(name=name, size=size, repeat=repeat,
+                     per_item=stats['median'] / size if size else None)
+        results.append(stats)
+        print(f"{name:<32} n={size:<5} médiane {stats['median'] * 1000:9.3f} ms", file=sys.stderr)
+
+    with StubServer(fixtures, total_count=max(sizes), latency=latency) as stub:
+        def searcher(**caches) -> RCSBPDBSearch:
+            return RCSBPDBSearch(search_url=f'{stub.base_url}/search',
+                                 data_url=f'{stub.base_url}/entry', **caches)
+
+        query = RCSBPDBSearch.keyword_query('hemoglobin')
+        entries = list(fixtures['entries'].values())
+
+        client = create_app({'TESTING': True}).test_client()
+        with client.session_transaction() as flask_session:
+            flask_session['user_id'] = 0
+
+        for size in sizes:
+            stub.set_total_count(size)
+            ids = result_ids(fixtures['search'], size)
+
+            # Requête de recherche : aller-retour HTTP + analyse du result_set (sans cache)
+            plain = searcher()
+            record('execute_query', size, measure(lambda: plain._execute_query(query, size), repeat))
+
+            # Extraction seule (JSON déjà décodé -> ProteinRecord), sans réseau
+            payloads = [entries[i % len(entries)] for i in range(size)]
+            record('extract_records', size, measure(
+                lambda: [ProteinRecord.from_entry(f'{i:04d}', data) for i, data in enumerate(payloads)], repeat))
+
+            # Détails : une requête par entrée vers le serveur local, sans cache
+            record('get_protein_details', size, measure(lambda: plain.get_protein_details(ids), repeat))
+
+            # Détails servis par le cache de résumés
+            cached = searcher(record_cache=LRUCache(max_entries=max(sizes)))
+            record('get_protein_details_cached', size, measure(lambda: cached.get_protein_details(ids), repeat))
+
+            # /search de bout en bout via le client de test Flask
+            body = {'search_type': 'keyword', 'keyword': 'hemoglobin', 'max_results': size}
+
+            def post_search(stream: bool = False) -> None:
+                response = client.post('/search', json=dict(body, stream=stream))
+                response.get_data()
+                assert response.status_code == 200, response.status_code
+
+            pdb_search.set(searcher())
+            record('search_endpoint', size, measure(post_search, repeat))
+            record('search_endpoint_stream', size, measure(lambda: post_search(stream=True), repeat))
+            pdb_search.set(searcher(search_cache=LRUCache(max_entries=64),
+                                    record_cache=LRUCache(max_entries=max(sizes))))
+            record('search_endpoint_cached', size, measure(post_search, repeat))
+            pdb_search.set(None)
+
+    return results
+
+
+# --- Sortie, comparaison et enregistrement ---
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(results: List[Dict], sizes: List[int], repeat: int, latency: float) -> Dict:
+    return {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'git_revision': _git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'sizes': sizes,
+            'repeat': repeat,
+            'latency': latency,
+        },
+        'results': results,
+    }
+
+
+def compare(report: Dict, baseline: Dict, threshold: float) -> int:
+    """Affiche le rapport des médianes avec la référence ; retourne le nombre de régressions."""
+    previous = {(r['name'], r['size']): r for r in baseline.get('results', [])}
+    regressions = 0
+    print(f"{'benchmark':<32} {'n':>5} {'référence':>12} {'actuel':>12} {'ratio':>7}")
+    for result in report['results']:
+        old = previous.get((result['name'], result['size']))
+        if old is None:
+            continue
+        ratio = result['median'] / old['median'] if old['median'] else float('inf')
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  RÉGRESSION'
+            regressions += 1
+        print(f"{result['name']:<32} {result['size']:>5} {old['median'] * 1000:>10.3f}ms "
+              f"{result['median'] * 1000:>10.3f}ms {ratio:>7.2f}{flag}")
+    return regressions
+
+
+def record_fixtures(pdb_ids: List[str], keyword: str) -> None:
+    """Réenregistre les fixtures depuis les API RCSB réelles."""
+    from rcsb_http import RCSB_DATA_URL, RCSB_SEARCH_URL, get_session
+    from app import RCSBPDBSearch
+
+    session = get_session()
+    query = RCSBPDBSearch._paginated_query(RCSBPDBSearch.keyword_query(keyword), 25, 0)
+    response = session.post(RCSB_SEARCH_URL, json=query)
+    response.raise_for_status()
+    with open(os.path.join(FIXTURES_DIR, 'search_response.json'), 'w', encoding='utf-8') as f:
+        json.dump(response.json(), f, indent=1)
+
+    entries = {}
+    for pdb_id in pdb_ids:
+        response = session.get(f'{RCSB_DATA_URL}/{pdb_id}')
+        response.raise_for_status()
+        entries[pdb_id] = response.json()
+    with open(os.path.join(FIXTURES_DIR, 'entries.json'), 'w', encoding='utf-8') as f:
+        json.dump(entries, f, indent=1, sort_keys=True)
+    print(f'{len(entries)} entrées et 1 réponse de recherche enregistrées dans {FIXTURES_DIR}')
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Microbenchmarks de la recherche RCSB sur fixtures enregistrées')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help='Tailles de résultats mesurées')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Mesures par benchmark')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Latence simulée du serveur local, en secondes par requête')
+    parser.add_argument('--output', help='Fichier JSON de résultats (sortie standard par défaut)')
+    parser.add_argument('--compare', help='Rapport JSON précédent à comparer')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Ralentissement toléré avant de signaler une régression (0.10 = 10 %%)')
+    parser.add_argument('--record', action='store_true', help='Réenregistrer les fixtures depuis RCSB')
+    parser.add_argument('--record-ids', nargs='+', default=['4HHB', '1CRN', '6VXX', '1D3Z', '2LYZ'])
+    args = parser.parse_args(argv)
+
+    if args.record:
+        record_fixtures(args.record_ids, 'hemoglobin')
+        return 0
+
+    # Les messages de l'application (print) ne doivent pas se mêler au JSON de la sortie standard
+    with contextlib.redirect_stdout(sys.stderr):
+        results = run_benchmarks(args.sizes, args.repeat, args.latency)
+    report = build_report(results, args.sizes, args.repeat, args.latency)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        return 1 if compare(report, baseline, args.threshold) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
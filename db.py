@@ -0,0 +1,140 @@
+"""
+Couche d'accès SQLite : une connexion par thread, mode WAL et requêtes préparées en cache
+Base commune des tables persistantes (utilisateurs, cache RCSB, ...)
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+# Réglages appliqués à chaque nouvelle connexion
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',         # lecteurs et écrivain concurrents
+    'synchronous': 'NORMAL',       # suffisant en WAL, beaucoup moins de fsync
+    'busy_timeout': 5000,          # millisecondes d'attente si la base est verrouillée
+    'foreign_keys': 'ON',
+    'temp_store': 'MEMORY',
+    'cache_size': -16000,          # ~16 Mo de cache de pages par connexion
+    'mmap_size': 64 * 1024 * 1024,
+}
+
+# Requêtes préparées gardées par connexion (cache de sqlite3)
+STATEMENT_CACHE_SIZE = 256
+
+
+class Database:
+    """Pool de connexions SQLite, une par thread, créées à la demande.
+
+    Les requêtes préparées sont réutilisées grâce au cache de sqlite3
+    (cached_statements) : il suffit de passer toujours le même texte SQL.
+    """
+
+    def __init__(self, path: str, pragmas: Optional[Dict[str, Any]] = None,
+                 cached_statements: int = STATEMENT_CACHE_SIZE):
+        self.path = path
+        self.pragmas = dict(DEFAULT_PRAGMAS, **(pragmas or {}))
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def connection(self) -> sqlite3.Connection:
+        """Connexion du thread courant (ouverte et configurée au premier appel)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None : pas de transaction implicite, voir transaction()
+        conn = sqlite3.connect(self.path, isolation_level=None,
+                               cached_statements=self.cached_statements)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name}={value}')
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def ensure_schema(self, *statements: str) -> None:
+        """Exécute des CREATE ... IF NOT EXISTS dans une même transaction."""
+        with self.transaction() as conn:
+            for statement in statements:
+                conn.execute(statement)
+
+    def execute(self, sql: str, params: Sequence = ()) -> sqlite3.Cursor:
+        return self.connection().execute(sql, params)
+
+    def executemany(self, sql: str, rows: Iterable[Sequence]) -> sqlite3.Cursor:
+        return self.connection().executemany(sql, rows)
+
+    def query_one(self, sql: str, params: Sequence = ()) -> Optional[sqlite3.Row]:
+        return self.connection().execute(sql, params).fetchone()
+
+    def query_all(self, sql: str, params: Sequence = ()) -> List[sqlite3.Row]:
+        return self.connection().execute(sql, params).fetchall()
+
+    @contextmanager
+    def transaction(self, immediate: bool = True) -> Iterator[sqlite3.Connection]:
+        """Transaction explicite ; BEGIN IMMEDIATE réserve le verrou d'écriture dès le début."""
+        conn = self.connection()
+        if conn.in_transaction:
+            # Transaction imbriquée : intégrée à la transaction englobante
+            yield conn
+            return
+        conn.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def close(self) -> None:
+        """Ferme toutes les connexions ouvertes (tous threads confondus)."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                # Connexion créée dans un autre thread : fermée à la fin de celui-ci
+                pass
+        self._local = threading.local()
+
+
+class UserStore:
+    """Table des utilisateurs ; l'unicité repose sur les contraintes UNIQUE de la table."""
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    '''
+
+    def __init__(self, db: Database):
+        self.db = db
+        db.ensure_schema(self.SCHEMA)
+
+    def create(self, username: str, email: str, password_hash: str) -> Optional[int]:
+        """Crée un utilisateur et retourne son id, ou None si l'identifiant ou l'email existe déjà.
+
+        Un seul INSERT ... ON CONFLICT DO NOTHING : pas de SELECT préalable, donc pas de
+        course entre deux inscriptions simultanées.
+        """
+        # fetchall : l'instruction doit être terminée pour libérer le verrou d'écriture
+        rows = self.db.query_all(
+            'INSERT INTO users (username, email, password) VALUES (?, ?, ?) '
+            'ON CONFLICT DO NOTHING RETURNING id',
+            (username, email, password_hash)
+        )
+        return rows[0]['id'] if rows else None
+
+    def get_by_username(self, username: str) -> Optional[sqlite3.Row]:
+        return self.db.query_one('SELECT * FROM users WHERE username = ?', (username,))
@@ -0,0 +1,137 @@
+"""
+Export en flux des résultats de recherche (CSV, TSV, Parquet)
+Chaque générateur produit des morceaux d'octets au fil des lignes : la mémoire
+utilisée ne dépend pas du nombre de résultats exportés.
+"""
+
+import csv
+import io
+from typing import Iterable, Iterator, List
+
+from models import NA, ProteinRecord
+
+# Format -> (type MIME, extension)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'tsv': ('text/tab-separated-values', 'tsv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+# Nombre de lignes accumulées avant d'envoyer un morceau de la réponse
+ROWS_PER_CHUNK = 200
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def iter_delimited(records: Iterable[ProteinRecord], delimiter: str = ',',
+                   rows_per_chunk: int = ROWS_PER_CHUNK) -> Iterator[bytes]:
+    """CSV (ou TSV) encodé en UTF-8, en-tête compris."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter, lineterminator='\n')
+    writer.writerow(ProteinRecord.FIELDS)
+
+    pending = 0
+    for record in records:
+        writer.writerow(record.to_row())
+        pending += 1
+        if pending >= rows_per_chunk:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    yield buffer.getvalue().encode('utf-8')
+
+
+class _DrainableSink(io.RawIOBase):
+    """Fichier en écriture seule dont on récupère le contenu au fur et à mesure."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_parquet(records: Iterable[ProteinRecord], rows_per_group: int = 1000) -> Iterator[bytes]:
+    """Fichier Parquet écrit groupe de lignes par groupe de lignes (nécessite pyarrow)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ('PDB_ID', pa.string()),
+        ('Title', pa.string()),
+        ('Resolution', pa.float64()),
+        ('Experimental_Method', pa.string()),
+        ('Release_Date', pa.string()),
+        ('Organism', pa.string()),
+    ])
+
+    def text(value):
+        return None if value in (None, NA) else str(value)
+
+    def number(value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    def write_group(writer, rows):
+        columns = list(zip(*rows))
+        arrays = [
+            pa.array([text(v) for v in columns[0]], pa.string()),
+            pa.array([text(v) for v in columns[1]], pa.string()),
+            pa.array([number(v) for v in columns[2]], pa.float64()),
+            pa.array([text(v) for v in columns[3]], pa.string()),
+            pa.array([text(v) for v in columns[4]], pa.string()),
+            pa.array([text(v) for v in columns[5]], pa.string()),
+        ]
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+    sink = _DrainableSink()
+    writer = pq.ParquetWriter(sink, schema)
+    rows = []
+    for record in records:
+        rows.append(record.to_row())
+        if len(rows) >= rows_per_group:
+            write_group(writer, rows)
+            rows = []
+            yield sink.drain()
+    if rows:
+        write_group(writer, rows)
+    writer.close()
+    yield sink.drain()
+
+
+def iter_export(records: Iterable[ProteinRecord], fmt: str) -> Iterator[bytes]:
+    """Générateur d'octets pour le format demandé (ValueError si inconnu)."""
+    if fmt == 'csv':
+        return iter_delimited(records, ',')
+    if fmt == 'tsv':
+        return iter_delimited(records, '\t')
+    if fmt == 'parquet':
+        if not parquet_available():
+            raise ValueError("L'export Parquet nécessite le paquet pyarrow")
+        return iter_parquet(records)
+    raise ValueError(f"Format d'export inconnu: {fmt}")
@@ -0,0 +1,94 @@
+"""
+Modèles de données compacts pour les résultats de recherche RCSB PDB
+"""
+
+import sys
+from typing import Any, Dict, Tuple
+
+NA = 'N/A'
+
+
+class ProteinRecord:
+    """Résumé d'une entrée PDB (6 champs, sans __dict__ grâce à __slots__)."""
+
+    __slots__ = ('pdb_id', 'title', 'resolution', 'experimental_method', 'release_date', 'organism')
+
+    # Noms des colonnes exposées (JSON, export)
+    FIELDS = ('PDB_ID', 'Title', 'Resolution', 'Experimental_Method', 'Release_Date', 'Organism')
+
+    def __init__(self, pdb_id: str, title: str = NA, resolution: Any = NA,
+                 experimental_method: str = NA, release_date: str = NA, organism: str = NA):
+        self.pdb_id = pdb_id
+        self.title = title
+        self.resolution = resolution
+        self.experimental_method = experimental_method
+        self.release_date = release_date
+        self.organism = organism
+
+    @classmethod
+    def from_entry(cls, pdb_id: str, data: Dict) -> 'ProteinRecord':
+        """Extrait les champs utiles de la réponse JSON d'une entrée, en un seul passage.
+
+        Seules des références vers les valeurs extraites sont conservées : le JSON
+        complet de l'entrée peut être libéré juste après.
+        """
+        title = NA
+        resolution = NA
+        method = NA
+        release_date = NA
+        organism = NA
+
+        struct = data.get('struct')
+        if isinstance(struct, dict):
+            title = struct.get('title', NA)
+
+        entry_info = data.get('rcsb_entry_info')
+        if isinstance(entry_info, dict):
+            res = entry_info.get('resolution_combined')
+            if res:
+                if isinstance(res, list):
+                    resolution = res[0]
+                elif isinstance(res, (int, float)):
+                    resolution = res
+
+        exptl = data.get('exptl')
+        if isinstance(exptl, list) and exptl and isinstance(exptl[0], dict):
+            method = exptl[0].get('method', NA)
+
+        accession = data.get('rcsb_accession_info')
+        if isinstance(accession, dict):
+            release_date = accession.get('initial_release_date', NA)
+
+        organisms = data.get('rcsb_entity_source_organism')
+        if isinstance(organisms, list) and organisms and isinstance(organisms[0], dict):
+            organism = organisms[0].get('scientific_name', NA)
+
+        # Les méthodes et organismes se répètent beaucoup : une seule copie par valeur
+        if isinstance(method, str):
+            method = sys.intern(method)
+        if isinstance(organism, str):
+            organism = sys.intern(organism)
+
+        return cls(pdb_id, title, resolution, method, release_date, organism)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ProteinRecord':
+        """Construit un enregistrement à partir de sa forme dictionnaire (to_dict)."""
+        return cls(*(data.get(field, NA) for field in cls.FIELDS))
+
+    def to_row(self) -> Tuple:
+        """Valeurs dans l'ordre de FIELDS."""
+        return (self.pdb_id, self.title, self.resolution,
+                self.experimental_method, self.release_date, self.organism)
+
+    def to_dict(self) -> Dict:
+        """Forme dictionnaire renvoyée par l'API JSON de l'application."""
+        return dict(zip(self.FIELDS, self.to_row()))
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ProteinRecord):
+            return NotImplemented
+        return self.to_row() == other.to_row()
+
+    def __repr__(self) -> str:
+        return f'ProteinRecord({self.pdb_id!r}, {self.title!r})'
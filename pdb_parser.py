@@ -0,0 +1,271 @@
+"""
+Lecture vectorisée des coordonnées atomiques (PDB et mmCIF) vers des tableaux structurés NumPy
+Un fichier .npy est écrit à côté de chaque structure lue : les lectures suivantes sont
+un simple np.load(mmap_mode='r'), sans copie ni analyse du texte.
+"""
+
+import os
+import tempfile
+from typing import Optional
+
+import numpy as np
+
+# Un enregistrement par atome (ATOM / HETATM)
+ATOM_DTYPE = np.dtype([
+    ('hetatm', '?'),
+    ('serial', '<i4'),
+    ('name', 'S4'),
+    ('altloc', 'S1'),
+    ('resname', 'S3'),
+    ('chain', 'S4'),
+    ('resseq', '<i4'),
+    ('icode', 'S1'),
+    ('x', '<f4'),
+    ('y', '<f4'),
+    ('z', '<f4'),
+    ('occupancy', '<f4'),
+    ('bfactor', '<f4'),
+    ('element', 'S2'),
+    ('model', '<i2'),
+])
+
+SIDECAR_SUFFIX = '.npy'
+
+_LINE_WIDTH = 80
+
+
+def _to_int(values: np.ndarray, default: int = 0) -> np.ndarray:
+    """Conversion vectorisée de champs texte en entiers ; les champs invalides valent default."""
+    try:
+        return values.astype(np.int32)
+    except ValueError:
+        out = np.full(len(values), default, dtype=np.int32)
+        for i, value in enumerate(values):
+            try:
+                out[i] = int(value)
+            except ValueError:
+                pass
+        return out
+
+
+def _to_float(values: np.ndarray, default: float = 0.0) -> np.ndarray:
+    """Conversion vectorisée de champs texte en flottants ; les champs invalides valent default."""
+    try:
+        return values.astype(np.float32)
+    except ValueError:
+        out = np.full(len(values), default, dtype=np.float32)
+        for i, value in enumerate(values):
+            try:
+                out[i] = float(value)
+            except ValueError:
+                pass
+        return out
+
+
+def parse_pdb_bytes(data: bytes) -> np.ndarray:
+    """Analyse les enregistrements ATOM/HETATM d'un fichier PDB (colonnes fixes).
+
+    Les lignes sont découpées sans boucle Python : positions des retours à la ligne,
+    puis extraction de chaque champ à colonnes fixes pour les seules lignes ATOM/HETATM.
+    """
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if raw.size == 0:
+        return np.empty(0, dtype=ATOM_DTYPE)
+
+    ends = np.flatnonzero(raw == ord('\n'))
+    if ends.size == 0 or ends[-1] != raw.size - 1:
+        ends = np.append(ends, raw.size)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    lengths = ends - starts
+    # Fins de ligne Windows
+    has_cr = (lengths > 0) & (raw[np.maximum(ends - 1, 0)] == ord('\r'))
+    lengths = lengths - has_cr
+
+    # Les lignes courtes sont complétées par des espaces : on lit dans un tampon prolongé
+    # de _LINE_WIDTH espaces et on masque les octets situés au-delà de la fin de ligne.
+    padded = np.concatenate((raw, np.full(_LINE_WIDTH, ord(' '), dtype=np.uint8)))
+
+    def columns(line_starts: np.ndarray, line_lengths: np.ndarray, start: int, stop: int) -> np.ndarray:
+        # Seules les colonnes demandées sont rassemblées, jamais la fenêtre complète de 80 octets
+        cols = np.arange(start, stop)
+        block = padded[line_starts[:, None] + cols[None, :]]
+        block[cols[None, :] >= line_lengths[:, None]] = ord(' ')
+        return block.view(f'S{stop - start}').ravel()
+
+    prefix = columns(starts, lengths, 0, 6)
+    is_atom = prefix == b'ATOM  '
+    is_hetatm = prefix == b'HETATM'
+    is_model = prefix == b'MODEL '
+
+    # Numéro de modèle de chaque ligne (1 si le fichier n'a pas d'enregistrement MODEL)
+    model = np.maximum(np.cumsum(is_model), 1).astype(np.int16)
+
+    selected = is_atom | is_hetatm
+    atom_starts = starts[selected]
+    atom_lengths = lengths[selected]
+
+    def field(start: int, stop: int) -> np.ndarray:
+        return columns(atom_starts, atom_lengths, start, stop)
+
+    atoms = np.empty(len(atom_starts), dtype=ATOM_DTYPE)
+    atoms['hetatm'] = is_hetatm[selected]
+    atoms['serial'] = _to_int(field(6, 11))
+    atoms['name'] = np.char.strip(field(12, 16))
+    atoms['altloc'] = np.char.strip(field(16, 17))
+    atoms['resname'] = np.char.strip(field(17, 20))
+    atoms['chain'] = np.char.strip(field(21, 22))
+    atoms['resseq'] = _to_int(field(22, 26))
+    atoms['icode'] = np.char.strip(field(26, 27))
+    atoms['x'] = _to_float(field(30, 38))
+    atoms['y'] = _to_float(field(38, 46))
+    atoms['z'] = _to_float(field(46, 54))
+    atoms['occupancy'] = _to_float(field(54, 60), 1.0)
+    atoms['bfactor'] = _to_float(field(60, 66))
+    atoms['element'] = np.char.strip(field(76, 78))
+    atoms['model'] = model[selected]
+    return atoms
+
+
+def parse_mmcif_text(text: str) -> np.ndarray:
+    """Analyse la boucle _atom_site d'un fichier mmCIF."""
+    lines = text.splitlines()
+    headers = []
+    rows = []
+    i = 0
+    # Repérer la boucle _atom_site
+    while i < len(lines):
+        if lines[i].startswith('_atom_site.'):
+            while i < len(lines) and lines[i].startswith('_atom_site.'):
+                headers.append(lines[i].split('.', 1)[1].strip())
+                i += 1
+            while i < len(lines):
+                line = lines[i]
+                if line.startswith(('#', 'loop_', '_', 'data_')):
+                    break
+                if line.strip():
+                    rows.append(line)
+                i += 1
+            break
+        i += 1
+
+    if not headers or not rows:
+        return np.empty(0, dtype=ATOM_DTYPE)
+
+    tokens = ' '.join(rows).split()
+    if len(tokens) % len(headers) != 0:
+        # Valeurs entre guillemets contenant des espaces : découpage ligne par ligne
+        import shlex
+        tokens = [token for row in rows for token in shlex.split(row, posix=True)]
+    table = np.array(tokens, dtype=object).reshape(-1, len(headers))
+
+    def column(*names: str, default: str = '?') -> np.ndarray:
+        for name in names:
+            if name in headers:
+                values = table[:, headers.index(name)].astype(str)
+                return np.char.strip(values, '"\'')
+        return np.full(len(table), default)
+
+    def text_column(*names: str) -> np.ndarray:
+        values = column(*names)
+        # '.' et '?' désignent une valeur absente
+        values[(values == '.') | (values == '?')] = ''
+        return np.char.encode(values, 'ascii', 'replace')
+
+    atoms = np.empty(len(table), dtype=ATOM_DTYPE)
+    atoms['hetatm'] = column('group_PDB') == 'HETATM'
+    atoms['serial'] = _to_int(column('id'))
+    atoms['name'] = text_column('auth_atom_id', 'label_atom_id')
+    atoms['altloc'] = text_column('label_alt_id')
+    atoms['resname'] = text_column('auth_comp_id', 'label_comp_id')
+    atoms['chain'] = text_column('auth_asym_id', 'label_asym_id')
+    atoms['resseq'] = _to_int(column('auth_seq_id', 'label_seq_id'))
+    atoms['icode'] = text_column('pdbx_PDB_ins_code')
+    atoms['x'] = _to_float(column('Cartn_x'))
+    atoms['y'] = _to_float(column('Cartn_y'))
+    atoms['z'] = _to_float(column('Cartn_z'))
+    atoms['occupancy'] = _to_float(column('occupancy'), 1.0)
+    atoms['bfactor'] = _to_float(column('B_iso_or_equiv'))
+    atoms['element'] = text_column('type_symbol')
+    atoms['model'] = _to_int(column('pdbx_PDB_model_num', default='1'), 1)
+    return atoms
+
+
+def _is_mmcif(path: str, head: bytes) -> bool:
+    if path.lower().endswith(('.cif', '.mmcif')):
+        return True
+    return head.lstrip().startswith(b'data_')
+
+
+def parse_structure_file(path: str) -> np.ndarray:
+    """Analyse un fichier PDB ou mmCIF (format détecté par extension ou contenu)."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if _is_mmcif(path, data[:64]):
+        return parse_mmcif_text(data.decode('utf-8', 'replace'))
+    return parse_pdb_bytes(data)
+
+
+def load_atoms(path: str, use_cache: bool = True) -> np.ndarray:
+    """Retourne les atomes d'une structure.
+
+    Si un fichier <path>.npy plus récent que la structure existe, il est projeté en
+    mémoire (lecture seule, sans copie). Sinon le fichier est analysé et le .npy écrit.
+    """
+    sidecar = path + SIDECAR_SUFFIX
+    if use_cache:
+        atoms = _load_sidecar(path, sidecar)
+        if atoms is not None:
+            return atoms
+
+    atoms = parse_structure_file(path)
+    if use_cache:
+        try:
+            _write_sidecar(sidecar, atoms)
+        except OSError as e:
+            print(f"Impossible d'écrire le cache binaire {sidecar}: {e}")
+    return atoms
+
+
+def _load_sidecar(path: str, sidecar: str) -> Optional[np.ndarray]:
+    try:
+        if os.path.getmtime(sidecar) < os.path.getmtime(path):
+            return None
+        atoms = np.load(sidecar, mmap_mode='r')
+    except (OSError, ValueError):
+        return None
+    return atoms if atoms.dtype == ATOM_DTYPE else None
+
+
+def _write_sidecar(sidecar: str, atoms: np.ndarray) -> None:
+    """Écriture atomique du .npy (fichier temporaire puis renommage)."""
+    directory = os.path.dirname(os.path.abspath(sidecar))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.npy.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, atoms)
+        os.replace(tmp_path, sidecar)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def select_ca(atoms: np.ndarray, model: Optional[int] = None) -> np.ndarray:
+    """Atomes Cα des résidus standards (ATOM) d'un modèle (le premier par défaut), un par résidu."""
+    if len(atoms) == 0:
+        return atoms
+    if model is None:
+        model = int(atoms['model'][0])
+    mask = (atoms['name'] == b'CA') & ~atoms['hetatm'] & (atoms['model'] == model)
+    ca = atoms[mask]
+    # Positions alternatives : garder la première occurrence de chaque résidu
+    keys = np.rec.fromarrays([ca['chain'], ca['resseq'], ca['icode']])
+    _, first = np.unique(keys, return_index=True)
+    return ca[np.sort(first)]
+
+
+def coordinates(atoms: np.ndarray) -> np.ndarray:
+    """Coordonnées (n, 3) en float64."""
+    return np.column_stack((atoms['x'], atoms['y'], atoms['z'])).astype(np.float64)
@@ -0,0 +1,268 @@
+"""
+Pool de processus PyMOL persistants (mode headless) pour les alignements
+Chaque worker lance PyMOL une seule fois puis traite les tâches reçues par un pipe
+"""
+
+import atexit
+import multiprocessing
+import queue
+import threading
+import time
+import traceback
+from typing import Callable, Dict, List, Optional
+
+from alignment_jobs import JobCancelled
+from metrics import REGISTRY
+
+JOB_DURATION = REGISTRY.histogram(
+    'pymol_job_duration_seconds', 'Durée des alignements PyMOL (attente comprise) par issue',
+    ('outcome',), buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+)
+JOB_QUEUE_WAIT = REGISTRY.histogram(
+    'pymol_job_queue_wait_seconds', "Attente d'un worker PyMOL libre",
+    buckets=(0.01, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0)
+)
+WORKER_EVENTS = REGISTRY.counter(
+    'pymol_worker_events_total', 'Démarrages, redémarrages après plantage et recyclages de workers PyMOL',
+    ('event',)
+)
+
+
+class WorkerTimeout(RuntimeError):
+    """L'alignement a dépassé le timeout ; le worker a été arrêté."""
+
+
+class WorkerCrashed(RuntimeError):
+    """Le worker PyMOL s'est arrêté pendant l'alignement."""
+
+
+# --- Côté worker (processus enfant) ---
+
+def _align_structures(cmd, params: Dict) -> Dict:
+    """Charge, colore et aligne les structures sur la première, puis sauvegarde la session."""
+    pdb_ids: List[str] = params['pdb_ids']
+    colors: List[str] = params['colors']
+    paths: Dict[str, str] = params.get('paths') or {}
+    timing = {}
+
+    start = time.perf_counter()
+    for pdb_id in pdb_ids:
+        if pdb_id in paths:
+            cmd.load(paths[pdb_id], pdb_id, format='pdb')
+        else:
+            cmd.fetch(pdb_id, type='pdb', async_=0)
+    timing['load'] = time.perf_counter() - start
+
+    for i, pdb_id in enumerate(pdb_ids):
+        cmd.show('cartoon', pdb_id)
+        cmd.color(colors[i % len(colors)], pdb_id)
+
+    # Alignement (première protéine = référence)
+    start = time.perf_counter()
+    reference = pdb_ids[0]
+    alignment_results = []
+    for pdb_id in pdb_ids[1:]:
+        result = cmd.align(pdb_id, reference)
+        alignment_results.append({
+            'structure': pdb_id,
+            'reference': reference,
+            'rmsd': round(result[0], 3),
+            'atoms': result[1]
+        })
+    timing['align'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if params.get('session_path'):
+        cmd.center()
+        cmd.zoom()
+        cmd.set('cartoon_fancy_helices', 1)
+        cmd.set('cartoon_fancy_sheets', 1)
+        cmd.bg_color('white')
+        cmd.set('seq_view', 1)
+        cmd.save(params['session_path'])
+    timing['save'] = time.perf_counter() - start
+
+    return {'alignment_results': alignment_results, 'reference': reference, 'timing': timing}
+
+
+def _worker_main(conn) -> None:
+    """Boucle d'un worker : démarre PyMOL une fois puis exécute les tâches une par une."""
+    start = time.perf_counter()
+    try:
+        import pymol
+        from pymol import cmd
+        pymol.finish_launching(['pymol', '-qc'])
+    except Exception as e:
+        conn.send(('error', f'Impossible de démarrer PyMOL: {e}'))
+        return
+    conn.send(('ready', time.perf_counter() - start))
+
+    while True:
+        try:
+            params = conn.recv()
+        except EOFError:
+            break
+        if params is None:
+            break
+
+        try:
+            # Repartir d'un état vierge à chaque tâche
+            cmd.reinitialize()
+            conn.send(('ok', _align_structures(cmd, params)))
+        except Exception as e:
+            conn.send(('error', f'{e}\n{traceback.format_exc()}'))
+
+    try:
+        cmd.quit()
+    except Exception:
+        pass
+
+
+# --- Côté serveur ---
+
+class _Worker:
+    """Processus PyMOL et son extrémité du pipe."""
+
+    def __init__(self, context, startup_timeout: float):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+
+        if not self.conn.poll(startup_timeout):
+            self.kill()
+            raise RuntimeError('Le worker PyMOL n\'a pas démarré à temps')
+        status, payload = self.conn.recv()
+        if status != 'ready':
+            self.kill()
+            raise RuntimeError(payload)
+        self.startup_time = payload
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except (OSError, EOFError):
+            pass
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.kill()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join(timeout=2)
+        self.conn.close()
+
+
+class PyMOLWorkerPool:
+    """Pool de workers PyMOL démarrés à la demande et recyclés après max_jobs_per_worker tâches."""
+
+    def __init__(self, size: int = 2, max_jobs_per_worker: int = 50, startup_timeout: float = 60):
+        self.size = size
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.startup_timeout = startup_timeout
+        self._context = multiprocessing.get_context('spawn')
+        self._idle: 'queue.Queue[_Worker]' = queue.Queue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self.stats = {'jobs': 0, 'failures': 0, 'timeouts': 0, 'restarts': 0, 'recycled': 0, 'started': 0}
+        atexit.register(self.shutdown)
+
+    def _acquire_worker(self) -> _Worker:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            worker = _Worker(self._context, self.startup_timeout)
+            with self._lock:
+                self.stats['started'] += 1
+            WORKER_EVENTS.inc(event='started')
+            print(f'Worker PyMOL démarré en {worker.startup_time:.2f}s')
+            return worker
+
+    def _release_worker(self, worker: _Worker) -> None:
+        if worker.jobs >= self.max_jobs_per_worker:
+            worker.stop()
+            with self._lock:
+                self.stats['recycled'] += 1
+            WORKER_EVENTS.inc(event='recycled')
+        else:
+            self._idle.put(worker)
+
+    def run(self, params: Dict, timeout: float,
+            should_cancel: Optional[Callable[[], bool]] = None) -> Dict:
+        """Exécute un alignement sur un worker libre et retourne son résultat (avec timing)."""
+        submitted = time.perf_counter()
+        outcome = 'ok'
+        try:
+            return self._run(params, timeout, should_cancel, submitted)
+        except JobCancelled:
+            outcome = 'cancelled'
+            raise
+        except WorkerTimeout:
+            outcome = 'timeout'
+            raise
+        except WorkerCrashed:
+            outcome = 'crashed'
+            raise
+        except Exception:
+            outcome = 'failed'
+            raise
+        finally:
+            JOB_DURATION.observe(time.perf_counter() - submitted, outcome=outcome)
+
+    def _run(self, params: Dict, timeout: float,
+             should_cancel: Optional[Callable[[], bool]], submitted: float) -> Dict:
+        with self._slots:
+            wait = time.perf_counter() - submitted
+            JOB_QUEUE_WAIT.observe(wait)
+            worker = self._acquire_worker()
+            started = time.perf_counter()
+            try:
+                worker.conn.send(params)
+                deadline = time.monotonic() + timeout
+                while not worker.conn.poll(0.25):
+                    if not worker.process.is_alive():
+                        raise EOFError()
+                    if should_cancel is not None and should_cancel():
+                        worker.kill()
+                        raise JobCancelled()
+                    if time.monotonic() > deadline:
+                        worker.kill()
+                        with self._lock:
+                            self.stats['timeouts'] += 1
+                        raise WorkerTimeout(
+                            f'Timeout: La création de la session PyMOL a pris trop de temps (>{timeout}s)'
+                        )
+                status, payload = worker.conn.recv()
+            except (EOFError, OSError):
+                # Worker planté : il sera remplacé à la prochaine tâche
+                worker.kill()
+                with self._lock:
+                    self.stats['restarts'] += 1
+                WORKER_EVENTS.inc(event='restarts')
+                raise WorkerCrashed('Le worker PyMOL s\'est arrêté de manière inattendue')
+
+            worker.jobs += 1
+            self._release_worker(worker)
+
+        with self._lock:
+            self.stats['jobs'] += 1
+            if status != 'ok':
+                self.stats['failures'] += 1
+        if status != 'ok':
+            raise RuntimeError(payload)
+
+        payload['timing'] = {
+            'queue_wait': round(wait, 4),
+            'total': round(time.perf_counter() - started, 4),
+            **{key: round(value, 4) for key, value in payload.get('timing', {}).items()}
+        }
+        return payload
+
+    def shutdown(self) -> None:
+        """Arrête tous les workers inactifs."""
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
@@ -0,0 +1,326 @@
+"""
+Cache à deux niveaux pour les réponses JSON de l'API RCSB
+LRU en mémoire borné devant un stockage SQLite persistant avec TTL (voir db.Database)
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from db import Database
+
+
+class CacheEntry:
+    """Valeur mise en cache avec ses validateurs HTTP (ETag / Last-Modified)."""
+
+    __slots__ = ('value', 'stored_at', 'etag', 'last_modified')
+
+    def __init__(self, value: Any, stored_at: Optional[float] = None,
+                 etag: Optional[str] = None, last_modified: Optional[str] = None):
+        self.value = value
+        self.stored_at = time.time() if stored_at is None else stored_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def is_fresh(self, ttl: Optional[float]) -> bool:
+        """Indique si l'entrée est encore valide pour le TTL donné (None = sans expiration)."""
+        return ttl is None or (time.time() - self.stored_at) < ttl
+
+
+class LRUCache:
+    """Cache LRU en mémoire, thread-safe, borné en nombre d'entrées avec TTL optionnel."""
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: 'OrderedDict[Hashable, CacheEntry]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get_entry(self, key: Hashable) -> Optional[CacheEntry]:
+        """Retourne l'entrée (même expirée) sans modifier les compteurs."""
+        with self._lock:
+            return self._data.get(key)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Retourne la valeur si elle est présente et fraîche, sinon None."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if not entry.is_fresh(self.ttl):
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def set(self, key: Hashable, value: Any, **validators) -> None:
+        """Ajoute une valeur ; l'entrée la moins récemment utilisée est évincée si besoin."""
+        self.set_entry(key, CacheEntry(value, **validators))
+
+    def set_entry(self, key: Hashable, entry: CacheEntry) -> None:
+        """Ajoute une entrée déjà construite (conserve son horodatage)."""
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Supprime une entrée du cache."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Vide le cache."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict:
+        """Compteurs de succès / échecs du cache."""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._data),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_ratio': round(self.hits / total, 4) if total else 0.0
+        }
+
+
+class SQLiteCache:
+    """Cache persistant dans SQLite, avec TTL et éviction par taille totale (en octets)."""
+
+    SCHEMA = (
+        '''
+        CREATE TABLE IF NOT EXISTS cache (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            etag TEXT,
+            last_modified TEXT,
+            stored_at REAL NOT NULL,
+            accessed_at REAL NOT NULL,
+            size INTEGER NOT NULL
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache (accessed_at)',
+    )
+
+    def __init__(self, path: str, ttl: Optional[float] = None, max_bytes: int = 256 * 1024 * 1024,
+                 db: Optional[Database] = None):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if db is None:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            db = Database(path)
+        # Une connexion par thread : les lectures ne se bloquent plus entre elles
+        self.db = db
+        self.db.ensure_schema(*self.SCHEMA)
+        self._total_bytes = self.db.query_one('SELECT COALESCE(SUM(size), 0) FROM cache')[0]
+
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        """Retourne l'entrée (même expirée) sans modifier les compteurs."""
+        row = self.db.query_one(
+            'SELECT value, stored_at, etag, last_modified FROM cache WHERE key = ?', (key,)
+        )
+        if row is None:
+            return None
+        return CacheEntry(json.loads(row[0]), stored_at=row[1], etag=row[2], last_modified=row[3])
+
+    def get(self, key: str) -> Optional[Any]:
+        """Retourne la valeur si elle est présente et fraîche, sinon None."""
+        entry = self.get_fresh_entry(key)
+        return entry.value if entry is not None else None
+
+    def get_fresh_entry(self, key: str) -> Optional[CacheEntry]:
+        """Retourne l'entrée si elle est fraîche (et met à jour sa date d'accès), sinon None."""
+        entry = self.get_entry(key)
+        if entry is None or not entry.is_fresh(self.ttl):
+            with self._lock:
+                self.misses += 1
+                if entry is not None:
+                    self.expirations += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        self.db.execute('UPDATE cache SET accessed_at = ? WHERE key = ?', (time.time(), key))
+        return entry
+
+    def recent_entries(self, limit: int) -> List[Tuple[str, CacheEntry]]:
+        """Entrées fraîches les plus récemment lues (au plus limit), de la plus récente à la plus ancienne."""
+        min_stored_at = time.time() - self.ttl if self.ttl is not None else 0
+        rows = self.db.query_all(
+            'SELECT key, value, stored_at, etag, last_modified FROM cache '
+            'WHERE stored_at >= ? ORDER BY accessed_at DESC LIMIT ?', (min_stored_at, limit)
+        )
+        return [(row[0], CacheEntry(json.loads(row[1]), stored_at=row[2], etag=row[3], last_modified=row[4]))
+                for row in rows]
+
+    def set(self, key: str, value: Any, **validators) -> None:
+        """Enregistre une valeur (sérialisée en JSON)."""
+        self.set_entry(key, CacheEntry(value, **validators))
+
+    def set_entry(self, key: str, entry: CacheEntry) -> None:
+        """Enregistre une entrée déjà construite puis applique la limite de taille."""
+        payload = json.dumps(entry.value, separators=(',', ':'))
+        size = len(payload)
+        with self.db.transaction() as conn:
+            previous = conn.execute('SELECT size FROM cache WHERE key = ?', (key,)).fetchone()
+            conn.execute(
+                'INSERT INTO cache (key, value, etag, last_modified, stored_at, accessed_at, size) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET value = excluded.value, etag = excluded.etag, '
+                'last_modified = excluded.last_modified, stored_at = excluded.stored_at, '
+                'accessed_at = excluded.accessed_at, size = excluded.size',
+                (key, payload, entry.etag, entry.last_modified, entry.stored_at, time.time(), size)
+            )
+            with self._lock:
+                self._total_bytes += size - (previous[0] if previous else 0)
+                over_limit = self._total_bytes > self.max_bytes
+            if over_limit:
+                self._evict(conn)
+
+    def touch(self, key: str) -> None:
+        """Marque une entrée comme fraîche (après une revalidation 304)."""
+        now = time.time()
+        self.db.execute('UPDATE cache SET stored_at = ?, accessed_at = ? WHERE key = ?', (now, now, key))
+
+    def _evict(self, conn) -> None:
+        """Supprime les entrées les moins récemment lues jusqu'à 90 % de la limite."""
+        # Recalculer le total : d'autres processus peuvent partager le fichier
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM cache').fetchone()[0]
+        target = int(self.max_bytes * 0.9)
+        rows = conn.execute('SELECT key, size FROM cache ORDER BY accessed_at ASC').fetchall()
+        to_delete = []
+        for key, size in rows:
+            if total <= target:
+                break
+            to_delete.append((key,))
+            total -= size
+        conn.executemany('DELETE FROM cache WHERE key = ?', to_delete)
+        with self._lock:
+            self._total_bytes = total
+            self.evictions += len(to_delete)
+
+    def invalidate(self, key: str) -> None:
+        """Supprime une entrée du cache."""
+        rows = self.db.query_all('DELETE FROM cache WHERE key = ? RETURNING size', (key,))
+        if rows:
+            with self._lock:
+                self._total_bytes -= rows[0][0]
+
+    def clear(self) -> None:
+        """Vide le cache."""
+        self.db.execute('DELETE FROM cache')
+        with self._lock:
+            self._total_bytes = 0
+
+    def stats(self) -> Dict:
+        """Compteurs de succès / échecs du cache."""
+        entries = self.db.query_one('SELECT COUNT(*) FROM cache')[0]
+        total = self.hits + self.misses
+        return {
+            'entries': entries,
+            'bytes': self._total_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_ratio': round(self.hits / total, 4) if total else 0.0
+        }
+
+    def close(self) -> None:
+        self.db.close()
+
+
+class TwoTierCache:
+    """LRU en mémoire devant un cache SQLite ; les succès disque sont promus en mémoire."""
+
+    def __init__(self, path: str, ttl: Optional[float] = 24 * 3600,
+                 memory_entries: int = 1024, max_bytes: int = 256 * 1024 * 1024):
+        self.ttl = ttl
+        self.memory = LRUCache(max_entries=memory_entries, ttl=ttl)
+        self.disk = SQLiteCache(path, ttl=ttl, max_bytes=max_bytes)
+        self.revalidations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Retourne la valeur fraîche depuis la mémoire, puis le disque, sinon None."""
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+
+        entry = self.disk.get_fresh_entry(key)
+        if entry is None:
+            return None
+        self.memory.set_entry(key, entry)
+        return entry.value
+
+    def get_stale(self, key: str) -> Optional[CacheEntry]:
+        """Retourne l'entrée expirée éventuelle, pour une revalidation conditionnelle."""
+        return self.memory.get_entry(key) or self.disk.get_entry(key)
+
+    def set(self, key: str, value: Any, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Enregistre une valeur dans les deux niveaux."""
+        entry = CacheEntry(value, etag=etag, last_modified=last_modified)
+        self.memory.set_entry(key, entry)
+        self.disk.set_entry(key, entry)
+
+    def preload(self, limit: int) -> int:
+        """Charge en mémoire les entrées disque les plus récemment lues ; retourne leur nombre."""
+        entries = self.disk.recent_entries(min(limit, self.memory.max_entries))
+        # Insérées de la plus ancienne à la plus récente pour respecter l'ordre LRU
+        for key, entry in reversed(entries):
+            self.memory.set_entry(key, entry)
+        return len(entries)
+
+    def touch(self, key: str) -> None:
+        """Prolonge une entrée confirmée par le serveur (réponse 304)."""
+        self.revalidations += 1
+        self.disk.touch(key)
+        entry = self.disk.get_entry(key)
+        if entry is not None:
+            self.memory.set_entry(key, entry)
+
+    def invalidate(self, key: str) -> None:
+        """Supprime une entrée des deux niveaux."""
+        self.memory.invalidate(key)
+        self.disk.invalidate(key)
+
+    def clear(self) -> None:
+        """Vide les deux niveaux."""
+        self.memory.clear()
+        self.disk.clear()
+
+    def stats(self) -> Dict:
+        """Compteurs par niveau."""
+        return {
+            'memory': self.memory.stats(),
+            'disk': self.disk.stats(),
+            'revalidations': self.revalidations
+        }
@@ -0,0 +1,125 @@
+"""
+Couche de transport HTTP partagée pour les appels à RCSB PDB
+Pool de connexions keep-alive par hôte, timeouts et reprises avec backoff exponentiel
+"""
+
+import os
+import threading
+import time
+from typing import Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from metrics import REGISTRY
+
+# URLs des services RCSB (surchargeables par variables d'environnement,
+# par exemple pour tester contre un faux serveur RCSB local)
+RCSB_SEARCH_URL = os.environ.get('RCSB_SEARCH_URL', 'https://search.rcsb.org/rcsbsearch/v2/query')
+RCSB_DATA_URL = os.environ.get('RCSB_DATA_URL', 'https://data.rcsb.org/rest/v1/core/entry')
+RCSB_FILES_URL = os.environ.get('RCSB_FILES_URL', 'https://files.rcsb.org/download')
+
+# Timeout par défaut : (connexion, lecture) en secondes
+DEFAULT_TIMEOUT = (5.0, 30.0)
+
+# Reprises sur erreurs transitoires : délai = backoff_factor * 2 ** (tentative - 1)
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Nombre d'hôtes gardés en cache et de connexions keep-alive par hôte
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 16
+
+Timeout = Union[float, Tuple[float, float]]
+
+# Appels sortants, par hôte (une observation par appel, reprises comprises)
+UPSTREAM_REQUESTS = REGISTRY.counter(
+    'rcsb_upstream_requests_total', 'Appels HTTP sortants par hôte, méthode et statut',
+    ('host', 'method', 'status')
+)
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    'rcsb_upstream_request_duration_seconds', "Durée des appels HTTP sortants jusqu'aux en-têtes de réponse",
+    ('host', 'method')
+)
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """Adaptateur HTTP qui applique un timeout par défaut à chaque requête."""
+
+    def __init__(self, *args, timeout: Timeout = DEFAULT_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        
+        host = urlsplit(request.url).netloc
+        start = time.perf_counter()
+        status = 'error'
+        try:
+            response = super().send(request, **kwargs)
+            status = str(response.status_code)
+            return response
+        finally:
+            UPSTREAM_LATENCY.observe(time.perf_counter() - start, host=host, method=request.method)
+            UPSTREAM_REQUESTS.inc(host=host, method=request.method, status=status)
+
+
+def create_session(timeout: Timeout = DEFAULT_TIMEOUT,
+                   retries: int = DEFAULT_RETRIES,
+                   backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+                   pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                   pool_maxsize: int = DEFAULT_POOL_MAXSIZE) -> requests.Session:
+    """Crée une session requests avec pool de connexions, timeouts et reprises."""
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        # Les requêtes de recherche RCSB (POST) sont idempotentes
+        allowed_methods=frozenset(['GET', 'HEAD', 'POST']),
+        respect_retry_after_header=True,
+        # Laisser raise_for_status() signaler l'erreur après la dernière tentative
+        raise_on_status=False
+    )
+
+    adapter = TimeoutHTTPAdapter(
+        timeout=timeout,
+        max_retries=retry,
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize
+    )
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Retourne la session partagée du processus (créée au premier appel)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def set_session(session: Optional[requests.Session]) -> None:
+    """Remplace la session partagée (None pour la recréer au prochain appel)."""
+    global _session
+    with _session_lock:
+        if _session is not None and _session is not session:
+            _session.close()
+        _session = session
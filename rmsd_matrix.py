@@ -0,0 +1,100 @@
+"""
+Matrice de RMSD toutes-contre-toutes, calculée dans un pool de processus
+Le triangle supérieur est découpé en blocs de paires répartis entre les workers.
+"""
+
+import csv
+import io
+import math
+from concurrent.futures import Executor, as_completed
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from rcsb_cache import LRUCache
+from structure_alignment import CAChain, align_pair, read_ca_atoms
+
+# Cα déjà chargés dans ce processus worker (fichiers .npy projetés en mémoire).
+# Le worker vit aussi longtemps que le pool : le cache est borné pour ne pas grossir
+# d'une matrice à l'autre.
+CHAIN_CACHE_ENTRIES = 256
+_chains = LRUCache(max_entries=CHAIN_CACHE_ENTRIES)
+
+
+def _chain(path: str) -> CAChain:
+    chain = _chains.get(path)
+    if chain is None:
+        chain = read_ca_atoms(path)
+        _chains.set(path, chain)
+    return chain
+
+
+def compute_pairs(paths: List[str], pairs: List[Tuple[int, int]]) -> List[Tuple[int, int, float, int]]:
+    """Calcule (i, j, RMSD, atomes) pour un bloc de paires (exécuté dans un worker)."""
+    results = []
+    for i, j in pairs:
+        try:
+            value, atoms = align_pair(_chain(paths[i]), _chain(paths[j]))
+        except ValueError:
+            value, atoms = float('nan'), 0
+        results.append((i, j, value, atoms))
+    return results
+
+
+def pair_chunks(n: int, workers: int, max_chunk: int = 256) -> List[List[Tuple[int, int]]]:
+    """Découpe les paires i < j en blocs (environ 4 blocs par worker pour équilibrer la charge)."""
+    pairs = [(i, j) for i in range(n) for j in range(i + 1, n)]
+    if not pairs:
+        return []
+    size = max(1, min(max_chunk, math.ceil(len(pairs) / (max(1, workers) * 4))))
+    return [pairs[k:k + size] for k in range(0, len(pairs), size)]
+
+
+def iter_rmsd_matrix(paths: List[str], executor: Executor, workers: int) -> Iterator[Tuple[int, int, np.ndarray, np.ndarray]]:
+    """Produit (paires calculées, paires totales, matrice RMSD, matrice d'atomes) après chaque bloc.
+
+    Les matrices sont symétriques, de diagonale nulle ; les paires impossibles à aligner valent NaN.
+    """
+    n = len(paths)
+    matrix = np.zeros((n, n), dtype=np.float64)
+    atoms = np.zeros((n, n), dtype=np.int64)
+    chunks = pair_chunks(n, workers)
+    total = n * (n - 1) // 2
+    done = 0
+
+    futures = [executor.submit(compute_pairs, paths, chunk) for chunk in chunks]
+    try:
+        for future in as_completed(futures):
+            for i, j, value, count in future.result():
+                matrix[i, j] = matrix[j, i] = value
+                atoms[i, j] = atoms[j, i] = count
+                done += 1
+            yield done, total, matrix, atoms
+    finally:
+        # Client déconnecté : abandonner les blocs restants
+        for future in futures:
+            future.cancel()
+
+    if total == 0:
+        yield 0, 0, matrix, atoms
+
+
+def matrix_to_json(matrix: np.ndarray) -> List[List]:
+    """Liste de listes arrondie à 3 décimales (NaN devient None)."""
+    return [[None if math.isnan(value) else round(float(value), 3) for value in row] for row in matrix]
+
+
+def matrix_to_npy(matrix: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    np.save(buffer, matrix)
+    return buffer.getvalue()
+
+
+def matrix_to_csv(pdb_ids: List[str], matrix: np.ndarray) -> str:
+    """CSV avec les IDs PDB en en-tête de lignes et de colonnes."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([''] + list(pdb_ids))
+    for pdb_id, row in zip(pdb_ids, matrix_to_json(matrix)):
+        writer.writerow([pdb_id] + ['' if value is None else value for value in row])
+    return buffer.getvalue()
@@ -2,15 +2,48 @@
 import argparse
 import json
 import csv
+import gzip
+import hashlib
+import heapq
+import io
+import math
+import os
+import sqlite3
 import sys
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
 
+import numpy as np
+
+# Taille des tampons de lecture des fichiers de séquences
+TAILLE_TAMPON_LECTURE = 1 << 20
+MAGIQUE_GZIP = b'\x1f\x8b'
+
+
+def est_gzip(chemin_fichier):
+    with open(chemin_fichier, 'rb') as f:
+        return f.read(2) == MAGIQUE_GZIP
+
+
+def ouvrir_binaire(chemin_fichier):
+    """Ouvre un fichier en lecture binaire avec un grand tampon, décompressé à la volée s'il est gzippé."""
+    if est_gzip(chemin_fichier):
+        return io.BufferedReader(gzip.open(chemin_fichier, 'rb'), buffer_size=TAILLE_TAMPON_LECTURE)
+    return open(chemin_fichier, 'rb', buffering=TAILLE_TAMPON_LECTURE)
+
+
+def ouvrir_texte(chemin_fichier, newline=None):
+    """Comme ouvrir_binaire, en texte UTF-8."""
+    return io.TextIOWrapper(ouvrir_binaire(chemin_fichier), encoding='utf-8', newline=newline)
+
 
 def lire_sequences_json(chemin_fichier):
     """Lit les séquences depuis un fichier JSON."""
     try:
-        with open(chemin_fichier, 'r', encoding='utf-8') as f:
+        with ouvrir_texte(chemin_fichier) as f:
             data = json.load(f)
 
         # On suppose que le JSON contient une liste de séquences
@@ -33,7 +66,7 @@ def lire_sequences_csv(chemin_fichier):
     """Lit les séquences depuis un fichier CSV."""
     sequences = []
     try:
-        with open(chemin_fichier, 'r', encoding='utf-8') as f:
+        with ouvrir_texte(chemin_fichier) as f:
             reader = csv.reader(f)
             # Skip header if exists
             header = next(reader, None)
@@ -46,24 +79,1170 @@ def lire_sequences_csv(chemin_fichier):
     except Exception as e:
         print(f"❌ Erreur lors de la lecture du fichier CSV: {e}")
         sys.exit(1)
-    
+
+
+# --- Lecture en flux : les séquences sont comptées au fil de la lecture ---
+
+TAILLE_BLOC = 1 << 16
+
+
+class LecteurJSONFlux:
+    """Analyse incrémentale d'un fichier JSON, lu par blocs.
+
+    Seul l'élément en cours de décodage est gardé en mémoire : les éléments d'un
+    tableau sont produits un par un avec json.JSONDecoder.raw_decode.
+    """
+
+    BLANCS = ' \t\n\r'
+
+    def __init__(self, f, taille_bloc=TAILLE_BLOC):
+        self.f = f
+        self.taille_bloc = taille_bloc
+        self.tampon = ''
+        self.pos = 0
+        self.fin = False
+        self.decodeur = json.JSONDecoder()
+
+    def _remplir(self, taille=None):
+        """Ajoute un bloc au tampon ; retourne False en fin de fichier."""
+        bloc = self.f.read(taille or self.taille_bloc)
+        if not bloc:
+            self.fin = True
+            return False
+        self.tampon = self.tampon[self.pos:] + bloc
+        self.pos = 0
+        return True
+
+    def caractere(self):
+        """Prochain caractère significatif (sans le consommer), '' en fin de fichier."""
+        while True:
+            while self.pos < len(self.tampon) and self.tampon[self.pos] in self.BLANCS:
+                self.pos += 1
+            if self.pos < len(self.tampon):
+                return self.tampon[self.pos]
+            if not self._remplir():
+                return ''
+
+    def consommer(self, attendu):
+        c = self.caractere()
+        if c != attendu:
+            raise ValueError(f"'{attendu}' attendu, '{c or 'fin de fichier'}' trouvé (position {self.pos})")
+        self.pos += 1
+
+    def valeur(self):
+        """Décode une valeur complète à la position courante."""
+        self.caractere()
+        taille = self.taille_bloc
+        while True:
+            try:
+                valeur, fin = self.decodeur.raw_decode(self.tampon, self.pos)
+            except json.JSONDecodeError:
+                # Valeur coupée par la fin du bloc : lire davantage (blocs de taille croissante)
+                if self.fin or not self._remplir(taille):
+                    raise
+                taille *= 2
+                continue
+            # Un nombre coupé par la fin du bloc (« 12 » de « 12.5e3 ») peut continuer dans le suivant
+            coupe = fin == len(self.tampon) or (
+                isinstance(valeur, (int, float)) and self.tampon[fin] in '.eE+-')
+            if coupe and not self.fin and self._remplir(taille):
+                continue
+            self.pos = fin
+            return valeur
+
+    def elements(self):
+        """Éléments du tableau commençant à la position courante."""
+        self.consommer('[')
+        if self.caractere() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.valeur()
+            c = self.caractere()
+            self.pos += 1
+            if c == ']':
+                return
+            if c != ',':
+                raise ValueError(f"',' ou ']' attendu, '{c or 'fin de fichier'}' trouvé")
+
+    def paires(self):
+        """Couples (clé, position) de l'objet commençant à la position courante.
+
+        Après chaque clé, l'appelant doit consommer la valeur (valeur() ou elements()).
+        """
+        self.consommer('{')
+        if self.caractere() == '}':
+            self.pos += 1
+            return
+        while True:
+            cle = self.valeur()
+            self.consommer(':')
+            yield cle
+            c = self.caractere()
+            self.pos += 1
+            if c == '}':
+                return
+            if c != ',':
+                raise ValueError(f"',' ou '}}' attendu, '{c or 'fin de fichier'}' trouvé")
+
+
+def iterer_sequences_json(chemin_fichier):
+    """Produit les séquences d'un fichier JSON au fil de la lecture (mêmes formats que lire_sequences_json).
+
+    Pour un objet sans clé 'sequences', les valeurs sont comptées à mesure dans un
+    Counter (mémoire bornée par le nombre de séquences distinctes) puis produites à la fin,
+    car une clé 'sequences' plus loin dans le fichier les rendrait caduques.
+    """
+    try:
+        with ouvrir_texte(chemin_fichier) as f:
+            lecteur = LecteurJSONFlux(f)
+            debut = lecteur.caractere()
+
+            if debut == '[':
+                yield from lecteur.elements()
+
+            elif debut == '{':
+                en_attente = Counter()
+                # Première valeur non comptable vue avant 'sequences' : erreur seulement
+                # si la clé 'sequences' n'apparaît jamais
+                non_comptable = None
+                for cle in lecteur.paires():
+                    if cle == 'sequences':
+                        if lecteur.caractere() == '[':
+                            yield from lecteur.elements()
+                        else:
+                            yield lecteur.valeur()
+                        # Les autres clés sont ignorées, comme dans lire_sequences_json
+                        en_attente = None
+                    elif en_attente is not None:
+                        valeur = lecteur.valeur()
+                        if isinstance(valeur, (list, dict)):
+                            if non_comptable is None:
+                                non_comptable = valeur
+                        else:
+                            en_attente[valeur] += 1
+                    else:
+                        lecteur.valeur()
+                if en_attente is not None:
+                    if non_comptable is not None:
+                        _cle_comptage(non_comptable)
+                    for sequence, compte in en_attente.items():
+                        for _ in range(compte):
+                            yield sequence
+
+            else:
+                yield lecteur.valeur()
+
+            if lecteur.caractere() != '':
+                raise ValueError('données en trop après la valeur JSON principale')
+    except Exception as e:
+        print(f"❌ Erreur lors de la lecture du fichier JSON: {e}")
+        sys.exit(1)
+
+
+def _cle_comptage(valeur):
+    # Les valeurs non hachables (listes, objets) ne peuvent pas être comptées
+    if isinstance(valeur, (list, dict)):
+        raise ValueError(f"valeur non comptable: {json.dumps(valeur)[:50]}")
+    return valeur
+
+
+def iterer_sequences_csv(chemin_fichier):
+    """Produit la première colonne de chaque ligne du CSV (en-tête ignoré), ligne par ligne."""
+    try:
+        with ouvrir_texte(chemin_fichier, newline='') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                if row:
+                    yield row[0]
+    except Exception as e:
+        print(f"❌ Erreur lors de la lecture du fichier CSV: {e}")
+        sys.exit(1)
+
+
+# --- FASTA / FASTQ : lecture par grands blocs, gzip et détection du format ---
+
+EXTENSIONS_FORMATS = {
+    '.fa': 'fasta', '.fasta': 'fasta', '.fna': 'fasta', '.faa': 'fasta', '.fas': 'fasta',
+    '.fq': 'fastq', '.fastq': 'fastq',
+    '.json': 'json', '.csv': 'csv',
+}
+
+
+def detecter_format(chemin_fichier):
+    """Format d'un fichier (fasta, fastq, json ou csv), gzippé ou non, d'après son premier caractère.
+
+    L'extension (.fa, .fq, .json, ... éventuellement suivie de .gz) ne sert que si le
+    contenu ne permet pas de conclure (fichier vide).
+    """
+    with ouvrir_binaire(chemin_fichier) as f:
+        debut = f.read(4096).lstrip()
+    premier = debut[:1]
+    if premier == b'>':
+        return 'fasta'
+    if premier == b'@':
+        return 'fastq'
+    if premier in (b'[', b'{'):
+        return 'json'
+    if premier:
+        return 'csv'
+    suffixes = [suffixe.lower() for suffixe in Path(chemin_fichier).suffixes]
+    if suffixes and suffixes[-1] == '.gz':
+        suffixes.pop()
+    return EXTENSIONS_FORMATS.get(suffixes[-1] if suffixes else '', 'csv')
+
+
+def _blocs_enregistrements(f, marqueur):
+    """Blocs d'octets lus par grands morceaux, coupés juste avant une ligne commençant par marqueur.
+
+    Chaque bloc produit ne contient que des enregistrements complets ; un
+    enregistrement plus long qu'un tampon est accumulé par morceaux, sans recopie
+    répétée.
+    """
+    separateur = b'\n' + marqueur
+    en_cours = []
+    while True:
+        bloc = f.read(TAILLE_TAMPON_LECTURE)
+        if not bloc:
+            break
+        # Le séparateur peut être à cheval sur deux lectures
+        precedent = en_cours[-1][-1:] if en_cours else b''
+        coupure = (precedent + bloc).rfind(separateur)
+        if coupure < 0:
+            en_cours.append(bloc)
+            continue
+        coupure += 1 - len(precedent)
+        en_cours.append(bloc[:coupure])
+        yield b''.join(en_cours)
+        en_cours = [bloc[coupure:]]
+    if en_cours:
+        yield b''.join(en_cours)
+
+
+def iterer_sequences_fasta(chemin_fichier):
+    """Produit la séquence de chaque enregistrement FASTA (lignes concaténées, en-tête ignoré)."""
+    try:
+        with ouvrir_binaire(chemin_fichier) as f:
+            premier = True
+            for bloc in _blocs_enregistrements(f, b'>'):
+                if premier:
+                    bloc = bloc.lstrip()
+                    if bloc and not bloc.startswith(b'>'):
+                        raise ValueError("un fichier FASTA doit commencer par '>'")
+                    premier = False
+                for enregistrement in bloc[1:].split(b'\n>'):
+                    if not enregistrement:
+                        continue
+                    _, _, sequence = enregistrement.partition(b'\n')
+                    yield sequence.translate(None, b' \t\r\n').decode('ascii')
+    except Exception as e:
+        print(f"❌ Erreur lors de la lecture du fichier FASTA: {e}")
+        sys.exit(1)
+
+
+def iterer_sequences_fastq(chemin_fichier):
+    """Produit la séquence (2e ligne) de chaque enregistrement FASTQ de 4 lignes.
+
+    Les lignes de qualité pouvant commencer par '@', le découpage se fait par
+    groupes de 4 lignes (islice saute les autres sans les traiter en Python) ;
+    les FASTQ multi-lignes ne sont pas pris en charge.
+    """
+    try:
+        with ouvrir_binaire(chemin_fichier) as f:
+            entete = f.readline()
+            if not entete:
+                return
+            if not entete.startswith(b'@'):
+                raise ValueError("un fichier FASTQ doit commencer par '@'")
+            for ligne in islice(f, 0, None, 4):
+                yield ligne.rstrip(b'\r\n').decode('ascii')
+    except Exception as e:
+        print(f"❌ Erreur lors de la lecture du fichier FASTQ: {e}")
+        sys.exit(1)
+
+
+# Format -> (libellé, lecteur en flux)
+LECTEURS_FLUX = {
+    'json': ('JSON', iterer_sequences_json),
+    'csv': ('CSV', iterer_sequences_csv),
+    'fasta': ('FASTA', iterer_sequences_fasta),
+    'fastq': ('FASTQ', iterer_sequences_fastq),
+}
+
+
+# --- Comptage parallèle : morceaux d'octets alignés sur les lignes, un processus par morceau ---
+
+# En dessous, le coût de démarrage des processus dépasse le gain
+TAILLE_MIN_MORCEAU = 4 << 20
+
+
+def debut_donnees_csv(chemin_fichier):
+    """Position (en octets) de la première ligne après l'en-tête."""
+    with open(chemin_fichier, 'rb') as f:
+        f.readline()
+        return f.tell()
+
+
+def decouper_fichier(chemin_fichier, nb_morceaux, debut=0):
+    """Découpe [debut, taille du fichier) en plages d'octets qui commencent et finissent sur une fin de ligne.
+
+    Les champs CSV entre guillemets contenant des retours à la ligne ne sont pas
+    pris en charge : une ligne = un enregistrement.
+    """
+    taille = os.path.getsize(chemin_fichier)
+    pas = max(1, (taille - debut) // max(1, nb_morceaux))
+    bornes = [debut]
+    with open(chemin_fichier, 'rb') as f:
+        position = debut + pas
+        while position < taille:
+            f.seek(position - 1)
+            # Avancer jusqu'au début de la ligne suivante
+            f.readline()
+            limite = f.tell()
+            if limite >= taille:
+                break
+            if limite > bornes[-1]:
+                bornes.append(limite)
+            position = max(limite, position) + pas
+    bornes.append(taille)
+    return list(zip(bornes[:-1], bornes[1:]))
+
+
+def _lignes_plage(f, debut, fin):
+    """Lignes (texte) du fichier binaire f entre les octets debut et fin."""
+    f.seek(debut)
+    position = debut
+    while position < fin:
+        ligne = f.readline()
+        if not ligne:
+            break
+        position += len(ligne)
+        yield ligne.decode('utf-8')
+
+
+def compter_morceau_csv(chemin_fichier, debut, fin):
+    """Compte la première colonne des lignes CSV de la plage [debut, fin) (exécuté dans un worker)."""
+    with open(chemin_fichier, 'rb') as f:
+        return Counter(row[0] for row in csv.reader(_lignes_plage(f, debut, fin)) if row)
+
+
+def compter_csv_parallele(chemin_fichier, workers):
+    """Compte les séquences d'un CSV avec un pool de workers processus."""
+    # Au-delà du nombre de cœurs, les processus se disputent le CPU
+    workers = min(workers, os.cpu_count() or 1)
+    try:
+        debut = debut_donnees_csv(chemin_fichier)
+        taille = os.path.getsize(chemin_fichier) - debut
+    except OSError as e:
+        print(f"❌ Erreur lors de la lecture du fichier CSV: {e}")
+        sys.exit(1)
+    # Un morceau par worker : chaque processus ne renvoie qu'un Counter partiel
+    nb_morceaux = min(workers, max(1, taille // TAILLE_MIN_MORCEAU))
+    if workers <= 1 or nb_morceaux <= 1:
+        return compter_sequences(iterer_sequences_csv(chemin_fichier))
+
+    try:
+        plages = decouper_fichier(chemin_fichier, nb_morceaux, debut)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            partiels = executor.map(compter_morceau_csv, [chemin_fichier] * len(plages),
+                                    [d for d, _ in plages], [f for _, f in plages])
+            # Fusion dans le processus parent, au fil des résultats : sérialiser des
+            # Counter complets vers les workers coûterait plus que la fusion elle-même
+            compteur = Counter()
+            for partiel in partiels:
+                compteur.update(partiel)
+            return compteur
+    except Exception as e:
+        print(f"❌ Erreur lors de la lecture du fichier CSV: {e}")
+        sys.exit(1)
+
+
+# --- Comptage de k-mers : codage compact en entiers et comptage vectorisé ---
+
+# Alphabet -> (lettres, bits par lettre) ; un k-mer tient dans un entier de 64 bits
+ALPHABETS = {
+    'nucleotides': ('ACGT', 2),
+    'proteines': ('ACDEFGHIKLMNPQRSTVWY', 5),
+}
+# Nombre de caractères accumulés avant de compter un lot
+TAILLE_LOT_KMERS = 1 << 22
+# Au-delà de 2**BITS_MAX_DENSE codes possibles, on compte avec np.unique plutôt qu'un tableau dense
+BITS_MAX_DENSE = 22
+INVALIDE = 255
+
+
+class CompteurKmers:
+    """Compte les k-mers de séquences, chaque k-mer étant codé sur bits*k bits.
+
+    Les séquences sont concaténées par lots (séparées par un caractère invalide),
+    codées via une table de correspondance, puis les k-mers sont calculés par
+    décalages successifs sur tout le lot à la fois. Les fenêtres contenant un
+    caractère hors alphabet (N, X, séparateur...) sont ignorées.
+    """
+
+    def __init__(self, k, alphabet='nucleotides'):
+        lettres, bits = ALPHABETS[alphabet]
+        if k < 1 or k * bits > 64:
+            raise ValueError(f"k doit être compris entre 1 et {64 // bits} pour l'alphabet {alphabet}")
+        self.k = k
+        self.bits = bits
+        self.lettres = np.frombuffer(lettres.encode('ascii'), dtype=np.uint8)
+        self.table = np.full(256, INVALIDE, dtype=np.uint8)
+        for code, lettre in enumerate(lettres):
+            self.table[ord(lettre)] = code
+            self.table[ord(lettre.lower())] = code
+        self.dense = k * bits <= BITS_MAX_DENSE
+        if self.dense:
+            self._comptes_denses = np.zeros(1 << (k * bits), dtype=np.int64)
+        else:
+            self._codes = np.empty(0, dtype=np.uint64)
+            self._comptes = np.empty(0, dtype=np.int64)
+            self._lots = []
+
+    def ajouter(self, sequences):
+        """Compte les k-mers d'un itérable de séquences, par lots."""
+        lot, taille = [], 0
+        for sequence in sequences:
+            sequence = str(sequence)
+            lot.append(sequence)
+            taille += len(sequence) + 1
+            if taille >= TAILLE_LOT_KMERS:
+                self._ajouter_lot(lot)
+                lot, taille = [], 0
+        if lot:
+            self._ajouter_lot(lot)
+
+    def coder(self, texte):
+        """Codes des k-mers valides d'un texte (séquences séparées par des caractères invalides)."""
+        codes = self.table[np.frombuffer(texte.encode('ascii', 'replace'), dtype=np.uint8)]
+        n = len(codes) - self.k + 1
+        if n <= 0:
+            return np.empty(0, dtype=np.uint64)
+        # Une fenêtre est valide si elle ne contient aucun caractère invalide
+        invalides = np.concatenate(([0], np.cumsum(codes == INVALIDE)))
+        valides = invalides[self.k:] == invalides[:n]
+        kmers = np.zeros(n, dtype=np.uint64)
+        decalage = np.uint64(self.bits)
+        for j in range(self.k):
+            kmers <<= decalage
+            kmers |= codes[j:j + n]
+        return kmers[valides]
+
+    def _ajouter_lot(self, lot):
+        kmers = self.coder('\n'.join(lot))
+        if self.dense:
+            self._comptes_denses += np.bincount(kmers.astype(np.intp), minlength=len(self._comptes_denses))
+            return
+        codes, comptes = np.unique(kmers, return_counts=True)
+        self._lots.append((codes, comptes))
+        # Fusion régulière pour garder peu de lots en mémoire
+        if sum(len(c) for c, _ in self._lots) > 4 * max(len(self._codes), TAILLE_LOT_KMERS):
+            self._fusionner()
+
+    def _fusionner(self):
+        if not self._lots:
+            return
+        codes = np.concatenate([self._codes] + [c for c, _ in self._lots])
+        comptes = np.concatenate([self._comptes] + [n for _, n in self._lots])
+        self._lots = []
+        if codes.size == 0:
+            # Aucun k-mer valide (séquences plus courtes que k, caractères hors alphabet)
+            self._codes, self._comptes = codes, comptes
+            return
+        ordre = np.argsort(codes, kind='stable')
+        codes, comptes = codes[ordre], comptes[ordre]
+        debuts = np.flatnonzero(np.concatenate(([True], codes[1:] != codes[:-1])))
+        self._codes = codes[debuts]
+        self._comptes = np.add.reduceat(comptes, debuts)
+
+    def comptes(self):
+        """Tableaux (codes, comptes) des k-mers observés, triés par code."""
+        if self.dense:
+            codes = np.flatnonzero(self._comptes_denses).astype(np.uint64)
+            return codes, self._comptes_denses[codes.astype(np.intp)]
+        self._fusionner()
+        return self._codes, self._comptes
+
+    def decoder(self, codes):
+        """Chaînes correspondant à un tableau de codes de k-mers."""
+        masque = np.uint64((1 << self.bits) - 1)
+        lettres = np.empty((len(codes), self.k), dtype=np.uint8)
+        for j in range(self.k):
+            decalage = np.uint64(self.bits * (self.k - 1 - j))
+            lettres[:, j] = self.lettres[((codes >> decalage) & masque).astype(np.intp)]
+        return lettres.view(f'S{self.k}')[:, 0].astype(f'U{self.k}').tolist()
+
+    def en_compteur(self):
+        """Counter k-mer -> occurrences (décodage en chaînes : coûteux s'il y a des millions de k-mers)."""
+        codes, comptes = self.comptes()
+        compteur = Counter()
+        # dict.update évite la copie intermédiaire d'un dict
+        dict.update(compteur, zip(self.decoder(codes), comptes.tolist()))
+        return compteur
+
+
+def compter_kmers(sequences, k, alphabet='nucleotides'):
+    """Compte les k-mers des séquences (Counter k-mer -> occurrences)."""
+    compteur = CompteurKmers(k, alphabet)
+    compteur.ajouter(sequences)
+    return compteur.en_compteur()
+
+
 def compter_sequences(sequences):
     """Compte les occurrences de chaque séquence."""
     return Counter(sequences)
 
-def afficher_resultats(compteur):
-    """Affiche chaque séquence avec son nombre d'occurrences."""
-    print("\n" + "="*50)
-    print("RÉSULTATS DU COMPTAGE")
-    print("="*50 + "\n")
-    
-    for sequence, compte in compteur.items():
-        print(f"Séquence: {sequence}")
-        print(f"Nombre d'occurrences: {compte}")
-        print("-" * 30)
-    
-    print(f"\nTotal de séquences uniques: {len(compteur)}")
-    print(f"Total de séquences: {sum(compteur.values())}")
+
+# --- Table compacte : séquences dans une arène d'octets, index à adressage ouvert ---
+
+TAILLE_LOT_COMPACT = 1 << 16
+CHARGE_MAX_INDEX = 0.7
+# Coût approximatif d'une entrée de Counter de str ASCII (objet str ~49 octets + entrée de dict),
+# hors caractères de la séquence ; sert à comparer dans le rapport mémoire
+OCTETS_ENTREE_COUNTER = 80
+
+
+class TableCompacte:
+    """Comptage exact économe en mémoire, utilisable comme un Counter en lecture.
+
+    Les séquences (UTF-8) sont mises bout à bout dans une arène (bytearray) ;
+    l'entrée i occupe arene[debuts[i]:debuts[i + 1]]. Un index à adressage ouvert
+    (sondage linéaire) associe le hachage d'une séquence à son numéro d'entrée,
+    et les comptes sont dans un tableau NumPy uint32, promu en uint64 si le total
+    risque de déborder. Coût par séquence distincte : sa longueur + ~20 octets.
+    Les accès élément par élément passent par des memoryview des tableaux NumPy,
+    bien plus rapides que l'indexation NumPy scalaire.
+
+    Les séquences sont comptées sous forme de texte : les valeurs JSON numériques
+    sont converties en chaînes.
+    """
+
+    def __init__(self, capacite=1024):
+        self.arene = bytearray()
+        self.debuts = np.zeros(capacite + 1, dtype=np.int64)
+        self.comptes = np.zeros(capacite, dtype=np.uint32)
+        self.index = np.full(self._taille_index(capacite), -1, dtype=np.int32)
+        self._vues()
+        self.nb = 0
+        self.total = 0
+
+    def _vues(self):
+        # À refaire après chaque réallocation : vues, masque, seuil de réindexation et capacité
+        self._vue_index = memoryview(self.index)
+        self._vue_debuts = memoryview(self.debuts)
+        self._masque = len(self.index) - 1
+        self._seuil = int(CHARGE_MAX_INDEX * len(self.index))
+        self._capacite = len(self.comptes)
+
+    @staticmethod
+    def _taille_index(nb_entrees):
+        taille = 8
+        while taille * CHARGE_MAX_INDEX <= nb_entrees:
+            taille *= 2
+        return taille
+
+    def __len__(self):
+        return self.nb
+
+    def cle(self, entree):
+        return bytes(self.arene[self.debuts[entree]:self.debuts[entree + 1]])
+
+    def _entree(self, cle):
+        """Numéro d'entrée de la séquence cle (bytes), créée si besoin."""
+        masque = self._masque
+        position = hash(cle) & masque
+        index, debuts, arene = self._vue_index, self._vue_debuts, self.arene
+        while True:
+            entree = index[position]
+            if entree < 0:
+                break
+            if arene[debuts[entree]:debuts[entree + 1]] == cle:
+                return entree
+            position = (position + 1) & masque
+
+        entree = self.nb
+        if entree + 1 >= self._capacite:
+            self._agrandir()
+        arene += cle
+        self._vue_debuts[entree + 1] = len(arene)
+        self.nb = entree + 1
+        if self.nb >= self._seuil:
+            self._reindexer(len(self.index) * 2)
+        else:
+            index[position] = entree
+        return entree
+
+    def _agrandir(self):
+        capacite = 2 * len(self.comptes)
+        debuts = np.zeros(capacite + 1, dtype=np.int64)
+        debuts[:len(self.debuts)] = self.debuts
+        comptes = np.zeros(capacite, dtype=self.comptes.dtype)
+        comptes[:len(self.comptes)] = self.comptes
+        self.debuts, self.comptes = debuts, comptes
+        self._vues()
+
+    def _reindexer(self, taille):
+        self.index = np.full(taille, -1, dtype=np.int32)
+        self._vues()
+        index = self._vue_index
+        masque = taille - 1
+        arene = self.arene
+        bornes = self.debuts[:self.nb + 1].tolist()
+        for entree in range(self.nb):
+            position = hash(bytes(arene[bornes[entree]:bornes[entree + 1]])) & masque
+            while index[position] >= 0:
+                position = (position + 1) & masque
+            index[position] = entree
+
+    def ajouter(self, sequences):
+        """Compte un itérable de séquences, par lots pré-agrégés."""
+        lot = []
+        for sequence in sequences:
+            lot.append(sequence)
+            if len(lot) >= TAILLE_LOT_COMPACT:
+                self._ajouter_lot(lot)
+                lot = []
+        if lot:
+            self._ajouter_lot(lot)
+
+    def _ajouter_lot(self, lot):
+        # Une seule recherche dans l'index par séquence distincte du lot
+        distinctes = Counter(lot)
+        entrees = np.fromiter((self._entree(str(sequence).encode('utf-8')) for sequence in distinctes),
+                              dtype=np.int64, count=len(distinctes))
+        if self.comptes.dtype == np.uint32 and self.total + len(lot) > np.iinfo(np.uint32).max:
+            self.comptes = self.comptes.astype(np.uint64)
+        np.add.at(self.comptes, entrees, np.fromiter(distinctes.values(), dtype=self.comptes.dtype,
+                                                     count=len(distinctes)))
+        self.total += len(lot)
+
+    def items(self):
+        """Couples (séquence, occurrences) dans l'ordre de première apparition."""
+        bornes = self.debuts[:self.nb + 1].tolist()
+        comptes = self.comptes[:self.nb].tolist()
+        arene = self.arene
+        for entree in range(self.nb):
+            yield arene[bornes[entree]:bornes[entree + 1]].decode('utf-8'), comptes[entree]
+
+    def values(self):
+        return self.comptes[:self.nb]
+
+    def plus_frequentes(self, n):
+        """Les n séquences les plus fréquentes, par occurrences décroissantes (np.argpartition)."""
+        comptes = self.comptes[:self.nb]
+        if n < self.nb:
+            entrees = np.argpartition(comptes, self.nb - n)[self.nb - n:]
+        else:
+            entrees = np.arange(self.nb)
+        entrees = entrees[np.argsort(comptes[entrees], kind='stable')[::-1]]
+        return [(self.cle(entree).decode('utf-8'), int(comptes[entree])) for entree in entrees.tolist()]
+
+    def memoire(self):
+        """Octets utilisés par structure."""
+        return {
+            'arene': len(self.arene),
+            'debuts': self.debuts.nbytes,
+            'comptes': self.comptes.nbytes,
+            'index': self.index.nbytes,
+        }
+
+    def rapport_memoire(self):
+        memoire = self.memoire()
+        total = sum(memoire.values())
+        details = ', '.join(f'{nom} {_taille_lisible(octets)}' for nom, octets in memoire.items())
+        lignes = [f"Mémoire de la table compacte: {_taille_lisible(total)} ({details})"]
+        if self.nb:
+            estimation_counter = OCTETS_ENTREE_COUNTER * self.nb + len(self.arene)
+            ligne = (f"  {total / self.nb:.0f} octets par séquence distincte ; "
+                     f"un Counter en demanderait ~{_taille_lisible(estimation_counter)}")
+            if estimation_counter > total:
+                ligne += f" (x{estimation_counter / total:.1f})"
+            lignes.append(ligne)
+        return '\n'.join(lignes)
+
+
+def _taille_lisible(octets):
+    if octets < 1 << 20:
+        return f'{octets / 1024:.1f} Kio'
+    return f'{octets / 2**20:.1f} Mio'
+
+
+def compter_compact(sequences):
+    """Comme compter_sequences, avec une TableCompacte."""
+    table = TableCompacte()
+    table.ajouter(sequences)
+    return table
+
+
+# --- Comptage approché en mémoire fixe : Count-Min, séquences fréquentes et HyperLogLog ---
+
+EPSILON_DEFAUT = 1e-4       # erreur relative du Count-Min (par rapport au total)
+DELTA_DEFAUT = 0.01         # probabilité de dépasser cette erreur
+PRECISION_HLL_DEFAUT = 14   # 2**14 registres, erreur type ~0.8 %
+CANDIDATS_DEFAUT = 100      # séquences fréquentes suivies
+TAILLE_LOT_APPROCHE = 1 << 16
+
+
+def hacher_lot(sequences):
+    """Hachages 64 bits (blake2b, stables d'une exécution à l'autre) d'une liste de séquences."""
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(str(s).encode('utf-8'), digest_size=8).digest(), 'little')
+         for s in sequences),
+        dtype=np.uint64, count=len(sequences)
+    )
+
+
+class CountMinSketch:
+    """Tableau profondeur x largeur de compteurs : chaque estimation surévalue d'au plus
+    epsilon * total avec une probabilité 1 - delta."""
+
+    def __init__(self, epsilon=EPSILON_DEFAUT, delta=DELTA_DEFAUT):
+        self.largeur = math.ceil(math.e / epsilon)
+        self.profondeur = math.ceil(math.log(1 / delta))
+        self.table = np.zeros((self.profondeur, self.largeur), dtype=np.int64)
+
+    def _colonnes(self, hachages):
+        # Double hachage : une colonne par ligne dérivée des deux moitiés du hachage 64 bits
+        h1 = hachages & np.uint64(0xFFFFFFFF)
+        h2 = (hachages >> np.uint64(32)) | np.uint64(1)
+        largeur = np.uint64(self.largeur)
+        for ligne in range(self.profondeur):
+            yield ligne, ((h1 + np.uint64(ligne) * h2) % largeur).astype(np.intp)
+
+    def ajouter(self, hachages):
+        for ligne, colonnes in self._colonnes(hachages):
+            self.table[ligne] += np.bincount(colonnes, minlength=self.largeur)
+
+    def estimer(self, hachages):
+        estimations = np.full(len(hachages), np.iinfo(np.int64).max, dtype=np.int64)
+        for ligne, colonnes in self._colonnes(hachages):
+            np.minimum(estimations, self.table[ligne, colonnes], out=estimations)
+        return estimations
+
+
+class HyperLogLog:
+    """Estimation du nombre de valeurs distinctes avec 2**precision registres d'un octet."""
+
+    def __init__(self, precision=PRECISION_HLL_DEFAUT):
+        if not 4 <= precision <= 18:
+            raise ValueError("la précision HyperLogLog doit être comprise entre 4 et 18")
+        self.precision = precision
+        self.registres = np.zeros(1 << precision, dtype=np.uint8)
+
+    def ajouter(self, hachages):
+        bits_restants = 64 - self.precision
+        indices = (hachages >> np.uint64(bits_restants)).astype(np.intp)
+        reste = hachages & np.uint64((1 << bits_restants) - 1)
+        # Rang = position du premier bit à 1 ; le bit de poids faible isolé est une
+        # puissance de deux, donc son log2 est exact en flottant
+        bit_faible = reste & (~reste + np.uint64(1))
+        rangs = np.where(reste == 0, bits_restants + 1,
+                         np.log2(np.maximum(bit_faible, np.uint64(1)).astype(np.float64)) + 1)
+        np.maximum.at(self.registres, indices, rangs.astype(np.uint8))
+
+    def estimation(self):
+        m = len(self.registres)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        brute = alpha * m * m / np.sum(np.ldexp(1.0, -self.registres.astype(np.int64)))
+        vides = int(np.count_nonzero(self.registres == 0))
+        if brute <= 2.5 * m and vides:
+            # Petites cardinalités : comptage linéaire
+            return m * math.log(m / vides)
+        return float(brute)
+
+    def erreur_type(self):
+        return 1.04 / math.sqrt(len(self.registres))
+
+
+class ProfilApproximatif:
+    """Profil d'un flux de séquences en mémoire fixe.
+
+    Count-Min pour les fréquences, HyperLogLog pour le nombre de séquences
+    distinctes, et un ensemble borné de candidats (les plus fortes estimations
+    Count-Min vues jusqu'ici) pour rapporter les séquences les plus fréquentes.
+    """
+
+    def __init__(self, epsilon=EPSILON_DEFAUT, delta=DELTA_DEFAUT,
+                 precision=PRECISION_HLL_DEFAUT, candidats=CANDIDATS_DEFAUT):
+        self.sketch = CountMinSketch(epsilon, delta)
+        self.hll = HyperLogLog(precision)
+        self.epsilon = epsilon
+        self.delta = delta
+        self.capacite = candidats
+        self.candidats = {}
+        self.total = 0
+
+    def ajouter(self, sequences):
+        lot = []
+        for sequence in sequences:
+            lot.append(sequence)
+            if len(lot) >= TAILLE_LOT_APPROCHE:
+                self._ajouter_lot(lot)
+                lot = []
+        if lot:
+            self._ajouter_lot(lot)
+
+    def _ajouter_lot(self, lot):
+        hachages = hacher_lot(lot)
+        self.sketch.ajouter(hachages)
+        self.hll.ajouter(hachages)
+        self.total += len(lot)
+
+        # Candidats : séquences distinctes du lot avec leur estimation à jour
+        distinctes = {}
+        for sequence, hachage in zip(lot, hachages.tolist()):
+            distinctes.setdefault(sequence, hachage)
+        estimations = self.sketch.estimer(np.fromiter(distinctes.values(), dtype=np.uint64,
+                                                      count=len(distinctes)))
+        self.candidats.update(zip(distinctes, estimations.tolist()))
+        if len(self.candidats) > 2 * self.capacite:
+            self.candidats = dict(heapq.nlargest(self.capacite, self.candidats.items(),
+                                                 key=lambda item: item[1]))
+
+    def plus_frequentes(self, n=None):
+        """Couples (séquence, occurrences estimées), par estimation décroissante."""
+        if not self.candidats:
+            return []
+        sequences = list(self.candidats)
+        estimations = self.sketch.estimer(hacher_lot(sequences)).tolist()
+        return heapq.nlargest(n or self.capacite, zip(sequences, estimations), key=lambda item: item[1])
+
+    def distinctes(self):
+        return self.hll.estimation()
+
+    def erreur_max(self):
+        """Surestimation maximale d'une fréquence (probabilité 1 - delta)."""
+        return self.epsilon * self.total
+
+    def memoire(self):
+        """Octets occupés par les structures de taille fixe (hors candidats)."""
+        return self.sketch.table.nbytes + self.hll.registres.nbytes
+
+
+# --- Stock persistant : comptages cumulés sur disque et fichiers déjà ingérés ---
+
+# Nombre de lignes par executemany lors de l'ajout au stock
+TAILLE_LOT_STOCK = 50000
+
+
+def somme_controle(chemin_fichier):
+    """Empreinte blake2b du contenu (tel que stocké sur disque) d'un fichier."""
+    empreinte = hashlib.blake2b(digest_size=16)
+    with open(chemin_fichier, 'rb') as f:
+        while True:
+            bloc = f.read(TAILLE_TAMPON_LECTURE)
+            if not bloc:
+                break
+            empreinte.update(bloc)
+    return empreinte.hexdigest()
+
+
+class StockComptages:
+    """Comptages cumulés dans une base SQLite, avec la liste des fichiers déjà ingérés.
+
+    Les comptages sont séparés par mode ('sequences' ou 'kmer:K:alphabet'). La
+    contribution de chaque fichier est gardée à part : si un fichier déjà ingéré a
+    changé (données ajoutées du jour...), son ancienne contribution est retranchée
+    avant d'ajouter la nouvelle. L'ajout d'un fichier se fait dans une seule
+    transaction : il est compté entièrement ou pas du tout.
+    """
+
+    SCHEMA = (
+        # Colonne sequence sans type : les valeurs JSON numériques gardent leur type
+        '''CREATE TABLE IF NOT EXISTS comptages (
+            mode TEXT NOT NULL,
+            sequence NOT NULL,
+            occurrences INTEGER NOT NULL,
+            PRIMARY KEY (mode, sequence)
+        ) WITHOUT ROWID''',
+        '''CREATE TABLE IF NOT EXISTS fichiers (
+            id INTEGER PRIMARY KEY,
+            mode TEXT NOT NULL,
+            chemin TEXT NOT NULL,
+            somme_controle TEXT NOT NULL,
+            taille INTEGER NOT NULL,
+            nb_sequences INTEGER NOT NULL,
+            ingere_le TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (mode, chemin)
+        )''',
+        'CREATE INDEX IF NOT EXISTS fichiers_somme ON fichiers (mode, somme_controle)',
+        # Comptages apportés par chaque fichier, pour pouvoir les retrancher
+        '''CREATE TABLE IF NOT EXISTS contributions (
+            fichier INTEGER NOT NULL,
+            sequence NOT NULL,
+            occurrences INTEGER NOT NULL,
+            PRIMARY KEY (fichier, sequence)
+        ) WITHOUT ROWID''',
+    )
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self.conn = sqlite3.connect(chemin, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA busy_timeout=5000')
+        with self.transaction():
+            for instruction in self.SCHEMA:
+                self.conn.execute(instruction)
+
+    @contextmanager
+    def transaction(self):
+        """BEGIN IMMEDIATE ... COMMIT, ROLLBACK en cas d'exception."""
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        self.conn.execute('COMMIT')
+
+    def fichier_ingere(self, mode, somme):
+        """Chemin sous lequel ce contenu a déjà été ingéré, ou None."""
+        ligne = self.conn.execute(
+            'SELECT chemin FROM fichiers WHERE mode = ? AND somme_controle = ?', (mode, somme)
+        ).fetchone()
+        return ligne[0] if ligne else None
+
+    def chemin_ingere(self, mode, chemin):
+        """True si ce chemin a déjà été ingéré (avec un contenu quelconque)."""
+        return self._version(mode, os.path.abspath(chemin)) is not None
+
+    def _version(self, mode, chemin_absolu):
+        return self.conn.execute(
+            'SELECT id FROM fichiers WHERE mode = ? AND chemin = ?', (mode, chemin_absolu)
+        ).fetchone()
+
+    def _retirer(self, mode, fichier):
+        """Retranche la contribution d'un fichier et oublie ce fichier (dans une transaction)."""
+        self.conn.execute(
+            'UPDATE comptages SET occurrences = occurrences - ('
+            '    SELECT c.occurrences FROM contributions c'
+            '    WHERE c.fichier = ? AND c.sequence = comptages.sequence) '
+            'WHERE mode = ? AND sequence IN (SELECT sequence FROM contributions WHERE fichier = ?)',
+            (fichier, mode, fichier)
+        )
+        self.conn.execute('DELETE FROM comptages WHERE mode = ? AND occurrences <= 0', (mode,))
+        self.conn.execute('DELETE FROM contributions WHERE fichier = ?', (fichier,))
+        self.conn.execute('DELETE FROM fichiers WHERE id = ?', (fichier,))
+
+    def ajouter(self, mode, chemin, somme, compteur):
+        """Ajoute les comptages d'un fichier et l'enregistre comme ingéré.
+
+        Si ce chemin avait déjà été ingéré avec un autre contenu, l'ancienne
+        contribution est d'abord retranchée ; retourne True dans ce cas.
+        """
+        chemin_absolu = os.path.abspath(chemin)
+        with self.transaction():
+            ancienne = self._version(mode, chemin_absolu)
+            if ancienne is not None:
+                self._retirer(mode, ancienne[0])
+            fichier = self.conn.execute(
+                'INSERT INTO fichiers (mode, chemin, somme_controle, taille, nb_sequences) VALUES (?, ?, ?, ?, ?)',
+                (mode, chemin_absolu, somme, os.path.getsize(chemin), int(sum(compteur.values())))
+            ).lastrowid
+            elements = iter(compteur.items())
+            while True:
+                lot = list(islice(elements, TAILLE_LOT_STOCK))
+                if not lot:
+                    break
+                self.conn.executemany(
+                    'INSERT INTO comptages (mode, sequence, occurrences) VALUES (?, ?, ?) '
+                    'ON CONFLICT (mode, sequence) DO UPDATE SET occurrences = occurrences + excluded.occurrences',
+                    [(mode, sequence, compte) for sequence, compte in lot]
+                )
+                self.conn.executemany(
+                    'INSERT INTO contributions (fichier, sequence, occurrences) VALUES (?, ?, ?)',
+                    [(fichier, sequence, compte) for sequence, compte in lot]
+                )
+        return ancienne is not None
+
+    def compteur(self, mode):
+        """Comptages cumulés du mode, dans l'ordre des séquences."""
+        compteur = Counter()
+        curseur = self.conn.execute(
+            'SELECT sequence, occurrences FROM comptages WHERE mode = ? ORDER BY sequence', (mode,)
+        )
+        while True:
+            lot = curseur.fetchmany(TAILLE_LOT_STOCK)
+            if not lot:
+                break
+            dict.update(compteur, lot)
+        return compteur
+
+    def nb_fichiers(self, mode):
+        return self.conn.execute('SELECT COUNT(*) FROM fichiers WHERE mode = ?', (mode,)).fetchone()[0]
+
+    def fermer(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+
+def mode_comptage(args):
+    if args.kmer is not None:
+        return f'kmer:{args.kmer}:{args.alphabet}'
+    return 'sequences'
+
+
+# --- Sélection et écriture des résultats ---
+
+MODES_TRI = ('aucun', 'occurrences', 'sequence')
+FORMATS_SORTIE = ('json', 'csv', 'tsv')
+# Taille des tampons d'écriture et nombre de lignes par écriture groupée
+TAILLE_TAMPON_SORTIE = 1 << 20
+LIGNES_PAR_ECRITURE = 10000
+
+
+def selectionner_resultats(compteur, top=None, tri='aucun'):
+    """Couples (séquence, occurrences) à rapporter.
+
+    top : les N plus fréquentes, par sélection partielle avec un tas (O(n log N))
+    plutôt qu'un tri complet ; elles sont rendues par occurrences décroissantes,
+    sauf avec tri='sequence'.
+    tri : 'aucun' (ordre de comptage), 'occurrences' (décroissant) ou 'sequence'.
+    """
+    if top is not None and isinstance(compteur, TableCompacte):
+        resultats = compteur.plus_frequentes(top)
+        if tri == 'sequence':
+            resultats.sort(key=lambda item: str(item[0]))
+        return resultats
+    if top is not None:
+        resultats = heapq.nlargest(top, compteur.items(), key=lambda item: item[1])
+        if tri == 'sequence':
+            resultats.sort(key=lambda item: str(item[0]))
+        return resultats
+    if tri == 'occurrences':
+        return sorted(compteur.items(), key=lambda item: item[1], reverse=True)
+    if tri == 'sequence':
+        return sorted(compteur.items(), key=lambda item: str(item[0]))
+    return compteur.items()
+
+
+def _par_blocs(iterable, taille=LIGNES_PAR_ECRITURE):
+    bloc = []
+    for element in iterable:
+        bloc.append(element)
+        if len(bloc) >= taille:
+            yield bloc
+            bloc = []
+    if bloc:
+        yield bloc
+
+
+def afficher_resultats(compteur, resultats=None, total=None):
+    """Affiche chaque séquence avec son nombre d'occurrences.
+
+    resultats : couples à afficher (par défaut tout le compteur) ; total : nombre
+    total de séquences s'il est déjà connu. Le texte est écrit par blocs plutôt
+    qu'avec un print par ligne.
+    """
+    if resultats is None:
+        resultats = compteur.items()
+    sortie = sys.stdout
+    sortie.write("\n" + "="*50 + "\nRÉSULTATS DU COMPTAGE\n" + "="*50 + "\n\n")
+
+    separateur = "-" * 30
+    for bloc in _par_blocs(resultats):
+        sortie.write(''.join(
+            f"Séquence: {sequence}\nNombre d'occurrences: {compte}\n{separateur}\n"
+            for sequence, compte in bloc
+        ))
+
+    if total is None:
+        total = sum(compteur.values())
+    sortie.write(f"\nTotal de séquences uniques: {len(compteur)}\nTotal de séquences: {total}\n")
+    sortie.flush()
+
+
+def ecrire_resultats(resultats, chemin_fichier, format_sortie):
+    """Écrit les couples (séquence, occurrences) dans un fichier JSON, CSV ou TSV, par blocs."""
+    with open(chemin_fichier, 'w', encoding='utf-8', newline='', buffering=TAILLE_TAMPON_SORTIE) as f:
+        nb_lignes = 0
+        if format_sortie == 'json':
+            f.write('[')
+            for bloc in _par_blocs(resultats):
+                f.write(('\n' if nb_lignes == 0 else ',\n') + ',\n'.join(
+                    json.dumps({'sequence': sequence, 'occurrences': compte}, ensure_ascii=False)
+                    for sequence, compte in bloc
+                ))
+                nb_lignes += len(bloc)
+            f.write('\n]\n')
+        else:
+            writer = csv.writer(f, delimiter='\t' if format_sortie == 'tsv' else ',', lineterminator='\n')
+            writer.writerow(['sequence', 'occurrences'])
+            for bloc in _par_blocs(resultats):
+                writer.writerows(bloc)
+                nb_lignes += len(bloc)
+    return nb_lignes
+
+
+def format_depuis_extension(chemin_fichier):
+    extension = Path(chemin_fichier).suffix.lower().lstrip('.')
+    return extension if extension in FORMATS_SORTIE else 'csv'
+
+
+def rapporter_resultats(compteur, args, total=None):
+    """Affiche les résultats ou les écrit dans --output selon les options --top et --tri."""
+    resultats = selectionner_resultats(compteur, args.top, args.tri)
+    if args.output:
+        format_sortie = args.format or format_depuis_extension(args.output)
+        try:
+            nb_lignes = ecrire_resultats(resultats, args.output, format_sortie)
+        except OSError as e:
+            print(f"❌ Erreur lors de l'écriture du fichier {args.output}: {e}")
+            sys.exit(1)
+        if total is None:
+            total = sum(compteur.values())
+        print(f"✓ {nb_lignes} résultats écrits dans {args.output} ({format_sortie.upper()})")
+        print(f"Total de séquences uniques: {len(compteur)}")
+        print(f"Total de séquences: {total}")
+        return
+    afficher_resultats(compteur, resultats, total)
+
+
+def rapporter_profil(profil, args):
+    """Affiche (ou écrit dans --output) les séquences fréquentes estimées et le résumé du profil."""
+    resultats = profil.plus_frequentes(args.top)
+    if args.tri == 'sequence':
+        resultats.sort(key=lambda item: str(item[0]))
+    if args.output:
+        format_sortie = args.format or format_depuis_extension(args.output)
+        try:
+            nb_lignes = ecrire_resultats(resultats, args.output, format_sortie)
+        except OSError as e:
+            print(f"❌ Erreur lors de l'écriture du fichier {args.output}: {e}")
+            sys.exit(1)
+        print(f"✓ {nb_lignes} résultats écrits dans {args.output} ({format_sortie.upper()})")
+    else:
+        sortie = sys.stdout
+        sortie.write("\n" + "="*50 + "\nRÉSULTATS DU COMPTAGE (APPROCHÉ)\n" + "="*50 + "\n\n")
+        separateur = "-" * 30
+        sortie.write(''.join(
+            f"Séquence: {sequence}\nNombre d'occurrences (estimé): {compte}\n{separateur}\n"
+            for sequence, compte in resultats
+        ))
+
+    print(f"\nTotal de séquences uniques (estimé): {profil.distinctes():.0f} "
+          f"(± {100 * profil.hll.erreur_type():.1f} %)")
+    print(f"Total de séquences: {profil.total}")
+    print(f"Surestimation max des occurrences: {profil.erreur_max():.0f} "
+          f"(probabilité {1 - profil.delta:.0%}) — mémoire {profil.memoire() / 1024:.0f} Kio")
+
+
+def source_fichier(args):
+    """(format, chemin) du fichier source indiqué sur la ligne de commande, ou None."""
+    for format_source in LECTEURS_FLUX:
+        chemin = getattr(args, format_source)
+        if chemin:
+            return format_source, chemin
+    return None
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Compte les occurrences de séquences depuis différentes sources.'
@@ -74,11 +1253,176 @@ def main():
     group.add_argument('--json', type=str, help='Chemin vers un fichier JSON')
     group.add_argument('--csv', type=str, help='Chemin vers un fichier CSV')
     group.add_argument('--sequence', type=str, help='Séquence directe à analyser')
+    group.add_argument('--fasta', type=str, help='Chemin vers un fichier FASTA (éventuellement gzippé)')
+    group.add_argument('--fastq', type=str, help='Chemin vers un fichier FASTQ (éventuellement gzippé)')
+    group.add_argument('--input', type=str,
+                       help='Fichier dont le format (JSON, CSV, FASTA, FASTQ, gzippé ou non) est détecté automatiquement')
+
+    parser.add_argument('--stream', action='store_true',
+                        help='Compter pendant la lecture (mémoire bornée par le nombre de séquences distinctes)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Nombre de processus pour compter un gros fichier CSV (défaut: 1)')
+    parser.add_argument('--kmer', type=int, metavar='K',
+                        help='Compter les k-mers de longueur K au lieu des séquences entières')
+    parser.add_argument('--alphabet', choices=sorted(ALPHABETS), default='nucleotides',
+                        help='Alphabet des k-mers : nucleotides (2 bits par lettre) ou proteines (5 bits)')
+    parser.add_argument('--top', type=int, metavar='N',
+                        help='Ne rapporter que les N séquences les plus fréquentes')
+    parser.add_argument('--tri', choices=MODES_TRI, default='aucun',
+                        help="Ordre des résultats : aucun (ordre de comptage), occurrences ou sequence")
+    parser.add_argument('--output', type=str,
+                        help='Écrire les résultats dans un fichier au lieu de les afficher')
+    parser.add_argument('--format', choices=FORMATS_SORTIE,
+                        help="Format du fichier --output (défaut : d'après l'extension, sinon csv)")
+    parser.add_argument('--approximate', action='store_true',
+                        help='Comptage approché en mémoire fixe (Count-Min + HyperLogLog), lecture en flux')
+    parser.add_argument('--epsilon', type=float, default=EPSILON_DEFAUT,
+                        help=f'Erreur relative du Count-Min, fixe sa largeur e/epsilon (défaut: {EPSILON_DEFAUT})')
+    parser.add_argument('--delta', type=float, default=DELTA_DEFAUT,
+                        help=f"Probabilité de dépasser l'erreur, fixe sa profondeur ln(1/delta) (défaut: {DELTA_DEFAUT})")
+    parser.add_argument('--hll-precision', type=int, default=PRECISION_HLL_DEFAUT,
+                        help=f'Précision HyperLogLog, 2**p registres (défaut: {PRECISION_HLL_DEFAUT})')
+    parser.add_argument('--compact', action='store_true',
+                        help='Comptage exact dans une table compacte (arène d\'octets + index), avec rapport mémoire')
+    parser.add_argument('--store', type=str, metavar='BASE',
+                        help='Cumuler les comptages dans une base SQLite ; un fichier déjà ingéré (même contenu) est ignoré')
 
     args = parser.parse_args()
 
+    if args.top is not None and args.top < 1:
+        parser.error("--top doit être un entier positif")
+    if args.kmer is not None:
+        lettres, bits = ALPHABETS[args.alphabet]
+        if not 1 <= args.kmer <= 64 // bits:
+            parser.error(f"--kmer doit être compris entre 1 et {64 // bits} pour l'alphabet {args.alphabet}")
+        if args.compact:
+            parser.error("--compact ne s'applique pas au comptage de k-mers (déjà codés en entiers)")
+        compter = lambda sequences: compter_kmers(sequences, args.kmer, args.alphabet)
+    elif args.compact:
+        compter = compter_compact
+    else:
+        compter = compter_sequences
+
+    if args.input:
+        try:
+            format_detecte = detecter_format(args.input)
+        except OSError as e:
+            print(f"❌ Erreur lors de l'ouverture du fichier: {e}")
+            sys.exit(1)
+        print(f"Format détecté: {LECTEURS_FLUX[format_detecte][0]}")
+        setattr(args, format_detecte, args.input)
+    # FASTA et FASTQ ne sont lus qu'en flux
+    if args.fasta or args.fastq:
+        args.stream = True
+    source = source_fichier(args)
+
+    stock = None
+    if args.store:
+        if args.approximate:
+            parser.error("--store ne s'applique pas au comptage approché")
+        if not source:
+            parser.error("--store nécessite un fichier source")
+        try:
+            stock = StockComptages(args.store)
+        except sqlite3.Error as e:
+            print(f"❌ Erreur lors de l'ouverture du stock: {e}")
+            sys.exit(1)
+
+    try:
+        executer(args, parser, source, compter, stock)
+    finally:
+        # Fermée aussi sur les chemins d'erreur (sys.exit, exceptions)
+        if stock is not None:
+            stock.fermer()
+
+
+def executer(args, parser, source, compter, stock):
+    """Lit la source, compte, alimente le stock éventuel et rapporte les résultats."""
+    if stock is not None:
+        mode = mode_comptage(args)
+        try:
+            somme = somme_controle(source[1])
+        except OSError as e:
+            print(f"❌ Erreur lors de la lecture du fichier: {e}")
+            sys.exit(1)
+        deja_ingere = stock.fichier_ingere(mode, somme)
+        if deja_ingere:
+            print(f"✓ Contenu déjà ingéré dans {args.store} (sous {deja_ingere}) : rien à compter")
+            compteur = stock.compteur(mode)
+            rapporter_resultats(compteur, args)
+            return
+        if stock.chemin_ingere(mode, source[1]):
+            print(f"⚠️  {source[1]} a été modifié depuis son ingestion dans {args.store} : "
+                  "ses anciens comptages seront remplacés")
+
+    def terminer(compteur, total=None):
+        """Ajoute les comptages au stock (--store) puis rapporte les résultats."""
+        if isinstance(compteur, TableCompacte):
+            print(compteur.rapport_memoire())
+        if stock is not None:
+            try:
+                remplace = stock.ajouter(mode, source[1], somme, compteur)
+            except sqlite3.Error as e:
+                print(f"❌ Erreur lors de l'écriture dans le stock: {e}")
+                sys.exit(1)
+            action = 'remplacent la version précédente dans le' if remplace else 'ajoutées au'
+            print(f"✓ {len(compteur)} séquences distinctes {action} stock {args.store} "
+                  f"({stock.nb_fichiers(mode)} fichiers ingérés)")
+            compteur, total = stock.compteur(mode), None
+        rapporter_resultats(compteur, args, total)
+
     sequences = []
-    
+
+    if args.approximate:
+        if args.kmer is not None or args.compact:
+            parser.error("--approximate ne s'applique ni au comptage de k-mers ni à --compact")
+        if not 0 < args.epsilon < 1 or not 0 < args.delta < 1:
+            parser.error("--epsilon et --delta doivent être compris entre 0 et 1")
+        if not 4 <= args.hll_precision <= 18:
+            parser.error("--hll-precision doit être compris entre 4 et 18")
+        profil = ProfilApproximatif(args.epsilon, args.delta, args.hll_precision,
+                                    max(args.top or 0, CANDIDATS_DEFAUT))
+        if source:
+            libelle, lecteur = LECTEURS_FLUX[source[0]]
+            print(f"Lecture en flux (comptage approché) du fichier {libelle}: {source[1]}")
+            sequences = lecteur(source[1])
+        else:
+            sequences = [args.sequence]
+        profil.ajouter(sequences)
+        print(f"✓ Lecture terminée ({profil.total} séquences)")
+        rapporter_profil(profil, args)
+        return
+
+    if args.workers > 1 and (args.kmer is not None or args.compact):
+        print("⚠️  --workers ne s'applique ni au comptage de k-mers ni à --compact : lecture en flux sur un seul processus")
+        args.stream = True
+    if args.workers > 1 and args.csv and not args.stream and os.path.isfile(args.csv) and est_gzip(args.csv):
+        # Le découpage en plages d'octets suppose un fichier non compressé
+        print("⚠️  --workers ne s'applique pas aux fichiers gzippés : lecture en flux sur un seul processus")
+        args.stream = True
+    if args.workers > 1 and args.csv and not args.stream:
+        print(f"Lecture du fichier CSV avec {args.workers} processus: {args.csv}")
+        compteur = compter_csv_parallele(args.csv, args.workers)
+        total = sum(compteur.values())
+        print(f"✓ Fichier CSV lu avec succès ({total} séquences)")
+        terminer(compteur, total)
+        return
+    if args.workers > 1 and (args.json or args.fasta or args.fastq):
+        # Le découpage en morceaux suppose un enregistrement par ligne
+        print("⚠️  --workers ne s'applique qu'aux fichiers CSV : lecture en flux sur un seul processus")
+        args.stream = True
+
+    if args.stream and source:
+        libelle, lecteur = LECTEURS_FLUX[source[0]]
+        print(f"Lecture en flux du fichier {libelle}: {source[1]}")
+        sequences = lecteur(source[1])
+        compteur = compter(sequences)
+        total = sum(compteur.values())
+        unite = 'k-mers' if args.kmer is not None else 'séquences'
+        print(f"✓ Fichier lu avec succès ({total} {unite})")
+        terminer(compteur, total)
+        return
+
     if args.json:
         print(f"Lecture du fichier JSON: {args.json}")
         sequences = lire_sequences_json(args.json)
@@ -93,11 +1437,11 @@ def main():
         print("Analyse de la séquence directe")
         sequences = [args.sequence]
 
-    # Compter les séquences
-    compteur = compter_sequences(sequences)
+    # Compter les séquences (ou leurs k-mers)
+    compteur = compter(sequences)
     
-    # Afficher les résultats
-    afficher_resultats(compteur)
+    # Afficher (ou écrire) les résultats ; hors k-mers, le total est la longueur de la liste lue
+    terminer(compteur, len(sequences) if args.kmer is None else None)
 
 
 if __name__ == "__main__":
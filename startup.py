@@ -0,0 +1,73 @@
+"""
+Démarrage de l'application : sous-systèmes initialisés à la demande et mesure des temps de démarrage
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Generic, Iterator, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class StartupReport:
+    """Durées des phases de démarrage (import, création de l'app, warm-up, sous-systèmes)."""
+
+    def __init__(self):
+        self._phases: 'OrderedDict[str, float]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._phases[name] = seconds
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Mesure la durée du bloc sous le nom donné."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def as_dict(self) -> Dict[str, float]:
+        with self._lock:
+            return {name: round(seconds, 4) for name, seconds in self._phases.items()}
+
+    def format(self) -> str:
+        """Résumé sur une ligne, pour les logs."""
+        phases = self.as_dict()
+        details = ', '.join(f'{name} {seconds:.3f}s' for name, seconds in phases.items())
+        return f'Démarrage : {details}' if details else 'Démarrage : aucune phase mesurée'
+
+
+class Subsystem(Generic[T]):
+    """Ressource créée au premier get() (thread-safe), avec mesure de son temps d'initialisation."""
+
+    def __init__(self, name: str, factory: Callable[[], T], report: Optional[StartupReport] = None):
+        self.name = name
+        self._factory = factory
+        self._report = report
+        self._instance: Optional[T] = None
+        self._lock = threading.Lock()
+
+    @property
+    def initialized(self) -> bool:
+        return self._instance is not None
+
+    def get(self) -> T:
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    start = time.perf_counter()
+                    instance = self._factory()
+                    if self._report is not None:
+                        self._report.record(f'init:{self.name}', time.perf_counter() - start)
+                    self._instance = instance
+        return self._instance
+
+    def set(self, instance: Optional[T]) -> None:
+        """Remplace l'instance (None pour la recréer au prochain get())."""
+        with self._lock:
+            self._instance = instance
@@ -1,5 +1,9 @@
 let currentResults = [];
 let selectedProteins = new Set();
+let lastSearchData = null;
+let lastSearchId = null;
+let nextCursor = null;
+let currentAlignmentJob = null;
 
 function updateSelectionUI() {
     const count = selectedProteins.size;
@@ -63,6 +67,7 @@ async function createAlignmentSession() {
                     <strong style="font-size: 1.2em;">🧬 Création de la session d'alignement...</strong><br>
                     <span style="font-size: 0.95em; opacity: 0.95; margin-top: 5px; display: block;">Téléchargement et alignement des protéines</span>
                 </div>
+                <button class="btn-small" onclick="cancelAlignmentJob()">Annuler</button>
             </div>
         </div>`;
     
@@ -75,81 +80,136 @@ async function createAlignmentSession() {
             body: JSON.stringify({ pdb_ids: Array.from(selectedProteins) })
         });
         
-        const data = await response.json();
+        const job = await response.json();
         
-        if (data.success) {
-            const selectedIds = Array.from(selectedProteins).join(', ');
-            
-            let colorLegend = '';
-            if (data.colors) {
-                colorLegend = '<div style="margin-top: 15px; padding: 15px; background: #f8f9fa; border-radius: 5px;">';
-                colorLegend += '<h4 style="color: #495057; margin-bottom: 10px; font-size: 0.95em;">🎨 Couleurs des protéines :</h4>';
-                colorLegend += '<div style="display: flex; flex-wrap: wrap; gap: 10px;">';
-                for (const [pdb, color] of Object.entries(data.colors)) {
-                    colorLegend += `<div style="display: flex; align-items: center; gap: 8px; padding: 8px 12px; background: white; border-radius: 5px; box-shadow: 0 1px 3px rgba(0,0,0,0.1);">
-                        <div style="width: 20px; height: 20px; background: ${color}; border-radius: 3px; border: 1px solid #ddd;"></div>
-                        <span style="font-weight: 600; color: #495057;">${pdb}</span>
-                    </div>`;
-                }
-                colorLegend += '</div></div>';
-            }
-            
-            let alignmentInfo = '';
-            if (data.alignment_results && data.alignment_results.length > 0) {
-                alignmentInfo = '<div style="margin-top: 15px; padding: 15px; background: #e7f3ff; border-radius: 5px;">';
-                alignmentInfo += '<h4 style="color: #004085; margin-bottom: 10px; font-size: 0.95em;">📊 Résultats de l\'alignement (RMSD) :</h4>';
-                alignmentInfo += '<ul style="margin-left: 20px; line-height: 1.8; color: #004085;">';
-                data.alignment_results.forEach(result => {
-                    alignmentInfo += `<li><strong>${result.structure}</strong> vs ${result.reference}: <strong>${result.rmsd} Å</strong> (${result.atoms} atomes)</li>`;
-                });
-                alignmentInfo += '</ul></div>';
-            }
-            
-            const message = `
-                <div style="background: white; padding: 25px; border-radius: 12px; border: 3px solid #28a745; box-shadow: 0 4px 15px rgba(40, 167, 69, 0.2);">
-                    <div style="text-align: center; margin-bottom: 20px;">
-                        <div style="font-size: 4em; margin-bottom: 10px;">✅</div>
-                        <h3 style="color: #28a745; margin-bottom: 10px; font-size: 1.5em;">🎉 Session PyMOL créée avec succès !</h3>
-                    </div>
-                    
-                    <div style="background: #d4edda; padding: 15px; border-radius: 8px; margin-bottom: 15px; border-left: 4px solid #28a745;">
-                        <p style="margin-bottom: 8px; color: #155724;"><strong>✓ ${data.pdb_count} protéines chargées :</strong> ${selectedIds}</p>
-                        <p style="margin-bottom: 0; color: #155724;"><strong>✓ Référence :</strong> ${data.reference}</p>
-                    </div>
-                    
-                    ${alignmentInfo}
-                    ${colorLegend}
-                    
-                    <div style="background: #cff4fc; padding: 15px; border-left: 4px solid #0dcaf0; border-radius: 8px; margin-top: 15px;">
-                        <h4 style="color: #055160; margin-bottom: 10px; font-size: 1.1em;">💾 Comment ouvrir la session :</h4>
-                        <ol style="margin-left: 20px; line-height: 2; color: #055160;">
-                            <li>Téléchargez le fichier <strong>.pse</strong> ci-dessous</li>
-                            <li>Ouvrez <strong>PyMOL</strong> sur votre ordinateur Windows</li>
-                            <li>Dans PyMOL : <strong>File → Open...</strong></li>
-                            <li>Sélectionnez le fichier <code>${data.filename}</code></li>
-                            <li>Tout est déjà aligné et coloré ! ✨</li>
-                        </ol>
-                    </div>
-                    
-                    <div style="margin-top: 20px; text-align: center;">
-                        <a href="${data.download_url}" class="btn" style="background: #28a745; color: white; padding: 15px 40px; text-decoration: none; border-radius: 8px; font-weight: 600; font-size: 1.1em; display: inline-block;">
-                            💾 Télécharger la session (.pse)
-                        </a>
-                    </div>
-                </div>
-            `;
-            document.getElementById('message').innerHTML = message;
-            document.getElementById('message').scrollIntoView({ behavior: 'smooth', block: 'start' });
+        if (!job.success) {
+            document.getElementById('message').innerHTML = 
+                `<div class="error">❌ Erreur : ${job.error}</div>`;
+            return;
+        }
+        
+        currentAlignmentJob = job;
+        const finalState = await waitForAlignmentJob(job);
+        currentAlignmentJob = null;
+        
+        if (finalState.status === 'done') {
+            renderAlignmentSession(finalState.result);
+        } else if (finalState.status === 'cancelled') {
+            document.getElementById('message').innerHTML = 
+                `<div class="error">Alignement annulé</div>`;
         } else {
             document.getElementById('message').innerHTML = 
-                `<div class="error">❌ Erreur : ${data.error}</div>`;
+                `<div class="error">❌ Erreur : ${finalState.error}</div>`;
         }
     } catch (error) {
+        currentAlignmentJob = null;
         document.getElementById('message').innerHTML = 
             `<div class="error">❌ Erreur de connexion : ${error.message}</div>`;
     }
 }
 
+function waitForAlignmentJob(job) {
+    // Suivi de la tâche via SSE, avec repli sur une interrogation périodique
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(job.events_url);
+        
+        source.addEventListener('status', event => {
+            const state = JSON.parse(event.data);
+            if (['done', 'failed', 'cancelled'].includes(state.status)) {
+                source.close();
+                resolve(state);
+            }
+        });
+        
+        source.onerror = () => {
+            source.close();
+            pollAlignmentJob(job.status_url).then(resolve, reject);
+        };
+    });
+}
+
+async function pollAlignmentJob(statusUrl) {
+    while (true) {
+        const response = await fetch(statusUrl);
+        const state = await response.json();
+        if (!state.success || ['done', 'failed', 'cancelled'].includes(state.status)) {
+            return state;
+        }
+        await new Promise(resolve => setTimeout(resolve, 1000));
+    }
+}
+
+async function cancelAlignmentJob() {
+    if (currentAlignmentJob) {
+        await fetch(currentAlignmentJob.cancel_url, { method: 'POST' });
+    }
+}
+
+function renderAlignmentSession(data) {
+    const selectedIds = data.pdb_ids.join(', ');
+    
+    let colorLegend = '';
+    if (data.colors) {
+        colorLegend = '<div style="margin-top: 15px; padding: 15px; background: #f8f9fa; border-radius: 5px;">';
+        colorLegend += '<h4 style="color: #495057; margin-bottom: 10px; font-size: 0.95em;">🎨 Couleurs des protéines :</h4>';
+        colorLegend += '<div style="display: flex; flex-wrap: wrap; gap: 10px;">';
+        for (const [pdb, color] of Object.entries(data.colors)) {
+            colorLegend += `<div style="display: flex; align-items: center; gap: 8px; padding: 8px 12px; background: white; border-radius: 5px; box-shadow: 0 1px 3px rgba(0,0,0,0.1);">
+                <div style="width: 20px; height: 20px; background: ${color}; border-radius: 3px; border: 1px solid #ddd;"></div>
+                <span style="font-weight: 600; color: #495057;">${pdb}</span>
+            </div>`;
+        }
+        colorLegend += '</div></div>';
+    }
+    
+    let alignmentInfo = '';
+    if (data.alignment_results && data.alignment_results.length > 0) {
+        alignmentInfo = '<div style="margin-top: 15px; padding: 15px; background: #e7f3ff; border-radius: 5px;">';
+        alignmentInfo += '<h4 style="color: #004085; margin-bottom: 10px; font-size: 0.95em;">📊 Résultats de l\'alignement (RMSD) :</h4>';
+        alignmentInfo += '<ul style="margin-left: 20px; line-height: 1.8; color: #004085;">';
+        data.alignment_results.forEach(result => {
+            alignmentInfo += `<li><strong>${result.structure}</strong> vs ${result.reference}: <strong>${result.rmsd} Å</strong> (${result.atoms} atomes)</li>`;
+        });
+        alignmentInfo += '</ul></div>';
+    }
+    
+    const message = `
+        <div style="background: white; padding: 25px; border-radius: 12px; border: 3px solid #28a745; box-shadow: 0 4px 15px rgba(40, 167, 69, 0.2);">
+            <div style="text-align: center; margin-bottom: 20px;">
+                <div style="font-size: 4em; margin-bottom: 10px;">✅</div>
+                <h3 style="color: #28a745; margin-bottom: 10px; font-size: 1.5em;">🎉 Session PyMOL créée avec succès !</h3>
+            </div>
+            
+            <div style="background: #d4edda; padding: 15px; border-radius: 8px; margin-bottom: 15px; border-left: 4px solid #28a745;">
+                <p style="margin-bottom: 8px; color: #155724;"><strong>✓ ${data.pdb_count} protéines chargées :</strong> ${selectedIds}</p>
+                <p style="margin-bottom: 0; color: #155724;"><strong>✓ Référence :</strong> ${data.reference}</p>
+            </div>
+            
+            ${alignmentInfo}
+            ${colorLegend}
+            
+            <div style="background: #cff4fc; padding: 15px; border-left: 4px solid #0dcaf0; border-radius: 8px; margin-top: 15px;">
+                <h4 style="color: #055160; margin-bottom: 10px; font-size: 1.1em;">💾 Comment ouvrir la session :</h4>
+                <ol style="margin-left: 20px; line-height: 2; color: #055160;">
+                    <li>Téléchargez le fichier <strong>.pse</strong> ci-dessous</li>
+                    <li>Ouvrez <strong>PyMOL</strong> sur votre ordinateur Windows</li>
+                    <li>Dans PyMOL : <strong>File → Open...</strong></li>
+                    <li>Sélectionnez le fichier <code>${data.filename}</code></li>
+                    <li>Tout est déjà aligné et coloré ! ✨</li>
+                </ol>
+            </div>
+            
+            <div style="margin-top: 20px; text-align: center;">
+                <a href="${data.download_url}" class="btn" style="background: #28a745; color: white; padding: 15px 40px; text-decoration: none; border-radius: 8px; font-weight: 600; font-size: 1.1em; display: inline-block;">
+                    💾 Télécharger la session (.pse)
+                </a>
+            </div>
+        </div>
+    `;
+    document.getElementById('message').innerHTML = message;
+    document.getElementById('message').scrollIntoView({ behavior: 'smooth', block: 'start' });
+}
+
 function switchTab(tabName) {
     document.querySelectorAll('.tab-content').forEach(content => {
         content.classList.remove('active');
@@ -190,12 +250,51 @@ async function search(searchType) {
         searchData.max_results = document.getElementById('advanced-max').value;
     }
     
+    searchData.stream = true;
+    lastSearchData = searchData;
+    
     document.getElementById('loading').style.display = 'block';
     document.getElementById('results').style.display = 'none';
     document.getElementById('message').innerHTML = '';
     
     clearSelection();
     
+    await runSearch(searchData, false);
+}
+
+async function loadMoreResults() {
+    if (!lastSearchData || !nextCursor) {
+        return;
+    }
+    await runSearch({ ...lastSearchData, cursor: nextCursor }, true);
+}
+
+async function readNdjson(response, onLine) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        let newline;
+        while ((newline = buffer.indexOf('\n')) >= 0) {
+            const line = buffer.slice(0, newline).trim();
+            buffer = buffer.slice(newline + 1);
+            if (line) onLine(JSON.parse(line));
+        }
+    }
+    
+    if (buffer.trim()) onLine(JSON.parse(buffer));
+}
+
+async function runSearch(searchData, append) {
+    // Les lignes arrivent dans l'ordre de réception ; on les replace dans l'ordre à la fin
+    const pageResults = [];
+    let totalCount = 0;
+    
     try {
         const response = await fetch('/search', {
             method: 'POST',
@@ -205,19 +304,48 @@ async function search(searchType) {
             body: JSON.stringify(searchData)
         });
         
-        const data = await response.json();
-        
-        document.getElementById('loading').style.display = 'none';
-        
-        if (data.success) {
-            currentResults = data.results;
-            displayResults(data.results);
-            document.getElementById('message').innerHTML = 
-                `<div class="success">✓ ${data.count} résultat(s) trouvé(s)</div>`;
-        } else {
+        const contentType = response.headers.get('Content-Type') || '';
+        if (!contentType.includes('application/x-ndjson')) {
+            const data = await response.json();
+            document.getElementById('loading').style.display = 'none';
             document.getElementById('message').innerHTML = 
                 `<div class="error">Erreur: ${data.error}</div>`;
+            return;
+        }
+        
+        if (!append) {
+            currentResults = [];
+            displayResults([]);
         }
+        
+        await readNdjson(response, event => {
+            if (event.type === 'meta') {
+                totalCount = event.total_count;
+                lastSearchId = event.search_id;
+                nextCursor = event.next_cursor;
+                document.getElementById('loading').style.display = 'none';
+                document.getElementById('results').style.display = 'block';
+            } else if (event.type === 'result') {
+                pageResults[event.index] = event.result;
+                if (currentResults.length === 0 && pageResults.filter(Boolean).length === 1) {
+                    document.getElementById('results-body').innerHTML = '';
+                }
+                document.getElementById('results-body').appendChild(createResultRow(event.result));
+            } else if (event.type === 'error') {
+                document.getElementById('message').innerHTML = 
+                    `<div class="error">Erreur: ${event.error}</div>`;
+            }
+        });
+        
+        currentResults = currentResults.concat(pageResults.filter(Boolean));
+        displayResults(currentResults);
+        
+        let message = `<div class="success">✓ ${currentResults.length} résultat(s) affiché(s) sur ${totalCount}`;
+        if (nextCursor) {
+            message += ` <button class="btn-small" onclick="loadMoreResults()">Charger plus</button>`;
+        }
+        message += '</div>';
+        document.getElementById('message').innerHTML = message;
     } catch (error) {
         document.getElementById('loading').style.display = 'none';
         document.getElementById('message').innerHTML = 
@@ -225,6 +353,27 @@ async function search(searchType) {
     }
 }
 
+function createResultRow(protein) {
+    const row = document.createElement('tr');
+    row.innerHTML = `
+        <td><input type="checkbox" class="protein-checkbox" value="${protein.PDB_ID}" onchange="toggleProteinSelection('${protein.PDB_ID}')"${selectedProteins.has(protein.PDB_ID) ? ' checked' : ''}></td>
+        <td><a href="https://www.rcsb.org/structure/${protein.PDB_ID}" target="_blank" class="pdb-link">${protein.PDB_ID}</a></td>
+        <td>${protein.Title}</td>
+        <td>${protein.Resolution}</td>
+        <td>${protein.Experimental_Method}</td>
+        <td>${protein.Release_Date}</td>
+        <td>${protein.Organism}</td>
+        <td>
+            <div class="action-buttons">
+                <a href="/download_pdb/${protein.PDB_ID}" class="btn-small btn-download" title="Télécharger PDB">
+                    💾 PDB
+                </a>
+            </div>
+        </td>
+    `;
+    return row;
+}
+
 function displayResults(results) {
     const tbody = document.getElementById('results-body');
     tbody.innerHTML = '';
@@ -238,24 +387,7 @@ function displayResults(results) {
     document.getElementById('results-count').textContent = `${results.length} résultat(s) trouvé(s)`;
     
     results.forEach(protein => {
-        const row = document.createElement('tr');
-        row.innerHTML = `
-            <td><input type="checkbox" class="protein-checkbox" value="${protein.PDB_ID}" onchange="toggleProteinSelection('${protein.PDB_ID}')"></td>
-            <td><a href="https://www.rcsb.org/structure/${protein.PDB_ID}" target="_blank" class="pdb-link">${protein.PDB_ID}</a></td>
-            <td>${protein.Title}</td>
-            <td>${protein.Resolution}</td>
-            <td>${protein.Experimental_Method}</td>
-            <td>${protein.Release_Date}</td>
-            <td>${protein.Organism}</td>
-            <td>
-                <div class="action-buttons">
-                    <a href="/download_pdb/${protein.PDB_ID}" class="btn-small btn-download" title="Télécharger PDB">
-                        💾 PDB
-                    </a>
-                </div>
-            </td>
-        `;
-        tbody.appendChild(row);
+        tbody.appendChild(createResultRow(protein));
     });
     
     document.getElementById('results').style.display = 'block';
@@ -267,25 +399,45 @@ async function exportResults() {
         return;
     }
     
+    const format = document.getElementById('export-format').value;
+    
+    // Recherche mémorisée côté serveur : le navigateur télécharge directement le flux
+    // (limité aux résultats chargés dans la page)
+    if (lastSearchId) {
+        window.location.href = `/export?search_id=${encodeURIComponent(lastSearchId)}&format=${format}&limit=${currentResults.length}`;
+        document.getElementById('message').innerHTML = 
+            `<div class="success">✓ Export lancé! Le téléchargement va commencer...</div>`;
+        return;
+    }
+    
     try {
         const response = await fetch('/export', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
             },
-            body: JSON.stringify({ results: currentResults })
+            body: JSON.stringify({ results: currentResults, format: format })
         });
         
-        const data = await response.json();
-        
-        if (data.success) {
-            window.location.href = data.download_url;
-            document.getElementById('message').innerHTML = 
-                `<div class="success">✓ Export réussi! Le téléchargement va commencer...</div>`;
-        } else {
+        const contentType = response.headers.get('Content-Type') || '';
+        if (contentType.includes('application/json')) {
+            const data = await response.json();
             document.getElementById('message').innerHTML = 
                 `<div class="error">Erreur lors de l'export: ${data.error}</div>`;
+            return;
         }
+        
+        const blob = await response.blob();
+        const url = URL.createObjectURL(blob);
+        const link = document.createElement('a');
+        link.href = url;
+        link.download = `pdb_search_results.${format}`;
+        document.body.appendChild(link);
+        link.click();
+        link.remove();
+        URL.revokeObjectURL(url);
+        document.getElementById('message').innerHTML = 
+            `<div class="success">✓ Export réussi!</div>`;
     } catch (error) {
         document.getElementById('message').innerHTML = 
             `<div class="error">Erreur de connexion: ${error.message}</div>`;
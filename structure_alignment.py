@@ -0,0 +1,182 @@
+"""
+Moteur d'alignement structural natif (NumPy)
+Correspondance des résidus par alignement de séquences puis superposition de Kabsch sur les Cα
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from pdb_parser import load_atoms, select_ca, coordinates
+
+# Code à une lettre des acides aminés (les résidus inconnus deviennent 'X')
+THREE_TO_ONE = {
+    'ALA': 'A', 'ARG': 'R', 'ASN': 'N', 'ASP': 'D', 'CYS': 'C',
+    'GLN': 'Q', 'GLU': 'E', 'GLY': 'G', 'HIS': 'H', 'ILE': 'I',
+    'LEU': 'L', 'LYS': 'K', 'MET': 'M', 'PHE': 'F', 'PRO': 'P',
+    'SER': 'S', 'THR': 'T', 'TRP': 'W', 'TYR': 'Y', 'VAL': 'V',
+    'MSE': 'M', 'SEC': 'U', 'PYL': 'O'
+}
+
+# Matrice BLOSUM62 (ordre des lignes/colonnes : _BLOSUM_ALPHABET)
+_BLOSUM_ALPHABET = 'ARNDCQEGHILKMFPSTWYVX'
+_BLOSUM62 = np.array([
+    [4, -1, -2, -2, 0, -1, -1, 0, -2, -1, -1, -1, -1, -2, -1, 1, 0, -3, -2, 0, 0],
+    [-1, 5, 0, -2, -3, 1, 0, -2, 0, -3, -2, 2, -1, -3, -2, -1, -1, -3, -2, -3, -1],
+    [-2, 0, 6, 1, -3, 0, 0, 0, 1, -3, -3, 0, -2, -3, -2, 1, 0, -4, -2, -3, -1],
+    [-2, -2, 1, 6, -3, 0, 2, -1, -1, -3, -4, -1, -3, -3, -1, 0, -1, -4, -3, -3, -1],
+    [0, -3, -3, -3, 9, -3, -4, -3, -3, -1, -1, -3, -1, -2, -3, -1, -1, -2, -2, -1, -2],
+    [-1, 1, 0, 0, -3, 5, 2, -2, 0, -3, -2, 1, 0, -3, -1, 0, -1, -2, -1, -2, -1],
+    [-1, 0, 0, 2, -4, 2, 5, -2, 0, -3, -3, 1, -2, -3, -1, 0, -1, -3, -2, -2, -1],
+    [0, -2, 0, -1, -3, -2, -2, 6, -2, -4, -4, -2, -3, -3, -2, 0, -2, -2, -3, -3, -1],
+    [-2, 0, 1, -1, -3, 0, 0, -2, 8, -3, -3, -1, -2, -1, -2, -1, -2, -2, 2, -3, -1],
+    [-1, -3, -3, -3, -1, -3, -3, -4, -3, 4, 2, -3, 1, 0, -3, -2, -1, -3, -1, 3, -1],
+    [-1, -2, -3, -4, -1, -2, -3, -4, -3, 2, 4, -2, 2, 0, -3, -2, -1, -2, -1, 1, -1],
+    [-1, 2, 0, -1, -3, 1, 1, -2, -1, -3, -2, 5, -1, -3, -1, 0, -1, -3, -2, -2, -1],
+    [-1, -1, -2, -3, -1, 0, -2, -3, -2, 1, 2, -1, 5, 0, -2, -1, -1, -1, -1, 1, -1],
+    [-2, -3, -3, -3, -2, -3, -3, -3, -1, 0, 0, -3, 0, 6, -4, -2, -2, 1, 3, -1, -1],
+    [-1, -2, -2, -1, -3, -1, -1, -2, -2, -3, -3, -1, -2, -4, 7, -1, -1, -4, -3, -2, -2],
+    [1, -1, 1, 0, -1, 0, 0, 0, -1, -2, -2, 0, -1, -2, -1, 4, 1, -3, -2, -2, 0],
+    [0, -1, 0, -1, -1, -1, -1, -2, -2, -1, -1, -1, -1, -2, -1, 1, 5, -2, -2, 0, 0],
+    [-3, -3, -4, -4, -2, -2, -3, -2, -2, -3, -2, -3, -1, 1, -4, -3, -2, 11, 2, -3, -2],
+    [-2, -2, -2, -3, -2, -1, -2, -3, 2, -1, -1, -2, -1, 3, -3, -2, -2, 2, 7, -1, -1],
+    [0, -3, -3, -3, -1, -2, -2, -3, -3, 3, 1, -2, 1, -1, -2, -2, 0, -3, -1, 4, -1],
+    [0, -1, -1, -1, -2, -1, -1, -1, -1, -1, -1, -1, -1, -1, -2, 0, 0, -2, -1, -1, -1],
+], dtype=np.float64)
+
+GAP_PENALTY = -4.0
+
+
+class CAChain:
+    """Atomes Cα d'une structure : séquence à une lettre et coordonnées (n, 3)."""
+
+    __slots__ = ('sequence', 'coords')
+
+    def __init__(self, sequence: str, coords: np.ndarray):
+        self.sequence = sequence
+        self.coords = coords
+
+    def __len__(self) -> int:
+        return len(self.sequence)
+
+
+def read_ca_atoms(path: str) -> CAChain:
+    """Lit les atomes Cα du premier modèle d'un fichier PDB ou mmCIF (un par résidu)."""
+    ca = select_ca(load_atoms(path))
+    sequence = ''.join(THREE_TO_ONE.get(resname.decode('ascii', 'replace'), 'X') for resname in ca['resname'])
+    return CAChain(sequence, coordinates(ca))
+
+
+def _encode(sequence: str) -> np.ndarray:
+    """Indices des résidus dans la matrice BLOSUM62."""
+    lookup = np.full(128, _BLOSUM_ALPHABET.index('X'), dtype=np.intp)
+    for i, letter in enumerate(_BLOSUM_ALPHABET):
+        lookup[ord(letter)] = i
+    codes = np.frombuffer(sequence.encode('ascii', 'replace'), dtype=np.uint8)
+    return lookup[codes]
+
+
+def align_sequences(seq_a: str, seq_b: str, gap: float = GAP_PENALTY) -> Tuple[np.ndarray, np.ndarray]:
+    """Alignement global (Needleman-Wunsch, BLOSUM62, pénalité de gap linéaire).
+
+    Chaque ligne de la matrice de programmation dynamique est calculée de façon
+    vectorisée : la dépendance horizontale se ramène à un maximum cumulé.
+    Retourne les indices appariés (i dans seq_a, j dans seq_b).
+    """
+    n, m = len(seq_a), len(seq_b)
+    if n == 0 or m == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+    scores = _BLOSUM62[_encode(seq_a)[:, None], _encode(seq_b)[None, :]]
+    offsets = gap * np.arange(m + 1)
+
+    H = np.empty((n + 1, m + 1), dtype=np.float64)
+    H[0] = offsets
+    for i in range(1, n + 1):
+        previous = H[i - 1]
+        # Meilleur de la diagonale (appariement) et du haut (gap dans seq_b)
+        best = np.empty(m + 1)
+        best[0] = gap * i
+        np.maximum(previous[:-1] + scores[i - 1], previous[1:] + gap, out=best[1:])
+        # Gaps horizontaux : H[j] = max_k<=j (best[k] + gap * (j - k))
+        H[i] = np.maximum.accumulate(best - offsets) + offsets
+
+    # Retour arrière
+    pairs_a, pairs_b = [], []
+    i, j = n, m
+    while i > 0 and j > 0:
+        if H[i, j] == H[i - 1, j - 1] + scores[i - 1, j - 1]:
+            i -= 1
+            j -= 1
+            pairs_a.append(i)
+            pairs_b.append(j)
+        elif H[i, j] == H[i - 1, j] + gap:
+            i -= 1
+        else:
+            j -= 1
+
+    return np.array(pairs_a[::-1], dtype=np.intp), np.array(pairs_b[::-1], dtype=np.intp)
+
+
+def kabsch(mobile: np.ndarray, target: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Rotation et translation optimales (moindres carrés) superposant mobile sur target.
+
+    Retourne (R, t) tels que mobile @ R.T + t approche target.
+    """
+    mobile_center = mobile.mean(axis=0)
+    target_center = target.mean(axis=0)
+    covariance = (mobile - mobile_center).T @ (target - target_center)
+    U, _, Vt = np.linalg.svd(covariance)
+    # Correction d'une éventuelle réflexion
+    d = np.sign(np.linalg.det(U @ Vt))
+    D = np.diag([1.0, 1.0, d])
+    R = (U @ D @ Vt).T
+    return R, target_center - mobile_center @ R.T
+
+
+def rmsd(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.sqrt(np.mean(np.sum((a - b) ** 2, axis=1))))
+
+
+def superpose(mobile: np.ndarray, target: np.ndarray, cycles: int = 5, cutoff: float = 2.0) -> Tuple[float, int]:
+    """Superposition avec rejet itératif des paires aberrantes (comme la commande align de PyMOL).
+
+    À chaque cycle, les paires dont la distance dépasse cutoff * RMSD sont écartées.
+    Retourne (RMSD final, nombre d'atomes retenus).
+    """
+    keep = np.ones(len(mobile), dtype=bool)
+    for cycle in range(cycles + 1):
+        R, t = kabsch(mobile[keep], target[keep])
+        distances = np.sqrt(np.sum((mobile @ R.T + t - target) ** 2, axis=1))
+        current = float(np.sqrt(np.mean(distances[keep] ** 2)))
+        # Superposition déjà exacte : rien à rejeter
+        if cycle == cycles or current < 1e-6:
+            break
+        new_keep = keep & (distances <= cutoff * current)
+        if new_keep.sum() < 3 or np.array_equal(new_keep, keep):
+            break
+        keep = new_keep
+    return current, int(keep.sum())
+
+
+def align_pair(reference: CAChain, mobile: CAChain, cycles: int = 5, cutoff: float = 2.0) -> Tuple[float, int]:
+    """RMSD Cα entre deux structures après correspondance des résidus par séquence."""
+    idx_ref, idx_mob = align_sequences(reference.sequence, mobile.sequence)
+    if len(idx_ref) < 3:
+        raise ValueError('Pas assez de résidus correspondants pour superposer les structures')
+    return superpose(mobile.coords[idx_mob], reference.coords[idx_ref], cycles, cutoff)
+
+
+def align_to_reference(pdb_ids: List[str], chains: Dict[str, CAChain]) -> List[Dict]:
+    """Aligne chaque structure sur la première ; même format que alignment_results de PyMOL."""
+    reference = pdb_ids[0]
+    results = []
+    for pdb_id in pdb_ids[1:]:
+        value, atoms = align_pair(chains[reference], chains[pdb_id])
+        results.append({
+            'structure': pdb_id,
+            'reference': reference,
+            'rmsd': round(value, 3),
+            'atoms': atoms
+        })
+    return results
@@ -0,0 +1,193 @@
+"""
+Stockage local des fichiers de structure (PDB / mmCIF), adressé par contenu
+
+Organisation sur disque :
+    <racine>/objects/<sha256[:2]>/<sha256>   contenu des fichiers (dédupliqué)
+    <racine>/refs/<ID>.<format>.json         référence : empreinte, ETag, Last-Modified, date de vérification
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+
+from rcsb_http import get_session, RCSB_FILES_URL
+
+_PDB_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,32}$')
+_FORMATS = ('pdb', 'cif')
+
+
+class StoredStructure:
+    """Fichier de structure disponible localement."""
+
+    __slots__ = ('pdb_id', 'fmt', 'path', 'sha256', 'size')
+
+    def __init__(self, pdb_id: str, fmt: str, path: str, sha256: str, size: int):
+        self.pdb_id = pdb_id
+        self.fmt = fmt
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+
+
+class StructureStore:
+    """Cache disque des fichiers RCSB avec revalidation conditionnelle et écritures atomiques."""
+
+    def __init__(self, root: str, session: Optional[requests.Session] = None,
+                 files_url: str = RCSB_FILES_URL, revalidate_after: float = 7 * 24 * 3600,
+                 chunk_size: int = 64 * 1024):
+        self.root = os.path.abspath(root)
+        self.files_url = files_url
+        self.revalidate_after = revalidate_after
+        self.chunk_size = chunk_size
+        self._session = session
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self.objects_dir = os.path.join(self.root, 'objects')
+        self.refs_dir = os.path.join(self.root, 'refs')
+
+    @property
+    def session(self) -> requests.Session:
+        return self._session if self._session is not None else get_session()
+
+    @staticmethod
+    def _check(pdb_id: str, fmt: str) -> str:
+        """Valide l'identifiant et le format (évite toute traversée de chemin)."""
+        if not _PDB_ID_PATTERN.match(pdb_id):
+            raise ValueError(f'Identifiant PDB invalide: {pdb_id}')
+        if fmt not in _FORMATS:
+            raise ValueError(f'Format non supporté: {fmt}')
+        return pdb_id.upper()
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def _ref_path(self, pdb_id: str, fmt: str) -> str:
+        return os.path.join(self.refs_dir, f'{pdb_id}.{fmt}.json')
+
+    def _object_path(self, sha256: str) -> str:
+        return os.path.join(self.objects_dir, sha256[:2], sha256)
+
+    def _read_ref(self, pdb_id: str, fmt: str) -> Optional[Dict]:
+        try:
+            with open(self._ref_path(pdb_id, fmt), 'r') as f:
+                ref = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Une référence vers un objet disparu est ignorée
+        if not os.path.exists(self._object_path(ref.get('sha256', ''))):
+            return None
+        return ref
+
+    def _write_ref(self, pdb_id: str, fmt: str, ref: Dict) -> None:
+        os.makedirs(self.refs_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.refs_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(ref, f)
+            os.replace(tmp_path, self._ref_path(pdb_id, fmt))
+        except BaseException:
+            _silent_remove(tmp_path)
+            raise
+
+    def _stored(self, pdb_id: str, fmt: str, ref: Dict) -> StoredStructure:
+        return StoredStructure(pdb_id, fmt, self._object_path(ref['sha256']), ref['sha256'], ref['size'])
+
+    def local(self, pdb_id: str, fmt: str = 'pdb') -> Optional[StoredStructure]:
+        """Retourne le fichier local s'il existe, sans accès réseau."""
+        pdb_id = self._check(pdb_id, fmt)
+        ref = self._read_ref(pdb_id, fmt)
+        return self._stored(pdb_id, fmt, ref) if ref else None
+
+    def get(self, pdb_id: str, fmt: str = 'pdb') -> StoredStructure:
+        """Retourne le fichier local, en le téléchargeant ou en le revalidant si nécessaire."""
+        pdb_id = self._check(pdb_id, fmt)
+
+        ref = self._read_ref(pdb_id, fmt)
+        if ref and time.time() - ref.get('checked_at', 0) < self.revalidate_after:
+            return self._stored(pdb_id, fmt, ref)
+
+        # Un seul téléchargement à la fois par fichier dans ce processus
+        with self._lock_for(f'{pdb_id}.{fmt}'):
+            ref = self._read_ref(pdb_id, fmt)
+            if ref and time.time() - ref.get('checked_at', 0) < self.revalidate_after:
+                return self._stored(pdb_id, fmt, ref)
+
+            try:
+                ref = self._fetch(pdb_id, fmt, ref)
+            except requests.exceptions.RequestException as e:
+                if ref is None:
+                    raise
+                # Serveur injoignable : la copie locale reste utilisable
+                print(f"Revalidation impossible pour {pdb_id}.{fmt}, copie locale utilisée: {e}")
+            return self._stored(pdb_id, fmt, ref)
+
+    def _fetch(self, pdb_id: str, fmt: str, ref: Optional[Dict]) -> Dict:
+        """Télécharge le fichier par blocs vers le disque (requête conditionnelle si déjà présent)."""
+        headers = {}
+        if ref:
+            if ref.get('etag'):
+                headers['If-None-Match'] = ref['etag']
+            if ref.get('last_modified'):
+                headers['If-Modified-Since'] = ref['last_modified']
+
+        url = f"{self.files_url}/{pdb_id}.{fmt}"
+        with self.session.get(url, headers=headers, stream=True) as response:
+            if response.status_code == 304 and ref:
+                ref = dict(ref, checked_at=time.time())
+                self._write_ref(pdb_id, fmt, ref)
+                return ref
+
+            response.raise_for_status()
+
+            os.makedirs(self.objects_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.objects_dir, suffix='.part')
+            digest = hashlib.sha256()
+            size = 0
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        if chunk:
+                            f.write(chunk)
+                            digest.update(chunk)
+                            size += len(chunk)
+
+                sha256 = digest.hexdigest()
+                object_path = self._object_path(sha256)
+                if os.path.exists(object_path):
+                    _silent_remove(tmp_path)
+                else:
+                    os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                    # Renommage atomique : un lecteur voit l'ancien fichier ou le nouveau, jamais un fichier partiel
+                    os.replace(tmp_path, object_path)
+            except BaseException:
+                _silent_remove(tmp_path)
+                raise
+
+            ref = {
+                'sha256': sha256,
+                'size': size,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'checked_at': time.time()
+            }
+
+        self._write_ref(pdb_id, fmt, ref)
+        return ref
+
+
+def _silent_remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,87 @@
+import sys
+from pathlib import Path
+
+import pytest
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import app as application  # noqa: E402
+from rcsb_cache import LRUCache  # noqa: E402
+
+
+class ReponseFactice:
+    headers = {}
+
+    def __init__(self, donnees, status_code=200):
+        self.donnees = donnees
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f'HTTP {self.status_code}')
+
+    def json(self):
+        return self.donnees
+
+
+class SessionFactice:
+    """Remplace la session HTTP : l'API de recherche renvoie total résultats paginés."""
+
+    def __init__(self, total=30):
+        self.total = total
+        self.recherches = []
+
+    def post(self, url, json=None, headers=None):
+        self.recherches.append(json)
+        pagination = json['request_options']['paginate']
+        stop = min(pagination['start'] + pagination['rows'], self.total)
+        ids = [f'{i}XYZ' for i in range(pagination['start'], stop)]
+        return ReponseFactice({'result_set': [{'identifier': pdb_id} for pdb_id in ids],
+                               'total_count': self.total})
+
+    def get(self, url, headers=None):
+        pdb_id = url.rsplit('/', 1)[1]
+        return ReponseFactice({'struct': {'title': f'Structure {pdb_id}'}})
+
+
+def test_cle_de_cache_independante_de_l_ordre_des_cles():
+    session = SessionFactice()
+    searcher = application.RCSBPDBSearch(session=session, search_cache=LRUCache(max_entries=16))
+    requete = application.RCSBPDBSearch.keyword_query('kinase')
+    meme_requete = dict(reversed(list(requete.items())))
+    meme_requete['query'] = dict(reversed(list(requete['query'].items())))
+
+    assert searcher._execute_query(requete, 5) == ['0XYZ', '1XYZ', '2XYZ', '3XYZ', '4XYZ']
+    assert searcher._execute_query(meme_requete, 5) == ['0XYZ', '1XYZ', '2XYZ', '3XYZ', '4XYZ']
+
+    assert len(session.recherches) == 1
+    # Une autre taille de page est une autre entrée du cache
+    searcher._execute_query(requete, 6)
+    assert len(session.recherches) == 2
+
+
+@pytest.fixture
+def client():
+    application.pdb_search.set(application.RCSBPDBSearch(session=SessionFactice()))
+    application.app.config['TESTING'] = True
+    with application.app.test_client() as client:
+        with client.session_transaction() as session:
+            session['user_id'] = 1
+            session['username'] = 'alice'
+        yield client
+    application.pdb_search.set(None)
+
+
+@pytest.mark.parametrize('limite, lignes', [(None, 5), ('7', 7), ('all', 30)])
+def test_export_limite_le_nombre_de_lignes(client, limite, lignes):
+    requete = application.RCSBPDBSearch.keyword_query('kinase')
+    search_id = application._save_search({'query': requete, 'max_results': 5})
+    parametres = {'search_id': search_id, 'format': 'csv'}
+    if limite is not None:
+        parametres['limit'] = limite
+
+    response = client.get('/export', query_string=parametres)
+
+    assert response.status_code == 200
+    assert len(response.get_data(as_text=True).strip().splitlines()) == 1 + lignes
@@ -0,0 +1,49 @@
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from db import Database, UserStore  # noqa: E402
+
+
+@pytest.fixture
+def base(tmp_path):
+    db = Database(str(tmp_path / 'users.db'))
+    yield db
+    db.close()
+
+
+def test_creation_utilisateur_en_double(base):
+    users = UserStore(base)
+
+    user_id = users.create('alice', 'alice@example.org', 'hash')
+    assert user_id is not None
+    assert users.create('alice', 'autre@example.org', 'hash') is None
+    assert users.create('bob', 'alice@example.org', 'hash') is None
+    assert users.get_by_username('alice')['id'] == user_id
+
+
+def test_inscriptions_simultanees_un_seul_gagnant(base):
+    users = UserStore(base)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        ids = list(executor.map(lambda i: users.create('alice', f'alice{i}@example.org', 'hash'), range(16)))
+
+    assert len([user_id for user_id in ids if user_id is not None]) == 1
+
+
+def test_une_connexion_par_thread(base):
+    principale = base.connection()
+    assert base.connection() is principale
+
+    autres = []
+    thread = threading.Thread(target=lambda: autres.append(base.connection()))
+    thread.start()
+    thread.join()
+
+    assert autres[0] is not principale
+    assert base.query_one('PRAGMA journal_mode')[0] == 'wal'
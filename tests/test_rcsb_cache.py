@@ -0,0 +1,75 @@
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rcsb_cache import CacheEntry, LRUCache, SQLiteCache, TwoTierCache  # noqa: E402
+
+
+def test_lru_evince_l_entree_la_moins_recemment_utilisee():
+    cache = LRUCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1  # 'a' devient la plus récente
+
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_lru_entree_expiree():
+    cache = LRUCache(max_entries=10, ttl=60)
+    cache.set_entry('ancienne', CacheEntry('valeur', stored_at=time.time() - 120))
+    cache.set('recente', 'valeur')
+
+    assert cache.get('ancienne') is None
+    assert cache.get('recente') == 'valeur'
+    assert cache.stats()['expirations'] == 1
+    assert len(cache) == 1
+
+
+def test_sqlite_ttl_et_revalidation(tmp_path):
+    cache = SQLiteCache(str(tmp_path / 'cache.db'), ttl=60)
+    try:
+        cache.set_entry('1ABC', CacheEntry({'id': '1ABC'}, stored_at=time.time() - 120, etag='"v1"'))
+
+        assert cache.get('1ABC') is None
+        assert cache.stats()['expirations'] == 1
+        # L'entrée expirée reste disponible pour une requête conditionnelle
+        assert cache.get_entry('1ABC').etag == '"v1"'
+
+        cache.touch('1ABC')
+        assert cache.get('1ABC') == {'id': '1ABC'}
+    finally:
+        cache.close()
+
+
+def test_sqlite_eviction_par_taille(tmp_path):
+    cache = SQLiteCache(str(tmp_path / 'cache.db'), max_bytes=100)
+    try:
+        cache.set('ancienne', 'x' * 40)
+        cache.set('moyenne', 'x' * 40)
+        cache.get('ancienne')
+        cache.set('nouvelle', 'x' * 40)
+
+        assert cache.get('moyenne') is None
+        assert cache.get('ancienne') is not None and cache.get('nouvelle') is not None
+        assert cache.stats()['bytes'] <= 90
+    finally:
+        cache.close()
+
+
+def test_deux_niveaux_promotion_du_disque_vers_la_memoire(tmp_path):
+    chemin = str(tmp_path / 'cache.db')
+    TwoTierCache(chemin, ttl=60).set('1ABC', {'id': '1ABC'})
+
+    cache = TwoTierCache(chemin, ttl=60)
+    try:
+        assert cache.memory.get('1ABC') is None
+        assert cache.get('1ABC') == {'id': '1ABC'}
+        assert cache.memory.get('1ABC') == {'id': '1ABC'}
+    finally:
+        cache.disk.close()
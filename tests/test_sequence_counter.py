@@ -0,0 +1,70 @@
+import json
+import sys
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+import sequence_counter as sc  # noqa: E402
+
+
+def ecrire_json(tmp_path, donnees):
+    chemin = tmp_path / 'sequences.json'
+    chemin.write_text(json.dumps(donnees), encoding='utf-8')
+    return str(chemin)
+
+
+def test_flux_json_valeur_imbriquee_avant_sequences(tmp_path):
+    chemin = ecrire_json(tmp_path, {'meta': {'source': 'lab'}, 'sequences': ['AC', 'AC', 'G']})
+
+    attendu = Counter(sc.lire_sequences_json(chemin))
+    assert Counter(sc.iterer_sequences_json(chemin)) == attendu == Counter({'AC': 2, 'G': 1})
+
+
+def test_flux_json_valeur_non_comptable_sans_sequences(tmp_path):
+    chemin = ecrire_json(tmp_path, {'a': 'AC', 'meta': {'source': 'lab'}})
+
+    with pytest.raises(SystemExit):
+        list(sc.iterer_sequences_json(chemin))
+
+
+@pytest.mark.parametrize('k', [3, 12])
+def test_kmers_aucun_kmer_valide(k):
+    # k=3 : comptage dense (bincount) ; k=12 : comptage creux (np.unique)
+    compteur = sc.CompteurKmers(k)
+    assert compteur.dense == (k * 2 <= sc.BITS_MAX_DENSE)
+
+    assert sc.compter_kmers(['AC', 'NNNNNNNNNNNNNN', ''], k) == Counter()
+
+
+def test_stock_fichier_modifie_remplace_sa_contribution(tmp_path):
+    source = tmp_path / 'jour.csv'
+    autre = tmp_path / 'autre.csv'
+    source.write_text('sequence\nAA\nAA\nCC\n', encoding='utf-8')
+    autre.write_text('sequence\nAA\n', encoding='utf-8')
+
+    with sc.StockComptages(str(tmp_path / 'stock.db')) as stock:
+        for chemin in (source, autre):
+            compteur = Counter(sc.iterer_sequences_csv(str(chemin)))
+            assert not stock.ajouter('sequences', str(chemin), sc.somme_controle(str(chemin)), compteur)
+
+        # Données du jour ajoutées au fichier déjà ingéré
+        source.write_text('sequence\nAA\nAA\nTT\n', encoding='utf-8')
+        compteur = Counter(sc.iterer_sequences_csv(str(source)))
+        assert stock.ajouter('sequences', str(source), sc.somme_controle(str(source)), compteur)
+
+        assert stock.compteur('sequences') == Counter({'AA': 3, 'TT': 1})
+        assert stock.nb_fichiers('sequences') == 2
+
+
+def test_csv_parallele_identique_au_comptage_sequentiel(tmp_path, monkeypatch):
+    chemin = tmp_path / 'grand.csv'
+    lignes = [f'S{i % 37},"x, {i}"' for i in range(5000)]
+    chemin.write_text('sequence,info\n' + '\n'.join(lignes) + '\n', encoding='utf-8')
+    monkeypatch.setattr(sc, 'TAILLE_MIN_MORCEAU', 1024)
+    monkeypatch.setattr(sc.os, 'cpu_count', lambda: 3)
+
+    attendu = Counter(sc.iterer_sequences_csv(str(chemin)))
+    assert sc.compter_csv_parallele(str(chemin), 3) == attendu